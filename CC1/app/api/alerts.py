@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from typing import List
 from app import schemas, models
 from app.database import get_db
+from app.core.escalation import acknowledge_alert, escalation_scheduler
+from app.core.incident_manager import incident_manager
 
 router = APIRouter()
 
@@ -46,4 +48,20 @@ def update_alert(alert_id: int, alert: schemas.AlertUpdate, db: Session = Depend
     db.commit()
     db.refresh(db_alert)
     
-    return db_alert
\ No newline at end of file
+    # Any answer to the alert stops its escalation
+    if db_alert.status != "pending":
+        escalation_scheduler.cancel(db_alert.id)
+    
+    # A closed alert ends the incident so the next fall raises a new alert
+    if db_alert.status in ("resolved", "false_alarm"):
+        incident_manager.resolve(db_alert.user_id, db_alert.id)
+    
+    return db_alert
+
+@router.post("/{alert_id}/acknowledge", response_model=schemas.Alert)
+def acknowledge(alert_id: int, db: Session = Depends(get_db)):
+    # Stops the escalation ladder before it reaches the next channel
+    db_alert = acknowledge_alert(db, alert_id)
+    if db_alert is None:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return db_alert
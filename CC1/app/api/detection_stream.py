@@ -0,0 +1,283 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from collections import deque
+from typing import Deque, Dict, Any
+import asyncio
+import json
+import logging
+import os
+import time
+from app.database import SessionLocal
+from app.core.admission import AdmissionRejectedError, admission_controller
+from app.core.frame_protocol import FrameMessage, KIND_JPEG, KIND_LANDMARKS, decode_frame_message, decode_landmarks
+from app.core.inference_executor import ExecutorSaturatedError, inference_executor
+from app.api import fall_detection
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Frames waiting for inference per connection; older frames are dropped when inference lags
+STREAM_MAX_PENDING_FRAMES = int(os.getenv("STREAM_MAX_PENDING_FRAMES", "2"))
+
+class StreamConnection:
+    def __init__(self, websocket: WebSocket, user_id: int):
+        """
+        Initialize the state of one edge-device stream connection
+
+        Args:
+            websocket: Accepted WebSocket connection
+            user_id: ID of the monitored user
+        """
+        self.websocket = websocket
+        self.user_id = user_id
+        self.connection_id = f"ws-{id(websocket)}"
+        self.pending: Deque[FrameMessage] = deque()
+        self.frame_ready = asyncio.Event()
+        self.detector_streams = set()
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.send_lock = asyncio.Lock()
+
+    def enqueue(self, message: FrameMessage):
+        """
+        Queue a frame for inference, dropping the oldest frame if the queue is full
+
+        Args:
+            message: Decoded frame message
+        """
+        self.frames_received += 1
+        if len(self.pending) >= STREAM_MAX_PENDING_FRAMES:
+            self.pending.popleft()
+            self.frames_dropped += 1
+        self.pending.append(message)
+        self.frame_ready.set()
+
+    def detector_stream_id(self, stream_id: str) -> str:
+        """
+        Get the detector state key for a stream of this connection
+
+        Args:
+            stream_id: Stream identifier sent by the device
+
+        Returns:
+            Per-connection detector stream key
+        """
+        key = f"{self.connection_id}:{stream_id}"
+        self.detector_streams.add(key)
+        return key
+
+    async def send_json(self, message: Dict[str, Any]):
+        """
+        Send a JSON message (serialized so inference and control replies do not interleave)
+
+        Args:
+            message: Message to send
+        """
+        async with self.send_lock:
+            await self.websocket.send_text(json.dumps(message, default=float))
+
+async def process_frame(connection: StreamConnection, message: FrameMessage, db) -> Dict[str, Any]:
+    """
+    Run detection on a frame message and handle positives
+
+    JPEG decoding and inference run on the shared inference executor;
+    landmark frames skip to the feature and fusion stages in the threadpool,
+    as does database work, so the event loop keeps receiving frames.
+
+    Args:
+        connection: Stream connection
+        message: Frame message to process
+        db: Database session of the connection
+
+    Returns:
+        Detection result message (with an "incident" entry on positives)
+    """
+    if message.kind == KIND_JPEG:
+        cost = 1.0
+    elif message.kind == KIND_LANDMARKS:
+        cost = fall_detection.LANDMARK_FRAME_COST
+        try:
+            landmarks = decode_landmarks(message.payload)
+        except ValueError as e:
+            return {"type": "error", "stream_id": message.stream_id, "message": str(e)}
+    else:
+        return {"type": "error", "stream_id": message.stream_id, "message": f"Unsupported frame kind {message.kind}"}
+
+    priority = fall_detection.frame_priority(connection.user_id)
+    admission_controller.acquire(connection.user_id, priority, cost=cost)
+    try:
+        stream_key = connection.detector_stream_id(message.stream_id)
+        if message.kind == KIND_LANDMARKS:
+            # Pose already ran on the device: only features and fusion run here
+            detection = await run_in_threadpool(
+                fall_detection.detect_landmarks, landmarks, connection.user_id, stream_key, message.timestamp)
+        else:
+            detection = await inference_executor.run(
+                fall_detection.detect_frame, message.payload, connection.user_id, stream_key, message.timestamp,
+                priority=priority)
+    finally:
+        admission_controller.release(priority)
+    if detection is None:
+        return {"type": "error", "stream_id": message.stream_id, "message": "Invalid image data"}
+
+    is_fall, confidence, details = detection
+    result = {
+        "type": "detection",
+        "stream_id": message.stream_id,
+        "timestamp": message.timestamp,
+        "is_fall_detected": is_fall,
+        "confidence": confidence,
+        "details": details
+    }
+
+    stored = await run_in_threadpool(
+        fall_detection.store_detection_result, db, connection.user_id, is_fall, confidence, details)
+    if "incident" in stored:
+        result["incident"] = stored
+
+    return result
+
+async def run_inference(connection: StreamConnection):
+    """
+    Process queued frames of a connection and send back results
+
+    Args:
+        connection: Stream connection
+    """
+    db = SessionLocal()
+    try:
+        while True:
+            await connection.frame_ready.wait()
+            connection.frame_ready.clear()
+
+            while connection.pending:
+                message = connection.pending.popleft()
+                started = time.perf_counter()
+
+                try:
+                    result = await process_frame(connection, message, db)
+                except ExecutorSaturatedError as e:
+                    # Shared executor is busy with other requests: skip this frame
+                    connection.frames_dropped += 1
+                    await connection.send_json({"type": "overloaded", "stream_id": message.stream_id, "message": str(e)})
+                    continue
+                except AdmissionRejectedError as e:
+                    # Shed by admission control: over the user's frame rate or the server is overloaded
+                    connection.frames_dropped += 1
+                    await connection.send_json({
+                        "type": "rate_limited" if e.status_code == 429 else "overloaded",
+                        "stream_id": message.stream_id,
+                        "message": e.reason,
+                        "retry_after": round(e.retry_after, 3)
+                    })
+                    continue
+                except Exception as e:
+                    logger.error(f"Error processing stream frame: {str(e)}")
+                    db.rollback()
+                    result = {"type": "error", "stream_id": message.stream_id, "message": str(e)}
+
+                connection.frames_processed += 1
+                result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                result["frames_dropped"] = connection.frames_dropped
+
+                incident = result.pop("incident", None)
+                await connection.send_json(result)
+
+                if incident is not None:
+                    await connection.send_json({
+                        "type": "incident",
+                        "stream_id": message.stream_id,
+                        "timestamp": message.timestamp,
+                        "data": incident
+                    })
+    finally:
+        db.close()
+
+def reset_detector_streams(stream_keys):
+    """
+    Drop detector state of a closed connection's streams (runs in the threadpool)
+
+    Args:
+        stream_keys: Detector stream keys used by the connection
+    """
+    detector = fall_detection.get_fall_detector()
+    for stream_key in stream_keys:
+        try:
+            detector.reset_stream(stream_key)
+        except Exception as e:
+            logger.warning(f"Could not reset detector stream {stream_key}: {str(e)}")
+
+@router.websocket("/stream")
+async def detection_stream(websocket: WebSocket, user_id: int):
+    """
+    Long-lived binary frame ingestion channel for continuous video detection
+
+    Edge devices send binary frame messages (see app.core.frame_protocol) carrying
+    JPEG frames or, if they run pose estimation themselves, landmark arrays, and
+    receive "detection" and "incident" JSON messages on the same socket. Text
+    messages are JSON control messages ("heartbeat", "stats").
+
+    Args:
+        websocket: WebSocket connection
+        user_id: ID of the monitored user
+    """
+    await websocket.accept()
+
+    # Load the detector (first use) off the event loop
+    if await run_in_threadpool(fall_detection.fall_detector_component.get) is None:
+        await websocket.send_text(json.dumps({"type": "error", "message": "Fall detection system not available"}))
+        await websocket.close(code=1011)
+        return
+
+    connection = StreamConnection(websocket, user_id)
+    inference_task = asyncio.create_task(run_inference(connection))
+    logger.info(f"Detection stream {connection.connection_id} opened for user {user_id}")
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                try:
+                    connection.enqueue(decode_frame_message(message["bytes"]))
+                except ValueError as e:
+                    await connection.send_json({"type": "error", "message": str(e)})
+                continue
+
+            try:
+                control = json.loads(message.get("text") or "{}")
+            except json.JSONDecodeError:
+                await connection.send_json({"type": "error", "message": "Invalid JSON"})
+                continue
+
+            if control.get("type") == "heartbeat":
+                await connection.send_json({"type": "heartbeat_response", "timestamp": time.time()})
+            elif control.get("type") == "stats":
+                await connection.send_json({
+                    "type": "stats",
+                    "frames_received": connection.frames_received,
+                    "frames_processed": connection.frames_processed,
+                    "frames_dropped": connection.frames_dropped,
+                    "pending": len(connection.pending)
+                })
+            else:
+                await connection.send_json({"type": "error", "message": f"Unknown message type: {control.get('type')}"})
+
+    except WebSocketDisconnect:
+        pass
+    finally:
+        inference_task.cancel()
+        try:
+            await inference_task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Inference task of stream {connection.connection_id} failed: {str(e)}")
+        # A remote detector resets over IPC, so keep it off the event loop
+        await run_in_threadpool(reset_detector_streams, list(connection.detector_streams))
+        logger.info(
+            f"Detection stream {connection.connection_id} closed: {connection.frames_processed} processed, "
+            f"{connection.frames_dropped} dropped")
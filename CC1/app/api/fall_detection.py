@@ -1,28 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+import functools
+import json
 import numpy as np
 import cv2
 import io
+import math
+import os
+import time
 import logging
 from app import models, schemas
-from app.database import get_db
-# Try to import core components, but make them optional
-try:
-    from app.core.fall_detection.hybrid_detector import HybridFallDetector
-    FALL_DETECTION_AVAILABLE = True
-except Exception as e:
-    logger.warning(f"Fall detection not available: {e}")
-    FALL_DETECTION_AVAILABLE = False
-    HybridFallDetector = None
+from app.database import get_db, SessionLocal
+from app.core.admission import (
+    PRIORITY_CRITICAL, PRIORITY_ROUTINE, AdmissionRejectedError, admission_controller)
+from app.core.calibration import calibration_cache, run_calibration, score_sampler
+from app.core.circuit_breaker import circuit_breakers
+from app.core.delivery_plan import delivery_stats
+from app.core.escalation import escalation_scheduler
+from app.core.frame_protocol import KIND_LANDMARKS, decode_frame_message, decode_landmarks
+from app.core.incident_manager import incident_manager
+from app.core.job_queue import emergency_jobs, guidance_jobs
+from app.core.inference_executor import ExecutorSaturatedError, inference_executor, loop_lag_monitor
+from app.core.lazy_loader import LazyComponent, warmup_manager
+from app.core.metrics import metrics
+from app.core.notification_outbox import OUTBOX_CHANNELS, get_alert_notifications, notification_dispatcher
+from app.core.status_cache import combined_etag, etag_matches, mark_alerts_changed, status_cache
+from app.utils.mjpeg import split_concatenated_jpeg, split_multipart_mjpeg
+from app.utils.process_memory import read_process_memory
 
-try:
-    from app.core.alert_system import AlertSystem
-    ALERT_SYSTEM_AVAILABLE = True
-except Exception as e:
-    logger.warning(f"Alert system not available: {e}")
-    ALERT_SYSTEM_AVAILABLE = False
-    AlertSystem = None
+logger = logging.getLogger(__name__)
 
 try:
     from app.core.emergency_network import EmergencyNetwork
@@ -32,26 +40,479 @@ except Exception as e:
     EMERGENCY_NETWORK_AVAILABLE = False
     EmergencyNetwork = None
 
-try:
+router = APIRouter()
+
+CASCADE_DETECTION = os.getenv("CASCADE_DETECTION", "false").lower() == "true"
+
+# When set, detection runs in a shared inference server process instead of in this worker
+INFERENCE_SERVER_ADDRESS = os.getenv("INFERENCE_SERVER_ADDRESS")
+
+def load_fall_detector():
+    """
+    Import the detection stack (MediaPipe, TensorFlow, librosa, scikit-learn) and build the detector,
+    or connect to the inference server if one is configured
+    """
+    if INFERENCE_SERVER_ADDRESS:
+        from app.core.inference_server import RemoteFallDetector
+        return RemoteFallDetector(
+            INFERENCE_SERVER_ADDRESS, os.getenv("INFERENCE_SERVER_AUTHKEY", "").encode())
+    
+    from app.core.fall_detection.hybrid_detector import HybridFallDetector
+    return HybridFallDetector(
+        cascade_mode=CASCADE_DETECTION,
+        max_streams=int(os.getenv("DETECTOR_MAX_STREAMS", "1000")),
+        stream_ttl=float(os.getenv("DETECTOR_STREAM_TTL_SECONDS", "600")))
+
+def load_alert_system():
+    """
+    Build the alert system and its channel plugins (httpx for Twilio, aiosmtplib for email, the push provider)
+    """
+    from app.core.alert_system import AlertSystem
+    return AlertSystem()
+
+def load_ai_assistant():
+    """
+    Import the text-to-speech engine and build the AI assistant
+    """
     from app.core.ai_assistant import AIAssistant
-    AI_ASSISTANT_AVAILABLE = True
-except Exception as e:
-    logger.warning(f"AI assistant not available: {e}")
-    AI_ASSISTANT_AVAILABLE = False
-    AIAssistant = None
+    return AIAssistant()
 
-router = APIRouter()
-logger = logging.getLogger(__name__)
+# Core components load on first use or during the background warm-up, not at import
+# A server connection cannot be shared across forked workers, so each connects on its own
+fall_detector_component = warmup_manager.register(LazyComponent(
+    "fall_detector", load_fall_detector, after_fork=lambda detector: detector.after_fork(),
+    fork_safe=not INFERENCE_SERVER_ADDRESS))
+alert_system_component = warmup_manager.register(LazyComponent("alert_system", load_alert_system))
+# The speech engine runs its own driver loop, so each worker builds its own
+ai_assistant_component = warmup_manager.register(LazyComponent(
+    "ai_assistant", load_ai_assistant, fork_safe=False))
+
+def get_fall_detector():
+    """
+    Get the fall detector, loading it on first use (call off the event loop)
+    
+    Returns:
+        The hybrid fall detector
+        
+    Raises:
+        HTTPException: 501 if the detection stack could not be loaded
+    """
+    fall_detector = fall_detector_component.get()
+    if fall_detector is None:
+        raise HTTPException(status_code=501, detail="Fall detection system not available")
+    return fall_detector
+
+# Directory for record-and-replay captures of detector inputs
+RECORDING_DIR = os.getenv("RECORDING_DIR", "recordings")
+
+# Upper bound on frames accepted by the batch endpoint
+MAX_BATCH_FRAMES = int(os.getenv("MAX_BATCH_FRAMES", "100"))
+
+# Near-miss scores at or above this confidence are stored for per-user calibration
+CALIBRATION_SCORE_FLOOR = float(os.getenv("CALIBRATION_SCORE_FLOOR", "0.3"))
+
+# Admission tokens taken by one landmark frame (a JPEG frame takes 1)
+LANDMARK_FRAME_COST = float(os.getenv("LANDMARK_FRAME_COST", "0.1"))
+
+# Upper bound on users in one multi-user status request
+MAX_STATUS_USERS = int(os.getenv("MAX_STATUS_USERS", "200"))
+
+# Shed routine frames once work waits too long for an inference worker
+admission_controller.latency_probe = inference_executor.queue_latency
+
+def record_detection_score(db: Session, user_id: int, details: Dict[str, Any], alert_id: int = None):
+    """
+    Stage a detection score for the calibration job (committed by the caller)
+    
+    Args:
+        db: Database session
+        user_id: ID of the user
+        details: Detection details from the fall detector
+        alert_id: ID of the alert raised for this detection, if any
+    """
+    db.add(models.user.DetectionScore(
+        user_id=user_id,
+        alert_id=alert_id,
+        video_confidence=details.get("video_confidence", 0.0),
+        audio_confidence=details.get("audio_confidence", 0.0),
+        hybrid_confidence=details.get("hybrid_confidence", 0.0)
+    ))
+
+def handle_fall_positive(db: Session, user_id: int, confidence: float, details: Dict[str, Any],
+                         commit: bool = True) -> Dict[str, Any]:
+    """
+    Coalesce a positive detection into the user's incident and trigger the
+    emergency response only for the first positive of an incident
+    
+    Args:
+        db: Database session
+        user_id: ID of the user
+        confidence: Detection confidence
+        details: Detection details from the fall detector
+        commit: Commit coalesced updates immediately (batch callers commit once)
+        
+    Returns:
+        Result fields to merge into the detection response
+    """
+    incident, is_new, peak_raised = incident_manager.observe(user_id, confidence)
+    
+    if not is_new:
+        # Repeated positive: update the existing alert instead of raising a new one
+        # Only a new peak is written: most coalesced frames change nothing stored
+        if peak_raised:
+            if incident.alert_id is not None:
+                update_incident_alert(db, incident)
+            record_detection_score(db, user_id, details, incident.alert_id)
+            if commit:
+                db.commit()
+        return {"alert_triggered": False, "incident": incident.to_dict()}
+    
+    try:
+        result = trigger_emergency_response(db, user_id, confidence, details, incident)
+    except Exception:
+        # Let the next positive retry the downstream work
+        incident_manager.discard(user_id)
+        raise
+    
+    result["incident"] = incident.to_dict()
+    return result
+
+def update_incident_alert(db: Session, incident):
+    """
+    Write an incident's peak confidence to its alert row (committed by the caller)
+    
+    Args:
+        db: Database session
+        incident: Incident with an attached alert
+    """
+    db.query(models.user.Alert).filter(models.user.Alert.id == incident.alert_id).update({
+        "notes": f"Fall detected with peak confidence {incident.peak_confidence:.2f} "
+                 f"over {incident.positive_frames} frames"
+    })
+    mark_alerts_changed(db, incident.user_id)
+
+def trigger_emergency_response(db: Session, user_id: int, confidence: float,
+                               details: Dict[str, Any], incident) -> Dict[str, Any]:
+    """
+    Create the alert for a new incident and queue the emergency response
+    
+    Args:
+        db: Database session
+        user_id: ID of the user
+        confidence: Detection confidence
+        details: Detection details from the fall detector
+        incident: Newly opened incident
+        
+    Returns:
+        Result fields to merge into the detection response
+    """
+    result = {}
+    
+    # Get user information
+    user = db.query(models.user.User).filter(models.user.User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Get user location
+    location = db.query(models.user.Location).filter(
+        models.user.Location.user_id == user_id,
+        models.user.Location.is_primary == True
+    ).first()
+    
+    location_data = {
+        "latitude": location.latitude if location else "Unknown",
+        "longitude": location.longitude if location else "Unknown",
+        "address": location.address if location else "Unknown location"
+    }
+    
+    # Create alert
+    alert = models.user.Alert(
+        user_id=user_id,
+        location_lat=location_data["latitude"],
+        location_lng=location_data["longitude"],
+        status="pending",
+        alert_type="fall_detected",
+        notes=f"Fall detected with confidence {confidence:.2f}"
+    )
+    db.add(alert)
+    db.flush()
+    record_detection_score(db, user_id, details, alert.id)
+    if incident_manager.attach_alert(user_id, alert.id) is not None:
+        # Later positives raised the peak while the alert was being created
+        update_incident_alert(db, incident)
+    
+    # Prepare alert data
+    alert_data = {
+        "user_name": user.full_name,
+        "user_id": user_id,
+        "timestamp": alert.timestamp.isoformat() if alert.timestamp else "Unknown",
+        "location": location_data["address"],
+        "status": "Fall detected",
+        "confidence": confidence
+    }
+    
+    # The first escalation rung is committed with the alert; later rungs wait for an acknowledgment
+    payload = escalation_payload(alert.id, user_id, alert_data, location_data)
+    escalation = escalation_scheduler.run_immediate(db, alert, payload)
+    db.commit()
+    notification_dispatcher.wake()
+    escalation_scheduler.schedule(alert.id, payload)
+    
+    # Voice guidance runs as a background job
+    result["alert_triggered"] = True
+    result["alert_id"] = alert.id
+    result["notifications_queued"] = count_queued_notifications(escalation)
+    result["jobs"] = queue_emergency_response(payload)
+    
+    return result
+
+def escalation_payload(alert_id: int, user_id: int, alert_data: Dict[str, Any],
+                       location_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the data the escalation steps and response jobs of an alert work from
+    
+    Args:
+        alert_id: ID of the alert
+        user_id: ID of the user
+        alert_data: Alert information for notifications
+        location_data: User location (latitude, longitude, address)
+        
+    Returns:
+        Escalation payload
+    """
+    return {
+        "alert_id": alert_id,
+        "user_id": user_id,
+        "alert_data": alert_data,
+        "latitude": location_data["latitude"],
+        "longitude": location_data["longitude"]
+    }
+
+def count_queued_notifications(escalation: Dict[str, Any]) -> int:
+    """
+    Count the notifications queued by escalation steps
+    
+    Args:
+        escalation: Step results from the escalation scheduler
+        
+    Returns:
+        Number of notifications queued
+    """
+    return sum(result for step, result in escalation.items() if step in OUTBOX_CHANNELS and result)
+
+def run_contact_step(channel: str, db: Session, alert, payload: Dict[str, Any]) -> int:
+    """
+    Notify the emergency contacts on one channel (escalation step)
+    
+    Args:
+        channel: Notification channel
+        db: Database session of the escalation rung
+        alert: The alert
+        payload: Escalation payload
+        
+    Returns:
+        Number of notifications queued
+    """
+    if not EMERGENCY_NETWORK_AVAILABLE:
+        return 0
+    return EmergencyNetwork(db).queue_contact_notifications(
+        alert.user_id, alert.id, payload["alert_data"], channels=(channel,))
+
+def run_volunteers_step(db: Session, alert, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Assemble the volunteer response team in the background (escalation step)
+    
+    Args:
+        db: Database session of the escalation rung
+        alert: The alert
+        payload: Escalation payload
+        
+    Returns:
+        Queued job, or None without the emergency network
+    """
+    if not EMERGENCY_NETWORK_AVAILABLE:
+        return None
+    return emergency_jobs.enqueue("response_team", payload).to_dict()
+
+def queue_emergency_response(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Queue the voice guidance protocol for a persisted alert
+    
+    Contacts and the response team are reached through the escalation ladder.
+    
+    Args:
+        payload: Escalation payload of the alert
+        
+    Returns:
+        Queued jobs (poll /jobs/{job_id} for their outcome)
+    """
+    jobs = []
+    if ai_assistant_component.available:
+        # Not retried: a partial run has already spoken to the user
+        jobs.append(guidance_jobs.enqueue("voice_guidance", payload, max_attempts=1))
+    return [job.to_dict() for job in jobs]
+
+def run_response_team_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Assemble the emergency response team for an alert (job handler)
+    
+    Args:
+        payload: Escalation payload of the alert
+        
+    Returns:
+        Response team
+    """
+    db = SessionLocal()
+    try:
+        latitude, longitude = payload["latitude"], payload["longitude"]
+        emergency_team = EmergencyNetwork(db).create_emergency_response_team(
+            payload["user_id"],
+            float(latitude) if latitude != "Unknown" else 0.0,
+            float(longitude) if longitude != "Unknown" else 0.0
+        )
+        if not emergency_team.get("team_created"):
+            raise RuntimeError(emergency_team.get("error", "Response team not created"))
+        return emergency_team
+    finally:
+        db.close()
 
-# Initialize core components
-fall_detector = HybridFallDetector() if FALL_DETECTION_AVAILABLE else None
-alert_system = AlertSystem() if ALERT_SYSTEM_AVAILABLE else None
-ai_assistant = AIAssistant() if AI_ASSISTANT_AVAILABLE else None
+def run_voice_guidance_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the voice guidance protocol for an alert (job handler)
+    
+    Args:
+        payload: Escalation payload of the alert
+        
+    Returns:
+        Completion marker
+    """
+    ai_assistant = ai_assistant_component.get()
+    if ai_assistant is None:
+        return {"completed": False, "error": ai_assistant_component.error}
+    
+    ai_assistant.emergency_guidance_protocol()
+    return {"completed": True}
+
+emergency_jobs.register("response_team", run_response_team_job)
+guidance_jobs.register("voice_guidance", run_voice_guidance_job)
+for channel in OUTBOX_CHANNELS:
+    escalation_scheduler.register(channel, functools.partial(run_contact_step, channel))
+escalation_scheduler.register("volunteers", run_volunteers_step)
+
+def detect_frame(jpeg: bytes, user_id: int, stream_id: str,
+                 timestamp: Optional[float] = None) -> Optional[Tuple[bool, float, Dict[str, Any]]]:
+    """
+    Decode a JPEG frame and run fall detection on it (runs on the inference executor)
+    
+    Args:
+        jpeg: Encoded frame
+        user_id: ID of the user
+        stream_id: Camera stream identifier
+        timestamp: Capture time of the frame in seconds, if the client sent one
+        
+    Returns:
+        Tuple of (is_fall, confidence, details), or None if the image is invalid
+    """
+    with metrics.stage("api", "imdecode"):
+        frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+    
+    # Use the user's calibrated parameters (cache only, no DB lookup)
+    with metrics.stage("api", "detect"):
+        return get_fall_detector().detect_fall(
+            video_frame=frame, stream_id=stream_id, params=calibration_cache.get(user_id), timestamp=timestamp)
+
+def detect_landmarks(landmarks: Optional[np.ndarray], user_id: int, stream_id: str,
+                     timestamp: Optional[float] = None) -> Tuple[bool, float, Dict[str, Any]]:
+    """
+    Run the feature and fusion stages on landmarks computed by an edge device
+    
+    Args:
+        landmarks: Landmark array of shape (33, 4), or None if no pose was found
+        user_id: ID of the user
+        stream_id: Camera stream identifier
+        timestamp: Capture time of the frame in seconds
+        
+    Returns:
+        Tuple of (is_fall, confidence, details)
+    """
+    with metrics.stage("api", "detect_landmarks"):
+        return get_fall_detector().detect_fall_from_landmarks(
+            landmarks, stream_id=stream_id, params=calibration_cache.get(user_id), timestamp=timestamp)
+
+@metrics.timed("api", "db_write")
+def store_detection_result(db: Session, user_id: int, is_fall: bool, confidence: float,
+                           details: Dict[str, Any], commit: bool = True) -> Dict[str, Any]:
+    """
+    Persist the outcome of one detection (runs in the threadpool)
+    
+    Args:
+        db: Database session
+        user_id: ID of the user
+        is_fall: Whether a fall was detected
+        confidence: Detection confidence
+        details: Detection details from the fall detector
+        commit: Commit immediately (batch callers commit once)
+        
+    Returns:
+        Result fields to merge into the detection response
+    """
+    # If fall detected, open or extend the user's incident
+    if is_fall:
+        return handle_fall_positive(db, user_id, confidence, details, commit=commit)
+    
+    if confidence >= CALIBRATION_SCORE_FLOOR and score_sampler.allow(user_id):
+        # Keep a sample of near misses so calibration can learn from missed falls
+        record_detection_score(db, user_id, details)
+        if commit:
+            db.commit()
+    return {}
+
+def frame_priority(user_id: int) -> str:
+    """
+    Get the admission priority of a user's frames
+    
+    Args:
+        user_id: ID of the user
+        
+    Returns:
+        PRIORITY_CRITICAL while the user has an incident inside its cooldown, else PRIORITY_ROUTINE
+    """
+    return PRIORITY_CRITICAL if incident_manager.is_active(user_id) else PRIORITY_ROUTINE
+
+def admission_response(error: AdmissionRejectedError) -> HTTPException:
+    """
+    Build the response for a request shed by the admission controller
+    
+    Args:
+        error: Rejection error
+        
+    Returns:
+        HTTP 429 or 503 exception with a Retry-After header
+    """
+    logger.warning(f"Shedding detection request: {error.reason}")
+    return HTTPException(status_code=error.status_code, detail=error.reason,
+                         headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))})
+
+def saturated_response(error: ExecutorSaturatedError) -> HTTPException:
+    """
+    Build the response for a request rejected by the inference executor
+    
+    Args:
+        error: Saturation error
+        
+    Returns:
+        HTTP 503 exception asking the client to retry
+    """
+    logger.warning(f"Rejecting detection request: {str(error)}")
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
 
 @router.post("/detect-video")
 async def detect_fall_video(
     video_frame: UploadFile = File(...),
     user_id: int = Form(...),
+    stream_id: str = Form(None),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -60,111 +521,288 @@ async def detect_fall_video(
     Args:
         video_frame: Uploaded video frame
         user_id: ID of the user
+        stream_id: Camera stream identifier (defaults to the user ID)
         db: Database session
         
     Returns:
         Detection results
     """
-    if not FALL_DETECTION_AVAILABLE:
+    # Known-missing stack fails fast; loading itself happens on the inference executor
+    if not fall_detector_component.available:
         raise HTTPException(status_code=501, detail="Fall detection system not available")
     
+    priority = frame_priority(user_id)
+    try:
+        admission_controller.acquire(user_id, priority)
+    except AdmissionRejectedError as e:
+        raise admission_response(e)
+    
     try:
         # Read the uploaded frame
-        contents = await video_frame.read()
+        with metrics.stage("api", "upload_read"):
+            contents = await video_frame.read()
         
-        # Convert to numpy array
-        nparr = np.frombuffer(contents, np.uint8)
+        # Decode and detect off the event loop
+        detection = await inference_executor.run(
+            detect_frame, contents, user_id, stream_id or str(user_id), priority=priority)
+        if detection is None:
+            raise HTTPException(status_code=400, detail="Invalid image data")
         
-        # Decode image
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        is_fall, confidence, details = detection
+        result = {
+            "is_fall_detected": is_fall,
+            "confidence": confidence,
+            "details": details
+        }
+        result.update(await run_in_threadpool(store_detection_result, db, user_id, is_fall, confidence, details))
         
-        if frame is None:
-            raise HTTPException(status_code=400, detail="Invalid image data")
+        return result
         
-        # Perform fall detection
-        is_fall, confidence, details = fall_detector.detect_fall(video_frame=frame)
+    except ExecutorSaturatedError as e:
+        raise saturated_response(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in video fall detection: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission_controller.release(priority)
+
+@router.post("/detect-landmarks")
+async def detect_fall_landmarks(request: Request, user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    Detect falls from pose landmarks computed on an edge device
+    
+    The body is one binary frame message (see app.core.frame_protocol) of kind
+    KIND_LANDMARKS: stream id, capture time and a float16 or float32 (33, 4)
+    landmark array. Decoding and pose estimation are skipped; the landmarks go
+    straight to the feature and fusion stages.
+    
+    Args:
+        request: Incoming request
+        user_id: ID of the user
+        db: Database session
         
+    Returns:
+        Detection results
+    """
+    if not fall_detector_component.available:
+        raise HTTPException(status_code=501, detail="Fall detection system not available")
+    
+    with metrics.stage("api", "upload_read"):
+        body = await request.body()
+    try:
+        message = decode_frame_message(body)
+        if message.kind != KIND_LANDMARKS:
+            raise ValueError(f"Expected a landmark message, got kind {message.kind}")
+        landmarks = decode_landmarks(message.payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stream_id = message.stream_id or str(user_id)
+    
+    priority = frame_priority(user_id)
+    try:
+        admission_controller.acquire(user_id, priority, cost=LANDMARK_FRAME_COST)
+    except AdmissionRejectedError as e:
+        raise admission_response(e)
+    
+    try:
+        # Cheap enough for the threadpool; it must not queue behind JPEG frames on the executor
+        is_fall, confidence, details = await run_in_threadpool(
+            detect_landmarks, landmarks, user_id, stream_id, message.timestamp)
         result = {
+            "stream_id": stream_id,
+            "timestamp": message.timestamp,
             "is_fall_detected": is_fall,
             "confidence": confidence,
             "details": details
         }
+        result.update(await run_in_threadpool(store_detection_result, db, user_id, is_fall, confidence, details))
         
-        # If fall detected, trigger emergency response
-        if is_fall:
-            # Get user information
-            user = db.query(models.user.User).filter(models.user.User.id == user_id).first()
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            # Get user location
-            location = db.query(models.user.Location).filter(
-                models.user.Location.user_id == user_id,
-                models.user.Location.is_primary == True
-            ).first()
-            
-            location_data = {
-                "latitude": location.latitude if location else "Unknown",
-                "longitude": location.longitude if location else "Unknown",
-                "address": location.address if location else "Unknown location"
-            }
-            
-            # Create alert
-            alert = models.user.Alert(
-                user_id=user_id,
-                location_lat=location_data["latitude"],
-                location_lng=location_data["longitude"],
-                status="pending",
-                alert_type="fall_detected",
-                notes=f"Fall detected with confidence {confidence:.2f}"
-            )
-            db.add(alert)
-            db.commit()
-            
-            # Prepare alert data
-            alert_data = {
-                "user_name": user.full_name,
-                "user_id": user_id,
-                "timestamp": alert.timestamp.isoformat() if alert.timestamp else "Unknown",
-                "location": location_data["address"],
-                "status": "Fall detected",
-                "confidence": confidence
-            }
-            
-            # Notify emergency network
-            if EMERGENCY_NETWORK_AVAILABLE:
-                emergency_network = EmergencyNetwork(db)
-                emergency_team = emergency_network.create_emergency_response_team(
-                    user_id, 
-                    float(location_data["latitude"]) if location_data["latitude"] != "Unknown" else 0.0,
-                    float(location_data["longitude"]) if location_data["longitude"] != "Unknown" else 0.0
-                )
-                
-                # Send alerts to caregivers
-                notification_result = emergency_network.notify_emergency_contacts(user_id, alert_data)
-                
-                result["emergency_team"] = emergency_team
-                result["notifications_sent"] = notification_result
-            
-            # Send multi-channel alerts (in a real implementation, this would be async)
-            # recipients = {
-            #     "sms": [user.phone_number],
-            #     "email": [user.email]
-            # }
-            # if ALERT_SYSTEM_AVAILABLE:
-            #     await alert_system.send_multi_channel_alert(recipients, alert_data)
-            
-            result["alert_triggered"] = True
-            
-            # Provide AI assistance
-            if AI_ASSISTANT_AVAILABLE:
-                ai_assistant.emergency_guidance_protocol()
-            
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in video fall detection: {str(e)}")
+        logger.error(f"Error in landmark fall detection: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission_controller.release(priority)
+
+async def read_batch_frames(request: Request) -> Tuple[List[Tuple[bytes, Optional[float]]], Dict[str, str]]:
+    """
+    Read the frames of a batch request as multipart form parts or an MJPEG body
+    
+    Args:
+        request: Incoming request
+        
+    Returns:
+        Tuple of (list of (jpeg_bytes, timestamp or None), request fields)
+    """
+    content_type = request.headers.get("content-type", "")
+    fields = dict(request.query_params)
+    
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        fields.update({key: value for key, value in form.items() if isinstance(value, str)})
+        uploads = form.getlist("frames")
+        
+        timestamps = [None] * len(uploads)
+        if fields.get("timestamps"):
+            timestamps = [float(t) for t in json.loads(fields["timestamps"])]
+            if len(timestamps) != len(uploads):
+                raise HTTPException(status_code=400, detail="timestamps must match the number of frames")
+        
+        with metrics.stage("api", "upload_read"):
+            frames = [(await upload.read(), timestamp) for upload, timestamp in zip(uploads, timestamps)]
+        return frames, fields
+    
+    with metrics.stage("api", "upload_read"):
+        body = await request.body()
+    
+    if content_type.startswith("multipart/x-mixed-replace"):
+        boundary = content_type.partition("boundary=")[2].split(";")[0]
+        if not boundary:
+            raise HTTPException(status_code=400, detail="Missing multipart boundary")
+        return split_multipart_mjpeg(body, boundary), fields
+    
+    # Raw MJPEG: back-to-back JPEG images
+    return [(jpeg, None) for jpeg in split_concatenated_jpeg(body)], fields
+
+def detect_frame_batch(frames: List[Tuple[bytes, Optional[float]]], user_id: int,
+                       stream_id: str) -> List[Dict[str, Any]]:
+    """
+    Run fall detection over the frames of a batch in order (runs on the inference executor)
+    
+    Args:
+        frames: List of (jpeg_bytes, timestamp or None)
+        user_id: ID of the user
+        stream_id: Camera stream identifier
+        
+    Returns:
+        Per-frame results
+    """
+    frame_results = []
+    
+    for index, (jpeg, timestamp) in enumerate(frames):
+        detection = detect_frame(jpeg, user_id, stream_id, timestamp)
+        if detection is None:
+            frame_results.append({"index": index, "timestamp": timestamp, "error": "Invalid image data"})
+            continue
+        
+        is_fall, confidence, details = detection
+        frame_results.append({
+            "index": index,
+            "timestamp": timestamp,
+            "is_fall_detected": is_fall,
+            "confidence": confidence,
+            "details": details
+        })
+    
+    return frame_results
+
+@metrics.timed("api", "db_write_batch")
+def store_batch_results(db: Session, user_id: int, frame_results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Persist the outcomes of a batch in one transaction (runs in the threadpool)
+    
+    Args:
+        db: Database session
+        user_id: ID of the user
+        frame_results: Per-frame results from detect_frame_batch
+        
+    Returns:
+        Incident decision of the batch, or None if no frame was positive
+    """
+    incident_result = None
+    
+    for frame_result in frame_results:
+        if "error" in frame_result:
+            continue
+        
+        stored = store_detection_result(
+            db, user_id, frame_result["is_fall_detected"], frame_result["confidence"],
+            frame_result["details"], commit=False)
+        if frame_result["is_fall_detected"] and (incident_result is None or stored.get("alert_triggered")):
+            incident_result = stored
+    
+    db.commit()
+    return incident_result
+
+@router.post("/detect-video-batch")
+async def detect_fall_video_batch(request: Request, db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    Detect falls over a sequence of frames from one stream in a single request
+    
+    Frames are sent either as repeated "frames" multipart form parts (with an
+    optional JSON "timestamps" list) or as an MJPEG body
+    (multipart/x-mixed-replace with X-Timestamp part headers, or back-to-back
+    JPEG images). user_id and stream_id come from form fields or query parameters.
+    
+    Args:
+        request: Incoming request
+        db: Database session
+        
+    Returns:
+        Per-frame scores and the incident decision for the batch
+    """
+    # Known-missing stack fails fast; loading itself happens on the inference executor
+    if not fall_detector_component.available:
+        raise HTTPException(status_code=501, detail="Fall detection system not available")
+    
+    frames, fields = await read_batch_frames(request)
+    
+    if "user_id" not in fields:
+        raise HTTPException(status_code=422, detail="user_id is required")
+    if not frames:
+        raise HTTPException(status_code=400, detail="No frames in request")
+    if len(frames) > MAX_BATCH_FRAMES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_FRAMES} frames per batch")
+    
+    try:
+        user_id = int(fields["user_id"])
+    except ValueError:
+        raise HTTPException(status_code=422, detail="user_id must be an integer")
+    stream_id = fields.get("stream_id") or str(user_id)
+    
+    # Every frame of the batch counts against the user's frame rate
+    priority = frame_priority(user_id)
+    try:
+        admission_controller.acquire(user_id, priority, cost=len(frames))
+    except AdmissionRejectedError as e:
+        raise admission_response(e)
+    
+    try:
+        # Frames run in order through the same per-stream detector state, off the event loop
+        frame_results = await inference_executor.run(
+            detect_frame_batch, frames, user_id, stream_id, priority=priority)
+        peak_confidence = max((r.get("confidence", 0.0) for r in frame_results), default=0.0)
+        incident_result = await run_in_threadpool(store_batch_results, db, user_id, frame_results)
+        
+        result = {
+            "user_id": user_id,
+            "stream_id": stream_id,
+            "frames_processed": len(frame_results),
+            "falls_detected": sum(1 for r in frame_results if r.get("is_fall_detected")),
+            "peak_confidence": peak_confidence,
+            "frames": frame_results,
+            "alert_triggered": False
+        }
+        if incident_result is not None:
+            result.update(incident_result)
+            result["incident"] = incident_manager.get_incident(user_id) or incident_result.get("incident")
+        
+        return result
+        
+    except ExecutorSaturatedError as e:
+        raise saturated_response(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch video fall detection: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission_controller.release(priority)
 
 @router.post("/detect-audio")
 async def detect_fall_audio(
@@ -204,7 +842,7 @@ async def detect_fall_audio(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/trigger-manual-alert")
-async def trigger_manual_alert(
+def trigger_manual_alert(
     user_id: int = Form(...),
     notes: str = Form(None),
     db: Session = Depends(get_db)
@@ -220,6 +858,8 @@ async def trigger_manual_alert(
     Returns:
         Alert creation result
     """
+    # Always admitted; counting it in flight makes routine frames back off meanwhile
+    admission_controller.acquire(user_id, PRIORITY_CRITICAL)
     try:
         # Get user information
         user = db.query(models.user.User).filter(models.user.User.id == user_id).first()
@@ -242,7 +882,7 @@ async def trigger_manual_alert(
             notes=notes or "Manual alert triggered by user"
         )
         db.add(alert)
-        db.commit()
+        db.flush()
         
         # Prepare alert data
         alert_data = {
@@ -254,69 +894,297 @@ async def trigger_manual_alert(
             "notes": notes
         }
         
-        # Notify emergency network
-        notification_result = {}
-        if EMERGENCY_NETWORK_AVAILABLE:
-            emergency_network = EmergencyNetwork(db)
-            notification_result = emergency_network.notify_emergency_contacts(user_id, alert_data)
-        
-        # Send multi-channel alerts
-        # recipients = {
-        #     "sms": [user.phone_number],
-        #     "email": [user.email]
-        # }
-        # if ALERT_SYSTEM_AVAILABLE:
-        #     await alert_system.send_multi_channel_alert(recipients, alert_data)
+        # Escalate until a caregiver acknowledges; the first rung is committed with the alert
+        payload = escalation_payload(alert.id, user_id, alert_data, {
+            "latitude": alert.location_lat, "longitude": alert.location_lng})
+        escalation = escalation_scheduler.run_immediate(db, alert, payload)
+        db.commit()
+        notification_dispatcher.wake()
+        escalation_scheduler.schedule(alert.id, payload)
         
         return {
             "success": True,
             "alert_id": alert.id,
             "message": "Manual alert triggered successfully",
-            "notifications_sent": notification_result
+            "notifications_queued": count_queued_notifications(escalation),
+            "jobs": []
         }
         
     except Exception as e:
         logger.error(f"Error triggering manual alert: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission_controller.release(PRIORITY_CRITICAL)
+
+@router.get("/status")
+def get_detection_statuses(
+    request: Request,
+    response: Response,
+    user_ids: List[str] = Query(...),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    Get current detection status for several users (e.g. a caregiver dashboard)
+    
+    Cached users are served from memory; the rest are read with a single
+    query. Clients that send the previous ETag in If-None-Match get an
+    empty 304 response while nothing changed.
+    
+    Args:
+        request: Incoming request
+        response: Outgoing response (for the ETag header)
+        user_ids: IDs of the users (repeat the parameter or separate IDs with commas)
+        db: Database session
+        
+    Returns:
+        Status of each user in request order
+    """
+    try:
+        ids = [int(part) for value in user_ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="user_ids must be integers")
+    if len(ids) > MAX_STATUS_USERS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_STATUS_USERS} users per request")
+    
+    try:
+        entries = status_cache.get_many(db, ids)
+    except Exception as e:
+        logger.error(f"Error getting detection statuses: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    etag = combined_etag(digest for _, digest in entries)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    return {
+        "statuses": [status for status, _ in entries],
+        "system_status": "operational"
+    }
 
 @router.get("/status/{user_id}")
-async def get_detection_status(user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_detection_status(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+) -> Any:
     """
     Get current detection status for a user
     
     Args:
         user_id: ID of the user
+        request: Incoming request
+        response: Outgoing response (for the ETag header)
         db: Database session
         
     Returns:
         Status information
     """
     try:
-        # Get recent alerts for the user
-        recent_alerts = db.query(models.user.Alert).filter(
-            models.user.Alert.user_id == user_id
-        ).order_by(models.user.Alert.timestamp.desc()).limit(5).all()
+        [(status, digest)] = status_cache.get_many(db, [user_id])
+    except Exception as e:
+        logger.error(f"Error getting detection status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    etag = combined_etag([digest])
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    return {**status, "system_status": "operational"}
+
+@router.get("/cascade-stats")
+def get_cascade_stats(stream_id: str = None) -> Dict[str, Any]:
+    """
+    Get per-stage pass rates and compute savings of the detection cascade
+    
+    Args:
+        stream_id: Optional stream to report on (all streams if omitted)
         
-        # Get user information
-        user = db.query(models.user.User).filter(models.user.User.id == user_id).first()
+    Returns:
+        Cascade statistics
+    """
+    fall_detector = get_fall_detector()
+    
+    return {
+        "cascade_mode": fall_detector.cascade_mode,
+        "stats": fall_detector.get_cascade_stats(stream_id)
+    }
+
+@router.get("/runtime-stats")
+async def get_runtime_stats() -> Dict[str, Any]:
+    """
+    Get inference executor occupancy, admission and status cache counters, event-loop lag,
+    stage latencies and memory of this worker
+    
+    Returns:
+        Executor, admission, status cache, event-loop, stage and process statistics
+    """
+    return {
+        "executor": inference_executor.get_stats(),
+        "event_loop_lag": loop_lag_monitor.get_stats(),
+        "admission": admission_controller.get_stats(),
+        "status_cache": status_cache.get_stats(),
+        "outbox": notification_dispatcher.get_stats(),
+        "escalation": escalation_scheduler.get_stats(),
+        "circuit_breakers": circuit_breakers.get_stats(),
+        "delivery_plan": delivery_stats.get_stats(),
+        "stages": metrics.get_stats(),
+        "process": read_process_memory()
+    }
+
+@router.get("/notifications/{alert_id}")
+def get_notifications(alert_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    Get the outbox notifications of an alert with every delivery attempt
+    
+    Args:
+        alert_id: ID of the alert
+        db: Database session
+        
+    Returns:
+        Notifications and dispatcher statistics
+    """
+    return {
+        "alert_id": alert_id,
+        "notifications": get_alert_notifications(db, alert_id),
+        "dispatcher": notification_dispatcher.get_stats()
+    }
+
+@router.get("/jobs")
+async def get_response_jobs(alert_id: int = None) -> Dict[str, Any]:
+    """
+    Get recent emergency response jobs
+    
+    Args:
+        alert_id: Optional alert to list the jobs of
+        
+    Returns:
+        Jobs and queue statistics
+    """
+    return {
+        "jobs": emergency_jobs.get_jobs(alert_id) + guidance_jobs.get_jobs(alert_id),
+        "queues": {
+            emergency_jobs.name: emergency_jobs.get_stats(),
+            guidance_jobs.name: guidance_jobs.get_stats()
+        }
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_response_job(job_id: str) -> Dict[str, Any]:
+    """
+    Get the status of an emergency response job
+    
+    Args:
+        job_id: ID of the job
+        
+    Returns:
+        Job status, attempts and result
+    """
+    job = emergency_jobs.get_job(job_id) or guidance_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/calibrate")
+def calibrate_detection(user_id: int = Form(None), db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    Fit per-user fusion weights and thresholds from stored scores and alert outcomes
+    
+    Args:
+        user_id: Optional user to calibrate (all users with stored scores if omitted)
+        db: Database session
+        
+    Returns:
+        Fitted parameters per user
+    """
+    try:
+        defaults = None
+        fall_detector = fall_detector_component.get()
+        if fall_detector is not None:
+            defaults = {
+                "video_weight": fall_detector.VIDEO_WEIGHT,
+                "audio_weight": fall_detector.AUDIO_WEIGHT,
+                "threshold": fall_detector.HYBRID_THRESHOLD
+            }
+        
+        results = run_calibration(
+            db, [user_id] if user_id is not None else None, defaults, calibration_cache)
         
         return {
-            "user_id": user_id,
-            "user_name": user.full_name if user else "Unknown",
-            "active_alerts": len([a for a in recent_alerts if a.status == "pending"]),
-            "recent_alerts": [
-                {
-                    "id": alert.id,
-                    "timestamp": alert.timestamp.isoformat() if alert.timestamp else None,
-                    "type": alert.alert_type,
-                    "status": alert.status,
-                    "notes": alert.notes
-                }
-                for alert in recent_alerts
-            ],
-            "system_status": "operational"
+            "success": True,
+            "calibrations": {str(uid): params for uid, params in results.items()}
         }
         
     except Exception as e:
-        logger.error(f"Error getting detection status: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.error(f"Error running calibration: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/calibration/{user_id}")
+async def get_calibration(user_id: int) -> Dict[str, Any]:
+    """
+    Get the detection parameters currently applied for a user
+    
+    Args:
+        user_id: ID of the user
+        
+    Returns:
+        Cached parameters and cache statistics
+    """
+    params = calibration_cache.get(user_id)
+    
+    return {
+        "user_id": user_id,
+        "calibrated": params is not None,
+        "params": params,
+        "cache": calibration_cache.get_stats(),
+        "score_sampling": score_sampler.get_stats()
+    }
+
+@router.get("/incidents")
+async def get_active_incidents() -> Dict[str, Any]:
+    """
+    Get incidents that are still coalescing positive detections
+    
+    Returns:
+        Active incidents and the number of suppressed duplicate positives
+    """
+    return {
+        "incidents": incident_manager.get_active_incidents(),
+        "suppressed_positives": incident_manager.suppressed_positives
+    }
+
+@router.post("/recordings/{stream_id}/start")
+def start_stream_recording(stream_id: str) -> Dict[str, Any]:
+    """
+    Start recording a stream's landmarks and audio features for replay
+    
+    Args:
+        stream_id: Identifier of the stream
+        
+    Returns:
+        Recording information
+    """
+    fall_detector = get_fall_detector()
+    
+    if not stream_id.replace("-", "").replace("_", "").isalnum():
+        raise HTTPException(status_code=400, detail="Invalid stream ID")
+    
+    directory = os.path.join(RECORDING_DIR, f"{stream_id}-{int(time.time())}")
+    fall_detector.start_recording(stream_id, directory)
+    
+    return {"success": True, "stream_id": stream_id, "directory": directory}
+
+@router.post("/recordings/{stream_id}/stop")
+def stop_stream_recording(stream_id: str) -> Dict[str, Any]:
+    """
+    Stop recording a stream
+    
+    Args:
+        stream_id: Identifier of the stream
+        
+    Returns:
+        Whether a recording was stopped
+    """
+    return {"success": get_fall_detector().stop_recording(stream_id), "stream_id": stream_id}
@@ -4,6 +4,8 @@ from typing import List
 from app import schemas, models
 from app.database import get_db
 from app.core.security import get_password_hash
+from app.core.device_tokens import deactivate_tokens, register_device_token
+from app.core.notification_outbox import OUTBOX_CHANNELS
 
 router = APIRouter()
 
@@ -79,4 +81,79 @@ def create_user_location(user_id: int, location: schemas.LocationCreate, db: Ses
     db.commit()
     db.refresh(db_location)
     
-    return db_location
\ No newline at end of file
+    return db_location
+
+@router.post("/{user_id}/device-tokens/", response_model=schemas.DeviceToken)
+def create_user_device_token(user_id: int, device_token: schemas.DeviceTokenCreate, db: Session = Depends(get_db)):
+    # Verify user exists
+    db_user = db.query(models.user.User).filter(models.user.User.id == user_id).first()
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Registering a known token moves it to this user and reactivates it
+    try:
+        return register_device_token(db, user_id, device_token.token, device_token.platform)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{user_id}/device-tokens/", response_model=List[schemas.DeviceToken])
+def read_user_device_tokens(user_id: int, db: Session = Depends(get_db)):
+    return db.query(models.user.DeviceToken).filter(
+        models.user.DeviceToken.user_id == user_id,
+        models.user.DeviceToken.is_active == True
+    ).order_by(models.user.DeviceToken.id).all()
+
+@router.delete("/{user_id}/device-tokens/{token}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_user_device_token(user_id: int, token: str, db: Session = Depends(get_db)):
+    db_token = db.query(models.user.DeviceToken).filter(
+        models.user.DeviceToken.user_id == user_id,
+        models.user.DeviceToken.token == token
+    ).first()
+    if db_token is None:
+        raise HTTPException(status_code=404, detail="Device token not found")
+    
+    # Signed out: keep the row but stop sending to the device
+    deactivate_tokens(db, [token], "unregistered by user")
+    db.commit()
+    
+    return None
+
+def preference_response(user_id: int, db_preference) -> schemas.NotificationPreference:
+    if db_preference is None:
+        return schemas.NotificationPreference(user_id=user_id)
+    channels = None
+    if db_preference.channels is not None:
+        channels = [channel for channel in db_preference.channels.split(",") if channel]
+    return schemas.NotificationPreference(user_id=user_id, locale=db_preference.locale, channels=channels)
+
+@router.get("/{user_id}/notification-preferences", response_model=schemas.NotificationPreference)
+def read_user_notification_preferences(user_id: int, db: Session = Depends(get_db)):
+    db_preference = db.query(models.user.NotificationPreference).filter(
+        models.user.NotificationPreference.user_id == user_id
+    ).first()
+    return preference_response(user_id, db_preference)
+
+@router.put("/{user_id}/notification-preferences", response_model=schemas.NotificationPreference)
+def update_user_notification_preferences(user_id: int, preference: schemas.NotificationPreferenceUpdate,
+                                         db: Session = Depends(get_db)):
+    # Verify user exists
+    db_user = db.query(models.user.User).filter(models.user.User.id == user_id).first()
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    unknown = [channel for channel in preference.channels or [] if channel not in OUTBOX_CHANNELS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown channels: {', '.join(unknown)}")
+    
+    db_preference = db.query(models.user.NotificationPreference).filter(
+        models.user.NotificationPreference.user_id == user_id
+    ).first()
+    if db_preference is None:
+        db_preference = models.user.NotificationPreference(user_id=user_id)
+        db.add(db_preference)
+    db_preference.locale = preference.locale
+    db_preference.channels = ",".join(preference.channels) if preference.channels is not None else None
+    db.commit()
+    db.refresh(db_preference)
+    
+    return preference_response(user_id, db_preference)
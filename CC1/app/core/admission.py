@@ -0,0 +1,218 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+PRIORITY_CRITICAL = "critical"  # Manual alerts and frames of a confirmed incident
+PRIORITY_ROUTINE = "routine"    # Routine camera frames
+
+class AdmissionRejectedError(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        """
+        Raised when routine work is shed by the admission controller
+
+        Args:
+            status_code: 429 for a per-user rate limit, 503 for server overload
+            reason: Human readable reason
+            retry_after: Suggested seconds before retrying
+        """
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        """
+        Initialize a full token bucket
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+            now: Current monotonic time
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, cost: float, now: float) -> float:
+        """
+        Take tokens if enough are available
+
+        A cost larger than the bucket is admitted once the bucket is full and
+        leaves it in debt, so oversized batches still pay for every frame.
+
+        Args:
+            cost: Tokens to take
+            now: Current monotonic time
+
+        Returns:
+            0.0 if the tokens were taken, otherwise seconds until they would be
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+class AdmissionController:
+    def __init__(self, user_rate: float = 10.0, user_burst: float = 20.0, max_in_flight: int = 32,
+                 queue_latency_target: float = 0.5, latency_probe: Optional[Callable[[], float]] = None,
+                 max_buckets: int = 10000):
+        """
+        Initialize admission control for detection and alert requests
+
+        Critical work is always admitted and counts toward the in-flight total,
+        so routine frames back off while alerts are being handled. Routine work
+        is shed when its user exceeds their token bucket (429), when the
+        in-flight limit is reached, or when the queue latency reported by the
+        probe exceeds the target (503).
+
+        Args:
+            user_rate: Routine frames per second allowed per user
+            user_burst: Routine frames a user may send at once
+            max_in_flight: Requests processed at once before routine work is shed
+            queue_latency_target: Queue latency in seconds above which routine work is shed
+            latency_probe: Callable returning the current queue latency in seconds
+            max_buckets: Number of per-user buckets kept before idle ones are pruned
+        """
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_in_flight = max_in_flight
+        self.queue_latency_target = queue_latency_target
+        self.latency_probe = latency_probe
+        self.max_buckets = max_buckets
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.in_flight = {PRIORITY_CRITICAL: 0, PRIORITY_ROUTINE: 0}
+        self.admitted = {PRIORITY_CRITICAL: 0, PRIORITY_ROUTINE: 0}
+        self.rejected = {"rate_limited": 0, "in_flight": 0, "queue_latency": 0}
+
+    def acquire(self, user_id: Any, priority: str = PRIORITY_ROUTINE, cost: float = 1.0):
+        """
+        Admit one request or raise
+
+        Every successful call must be paired with release().
+
+        Args:
+            user_id: ID of the user the work belongs to
+            priority: PRIORITY_CRITICAL or PRIORITY_ROUTINE
+            cost: Tokens to take from the user's bucket (e.g. frames in a batch)
+
+        Raises:
+            AdmissionRejectedError: If routine work is shed
+        """
+        if priority == PRIORITY_CRITICAL:
+            with self._lock:
+                self.in_flight[priority] += 1
+                self.admitted[priority] += 1
+            return
+
+        # Probe outside the lock; it may take the executor's lock
+        queue_latency = self.latency_probe() if self.latency_probe is not None else 0.0
+        now = time.monotonic()
+
+        with self._lock:
+            if queue_latency > self.queue_latency_target:
+                self.rejected["queue_latency"] += 1
+                raise AdmissionRejectedError(
+                    503, f"Queue latency {queue_latency * 1000:.0f}ms over target", queue_latency)
+
+            if sum(self.in_flight.values()) >= self.max_in_flight:
+                self.rejected["in_flight"] += 1
+                raise AdmissionRejectedError(503, f"{self.max_in_flight} requests already in flight", 1.0)
+
+            bucket = self._buckets.get(user_id)
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._prune(now)
+                bucket = self._buckets[user_id] = TokenBucket(self.user_rate, self.user_burst, now)
+            wait = bucket.take(cost, now)
+            if wait > 0:
+                self.rejected["rate_limited"] += 1
+                raise AdmissionRejectedError(429, f"Frame rate limit exceeded for user {user_id}", wait)
+
+            self.in_flight[priority] += 1
+            self.admitted[priority] += 1
+
+    def release(self, priority: str = PRIORITY_ROUTINE):
+        """
+        Mark admitted work as finished
+
+        Args:
+            priority: Priority the work was admitted with
+        """
+        with self._lock:
+            self.in_flight[priority] -= 1
+
+    @contextmanager
+    def admit(self, user_id: Any, priority: str = PRIORITY_ROUTINE, cost: float = 1.0):
+        """
+        Hold an admission slot for the enclosed block
+
+        Args:
+            user_id: ID of the user the work belongs to
+            priority: PRIORITY_CRITICAL or PRIORITY_ROUTINE
+            cost: Tokens to take from the user's bucket
+
+        Raises:
+            AdmissionRejectedError: If routine work is shed
+        """
+        self.acquire(user_id, priority, cost)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def _prune(self, now: float):
+        """
+        Drop buckets that have refilled completely (called with the lock held)
+
+        A full bucket behaves exactly like a new one, so dropping it loses nothing.
+
+        Args:
+            now: Current monotonic time
+        """
+        idle = [key for key, bucket in self._buckets.items()
+                if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst]
+        for key in idle:
+            del self._buckets[key]
+        logger.info(f"Pruned {len(idle)} idle admission buckets")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get admission counters
+
+        Returns:
+            Dictionary with limits, in-flight work and admitted/rejected counts
+        """
+        with self._lock:
+            return {
+                "user_rate": self.user_rate,
+                "user_burst": self.user_burst,
+                "max_in_flight": self.max_in_flight,
+                "queue_latency_target_ms": round(self.queue_latency_target * 1000, 1),
+                "in_flight": dict(self.in_flight),
+                "admitted": dict(self.admitted),
+                "rejected": dict(self.rejected),
+                "tracked_users": len(self._buckets)
+            }
+
+# Global admission controller for the detection and alert endpoints
+admission_controller = AdmissionController(
+    user_rate=float(os.getenv("ADMISSION_USER_RATE", "10")),
+    user_burst=float(os.getenv("ADMISSION_USER_BURST", "20")),
+    max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32")),
+    queue_latency_target=float(os.getenv("ADMISSION_QUEUE_TARGET_MS", "500")) / 1000)
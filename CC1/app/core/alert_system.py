@@ -1,13 +1,19 @@
-from twilio.rest import Client
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import asyncio
 import logging
 from typing import Dict, List, Optional
 import os
 from datetime import datetime
 
+from app.core.delivery_plan import DeliveryPlan, delivery_stats
+from app.core.device_tokens import prune_invalid_tokens
+from app.core.message_templates import build_alert_context, message_templates
+from app.core.metrics import metrics
+from app.core.notification_channels import (
+    EmailChannel, NotificationChannel, PushChannel, SmsChannel, VoiceChannel, WhatsAppChannel,
+    notification_runtime
+)
+from app.core.push_providers import build_push_provider
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,8 +37,39 @@ class AlertSystem:
         # WhatsApp configuration (using Twilio)
         self.whatsapp_enabled = os.getenv("WHATSAPP_ENABLED", "false").lower() == "true"
         
+        # Channel plugins sending over non-blocking HTTP and SMTP clients
+        twilio_base_url = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com")
+        twilio = (self.twilio_account_sid, self.twilio_auth_token, self.twilio_phone_number, twilio_base_url)
+        self.channels: Dict[str, NotificationChannel] = {
+            "sms": SmsChannel(notification_runtime, *twilio),
+            "whatsapp": WhatsAppChannel(notification_runtime, *twilio, enabled=self.whatsapp_enabled),
+            "voice": VoiceChannel(notification_runtime, *twilio),
+            "email": EmailChannel(notification_runtime, self.smtp_server, self.smtp_port,
+                                  self.email_username, self.email_password),
+            # Multicast batches; tokens the provider rejects for good are deactivated
+            "push": PushChannel(notification_runtime, build_push_provider(notification_runtime),
+                                on_invalid_tokens=prune_invalid_tokens)
+        }
+        
         logger.info("AlertSystem initialized")
 
+    async def send_channel_alert(self, channel: str, recipients: List[str], message: str,
+                                 subject: Optional[str] = None, **options) -> Dict[str, any]:
+        """
+        Send an alert through one channel without blocking a thread
+        
+        Args:
+            channel: Channel name ("sms", "whatsapp", "email", "push" or "voice")
+            recipients: Phone numbers, email addresses or device tokens
+            message: Alert message content (TwiML or a TwiML URL for voice)
+            subject: Email subject or push title
+            **options: Channel specific options (html_message for email, data for push)
+            
+        Returns:
+            Dictionary with success status and details
+        """
+        return await self.channels[channel].send(recipients, message, subject, **options)
+
     def send_sms_alert(self, phone_numbers: List[str], message: str) -> Dict[str, any]:
         """
         Send SMS alert to multiple phone numbers
@@ -44,39 +81,7 @@ class AlertSystem:
         Returns:
             Dictionary with success status and details
         """
-        if not self.twilio_account_sid or not self.twilio_auth_token:
-            logger.warning("Twilio credentials not configured")
-            return {"success": False, "error": "Twilio not configured"}
-            
-        try:
-            client = Client(self.twilio_account_sid, self.twilio_auth_token)
-            results = []
-            
-            for phone_number in phone_numbers:
-                try:
-                    message_obj = client.messages.create(
-                        body=message,
-                        from_=self.twilio_phone_number,
-                        to=phone_number
-                    )
-                    results.append({
-                        "phone_number": phone_number,
-                        "success": True,
-                        "message_sid": message_obj.sid
-                    })
-                except Exception as e:
-                    results.append({
-                        "phone_number": phone_number,
-                        "success": False,
-                        "error": str(e)
-                    })
-            
-            logger.info(f"SMS alerts sent to {len(phone_numbers)} recipients")
-            return {"success": True, "results": results}
-            
-        except Exception as e:
-            logger.error(f"Failed to send SMS alerts: {str(e)}")
-            return {"success": False, "error": str(e)}
+        return notification_runtime.run(self.send_channel_alert("sms", phone_numbers, message))
 
     def send_email_alert(self, email_addresses: List[str], subject: str, 
                         message: str, html_message: Optional[str] = None) -> Dict[str, any]:
@@ -92,53 +97,8 @@ class AlertSystem:
         Returns:
             Dictionary with success status and details
         """
-        if not self.email_username or not self.email_password:
-            logger.warning("Email credentials not configured")
-            return {"success": False, "error": "Email not configured"}
-            
-        try:
-            results = []
-            
-            for email_address in email_addresses:
-                try:
-                    # Create message
-                    msg = MIMEMultipart("alternative")
-                    msg["Subject"] = subject
-                    msg["From"] = self.email_username
-                    msg["To"] = email_address
-                    
-                    # Add plain text part
-                    part1 = MIMEText(message, "plain")
-                    msg.attach(part1)
-                    
-                    # Add HTML part if provided
-                    if html_message:
-                        part2 = MIMEText(html_message, "html")
-                        msg.attach(part2)
-                    
-                    # Send email
-                    with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                        server.starttls()
-                        server.login(self.email_username, self.email_password)
-                        server.send_message(msg)
-                        
-                    results.append({
-                        "email": email_address,
-                        "success": True
-                    })
-                except Exception as e:
-                    results.append({
-                        "email": email_address,
-                        "success": False,
-                        "error": str(e)
-                    })
-            
-            logger.info(f"Email alerts sent to {len(email_addresses)} recipients")
-            return {"success": True, "results": results}
-            
-        except Exception as e:
-            logger.error(f"Failed to send email alerts: {str(e)}")
-            return {"success": False, "error": str(e)}
+        return notification_runtime.run(self.send_channel_alert(
+            "email", email_addresses, message, subject, html_message=html_message))
 
     def send_whatsapp_alert(self, phone_numbers: List[str], message: str) -> Dict[str, any]:
         """
@@ -151,39 +111,7 @@ class AlertSystem:
         Returns:
             Dictionary with success status and details
         """
-        if not self.whatsapp_enabled or not self.twilio_account_sid or not self.twilio_auth_token:
-            logger.warning("WhatsApp not configured or disabled")
-            return {"success": False, "error": "WhatsApp not configured"}
-            
-        try:
-            client = Client(self.twilio_account_sid, self.twilio_auth_token)
-            results = []
-            
-            for phone_number in phone_numbers:
-                try:
-                    message_obj = client.messages.create(
-                        body=message,
-                        from_=f"whatsapp:{self.twilio_phone_number}",
-                        to=f"whatsapp:{phone_number}"
-                    )
-                    results.append({
-                        "phone_number": phone_number,
-                        "success": True,
-                        "message_sid": message_obj.sid
-                    })
-                except Exception as e:
-                    results.append({
-                        "phone_number": phone_number,
-                        "success": False,
-                        "error": str(e)
-                    })
-            
-            logger.info(f"WhatsApp alerts sent to {len(phone_numbers)} recipients")
-            return {"success": True, "results": results}
-            
-        except Exception as e:
-            logger.error(f"Failed to send WhatsApp alerts: {str(e)}")
-            return {"success": False, "error": str(e)}
+        return notification_runtime.run(self.send_channel_alert("whatsapp", phone_numbers, message))
 
     def send_push_notification(self, device_tokens: List[str], title: str, 
                               message: str, data: Optional[Dict] = None) -> Dict[str, any]:
@@ -199,19 +127,7 @@ class AlertSystem:
         Returns:
             Dictionary with success status and details
         """
-        # This would integrate with Firebase Cloud Messaging or similar service
-        logger.info(f"Push notifications would be sent to {len(device_tokens)} devices")
-        
-        # Placeholder implementation
-        results = []
-        for token in device_tokens:
-            results.append({
-                "device_token": token,
-                "success": True,
-                "message": "Notification sent (simulated)"
-            })
-        
-        return {"success": True, "results": results}
+        return notification_runtime.run(self.send_channel_alert("push", device_tokens, message, title, data=data))
 
     def send_voice_call(self, phone_numbers: List[str], message_url: str) -> Dict[str, any]:
         """
@@ -219,111 +135,57 @@ class AlertSystem:
         
         Args:
             phone_numbers: List of phone numbers to call
-            message_url: URL to TwiML document with voice message
+            message_url: URL to TwiML document with voice message, or inline TwiML
             
         Returns:
             Dictionary with success status and details
         """
-        if not self.twilio_account_sid or not self.twilio_auth_token:
-            logger.warning("Twilio credentials not configured")
-            return {"success": False, "error": "Twilio not configured"}
-            
-        try:
-            client = Client(self.twilio_account_sid, self.twilio_auth_token)
-            results = []
-            
-            for phone_number in phone_numbers:
-                try:
-                    call = client.calls.create(
-                        url=message_url,
-                        to=phone_number,
-                        from_=self.twilio_phone_number
-                    )
-                    results.append({
-                        "phone_number": phone_number,
-                        "success": True,
-                        "call_sid": call.sid
-                    })
-                except Exception as e:
-                    results.append({
-                        "phone_number": phone_number,
-                        "success": False,
-                        "error": str(e)
-                    })
-            
-            logger.info(f"Voice calls initiated to {len(phone_numbers)} recipients")
-            return {"success": True, "results": results}
-            
-        except Exception as e:
-            logger.error(f"Failed to initiate voice calls: {str(e)}")
-            return {"success": False, "error": str(e)}
+        return notification_runtime.run(self.send_channel_alert("voice", phone_numbers, message_url))
 
+    @metrics.timed("alert_system", "multi_channel")
     async def send_multi_channel_alert(self, recipients: Dict, alert_data: Dict) -> Dict[str, any]:
         """
         Send alert through multiple channels simultaneously
         
         Args:
-            recipients: Dictionary with recipient lists for different channels
-            alert_data: Dictionary with alert content and metadata
+            recipients: Dictionary with recipient lists for different channels (normalized and
+                deduplicated before sending)
+            alert_data: Dictionary with alert content and metadata (locale selects the templates)
             
         Returns:
             Dictionary with success status and details for all channels
         """
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # Prepare alert message
-        message = (
-            f"🚨 EMERGENCY ALERT 🚨\n"
-            f"Fall detected for {alert_data.get('user_name', 'Unknown User')}\n"
-            f"Time: {timestamp}\n"
-            f"Location: {alert_data.get('location', 'Unknown Location')}\n"
-            f"Status: {alert_data.get('status', 'Critical')}\n"
-            f"Help is on the way!"
-        )
-        
-        subject = f"Emergency Alert - Fall Detected for {alert_data.get('user_name', 'User')}"
+        # Prepare alert messages: one rendering per channel in the alert's locale
+        messages = message_templates.for_incident(build_alert_context({**alert_data, "timestamp": timestamp}))
+        locale = alert_data.get("locale")
         
-        # Create tasks for concurrent execution
+        # Normalize and deduplicate the recipients: a number listed for SMS and WhatsApp gets one text
+        channel_names = ["sms", "email", "whatsapp", "push"]
+        plan = DeliveryPlan()
+        for channel in channel_names:
+            for recipient in recipients.get(channel) or []:
+                plan.add(channel, recipient)
+        plan_stats = delivery_stats.record(plan)
+        recipients = plan.recipients_by_channel()
+        
+        # Channels send on this event loop; no thread is held while waiting on providers
         tasks = []
-        
-        # SMS alerts
-        if "sms" in recipients and recipients["sms"]:
-            tasks.append(asyncio.create_task(
-                asyncio.to_thread(self.send_sms_alert, recipients["sms"], message)
-            ))
-        else:
-            tasks.append(None)
-        
-        # Email alerts
-        if "email" in recipients and recipients["email"]:
-            tasks.append(asyncio.create_task(
-                asyncio.to_thread(self.send_email_alert, recipients["email"], subject, message)
-            ))
-        else:
-            tasks.append(None)
-        
-        # WhatsApp alerts
-        if "whatsapp" in recipients and recipients["whatsapp"]:
-            tasks.append(asyncio.create_task(
-                asyncio.to_thread(self.send_whatsapp_alert, recipients["whatsapp"], message)
-            ))
-        else:
-            tasks.append(None)
-        
-        # Push notifications
-        if "push" in recipients and recipients["push"]:
-            tasks.append(asyncio.create_task(
-                asyncio.to_thread(self.send_push_notification, recipients["push"], "Emergency Alert", message)
-            ))
-        else:
-            tasks.append(None)
+        for channel in channel_names:
+            if recipients.get(channel):
+                message = messages.get(channel, locale)
+                tasks.append(asyncio.create_task(
+                    self.send_channel_alert(channel, recipients[channel], message.body, message.subject)
+                ))
+            else:
+                tasks.append(None)
         
         # Execute all tasks concurrently
         results = await asyncio.gather(*[task for task in tasks if task is not None], return_exceptions=True)
         
         # Process results
         channel_results = {}
-        channel_names = ["sms", "email", "whatsapp", "push"]
         result_index = 0
         
         for i, channel in enumerate(channel_names):
@@ -339,6 +201,7 @@ class AlertSystem:
         return {
             "success": overall_success,
             "channels": channel_results,
+            "delivery_plan": plan_stats,
             "timestamp": timestamp
         }
 
@@ -0,0 +1,463 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Mirrors the HybridFallDetector defaults, used when a user has too little history
+DEFAULT_CALIBRATION = {
+    "video_weight": 0.6,
+    "audio_weight": 0.4,
+    "threshold": 0.65
+}
+
+CONFIRMED_STATUSES = {"acknowledged", "resolved"}
+FALSE_ALARM_STATUSES = {"false_alarm"}
+MISSED_FALL_WINDOW = timedelta(minutes=5)  # Manual alert after a near miss counts as a missed fall
+MIN_CALIBRATION_SAMPLES = 10
+RECALL_BETA = 2.0  # Missing a fall costs more than a false alarm
+
+# Sentinel for users known to have no calibration, so they are not looked up again
+_UNCALIBRATED = object()
+
+class ScoreSampler:
+    def __init__(self, interval: float = 10.0, capacity: int = 10000):
+        """
+        Initialize the per-user rate limit on stored near-miss scores
+
+        A continuous stream produces a near miss on many consecutive frames;
+        storing one per interval keeps the calibration history representative
+        without a database write per frame.
+
+        Args:
+            interval: Minimum seconds between stored scores of one user
+            capacity: Users tracked (least recently sampled dropped first)
+        """
+        self.interval = interval
+        self.capacity = capacity
+        self._last: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.sampled = 0
+        self.skipped = 0
+
+    def allow(self, user_id: int, now: Optional[float] = None) -> bool:
+        """
+        Decide whether a user's score may be stored now
+
+        Args:
+            user_id: ID of the user
+            now: Monotonic timestamp (defaults to the current time)
+
+        Returns:
+            True if the score should be stored
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            last = self._last.get(user_id)
+            if last is not None and now - last < self.interval:
+                self.skipped += 1
+                return False
+            self._last[user_id] = now
+            self._last.move_to_end(user_id)
+            while len(self._last) > self.capacity:
+                self._last.popitem(last=False)
+            self.sampled += 1
+            return True
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get sampling counters
+
+        Returns:
+            Dictionary with stored and skipped score counts
+        """
+        with self._lock:
+            return {"interval_seconds": self.interval, "sampled": self.sampled, "skipped": self.skipped}
+
+def prune_detection_scores(db: Session, user_id: int, keep: int) -> int:
+    """
+    Delete a user's oldest detection scores beyond the retention bound (committed by the caller)
+
+    Args:
+        db: Database session
+        user_id: ID of the user
+        keep: Newest scores to keep
+
+    Returns:
+        Number of scores deleted
+    """
+    Score = models.user.DetectionScore
+    newest = db.query(Score.id).filter(Score.user_id == user_id).order_by(
+        Score.timestamp.desc(), Score.id.desc()).limit(keep)
+    return db.query(Score).filter(Score.user_id == user_id, Score.id.notin_(newest.scalar_subquery())).delete(
+        synchronize_session=False)
+
+def fit_calibration(samples: np.ndarray, labels: np.ndarray,
+                    defaults: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Fit fusion weights and threshold that maximise recall-weighted F-score
+
+    Args:
+        samples: Array of shape (n, 2) with video and audio confidences
+        labels: Array of shape (n,) with 1 for real falls and 0 for false alarms
+        defaults: Parameters used when the history is too small or one-sided
+
+    Returns:
+        Dictionary with video_weight, audio_weight, threshold, sample_count and calibrated flag
+    """
+    defaults = defaults or DEFAULT_CALIBRATION
+    samples = np.asarray(samples, dtype=np.float64).reshape(-1, 2)
+    labels = np.asarray(labels, dtype=bool)
+    sample_count = int(labels.size)
+
+    if sample_count < MIN_CALIBRATION_SAMPLES or labels.all() or not labels.any():
+        return dict(defaults, sample_count=sample_count, calibrated=False)
+
+    weights = np.round(np.arange(0.0, 1.0001, 0.05), 2)
+    thresholds = np.round(np.arange(0.30, 0.9501, 0.01), 2)
+    beta_sq = RECALL_BETA ** 2
+
+    best_score = -np.inf
+    best = None
+
+    for video_weight in weights:
+        fused = video_weight * samples[:, 0] + (1.0 - video_weight) * samples[:, 1]
+        predictions = fused[None, :] >= thresholds[:, None]
+
+        tp = np.sum(predictions & labels, axis=1)
+        fp = np.sum(predictions & ~labels, axis=1)
+        fn = np.sum(~predictions & labels, axis=1)
+        f_score = (1 + beta_sq) * tp / np.maximum((1 + beta_sq) * tp + beta_sq * fn + fp, 1)
+
+        # Prefer parameters close to the defaults when several fit equally well
+        distance = np.abs(video_weight - defaults["video_weight"]) + np.abs(thresholds - defaults["threshold"])
+        score = f_score - 1e-3 * distance
+
+        index = int(np.argmax(score))
+        if score[index] > best_score:
+            best_score = score[index]
+            best = (float(video_weight), float(thresholds[index]))
+
+    return {
+        "video_weight": best[0],
+        "audio_weight": round(1.0 - best[0], 2),
+        "threshold": best[1],
+        "sample_count": sample_count,
+        "calibrated": True
+    }
+
+def load_labeled_scores(db: Session, user_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load a user's stored detection scores labelled with their alert outcomes
+
+    Args:
+        db: Database session
+        user_id: ID of the user
+
+    Returns:
+        Tuple of (samples with shape (n, 2), labels with shape (n,))
+    """
+    rows = db.query(models.user.DetectionScore, models.user.Alert.status).outerjoin(
+        models.user.Alert, models.user.DetectionScore.alert_id == models.user.Alert.id
+    ).filter(
+        models.user.DetectionScore.user_id == user_id
+    ).order_by(models.user.DetectionScore.timestamp).all()
+
+    manual_alert_times = sorted(
+        timestamp for (timestamp,) in db.query(models.user.Alert.timestamp).filter(
+            models.user.Alert.user_id == user_id,
+            models.user.Alert.alert_type == "manual_trigger"
+        ) if timestamp is not None
+    )
+
+    samples = []
+    labels = []
+
+    for score, alert_status in rows:
+        if score.alert_id is not None:
+            if alert_status in CONFIRMED_STATUSES:
+                label = 1
+            elif alert_status in FALSE_ALARM_STATUSES:
+                label = 0
+            else:
+                # Outcome not known yet
+                continue
+        else:
+            # Near miss: a real fall if the user pressed the panic button shortly after
+            index = bisect.bisect_left(manual_alert_times, score.timestamp)
+            label = int(
+                index < len(manual_alert_times)
+                and manual_alert_times[index] - score.timestamp <= MISSED_FALL_WINDOW
+            )
+
+        samples.append((score.video_confidence or 0.0, score.audio_confidence or 0.0))
+        labels.append(label)
+
+    return np.array(samples, dtype=np.float64).reshape(-1, 2), np.array(labels, dtype=np.int8)
+
+class CalibrationCache:
+    def __init__(self, capacity: int = 10000):
+        """
+        Initialize the in-memory LRU cache of per-user detection parameters
+
+        Lookups never touch the database. A miss returns None (callers fall
+        back to the detector defaults) and queues the user for the next
+        background refresh.
+
+        Args:
+            capacity: Maximum number of users kept in the cache
+        """
+        self.capacity = capacity
+        self._entries: "OrderedDict[int, object]" = OrderedDict()
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self._watermark = None
+        self._stop_event = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Dict[str, float]]:
+        """
+        Get calibrated parameters for a user
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            Parameter dictionary, or None to use the detector defaults
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                self._pending.add(user_id)
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+            return None if entry is _UNCALIBRATED else entry
+
+    def put(self, user_id: int, params: Optional[Dict[str, float]]):
+        """
+        Store parameters for a user, evicting the least recently used entry if full
+
+        Args:
+            user_id: ID of the user
+            params: Parameter dictionary (None marks the user as uncalibrated)
+        """
+        with self._lock:
+            self._put_locked(user_id, params)
+
+    def invalidate(self, user_id: int):
+        """
+        Drop a user's cached parameters
+
+        Args:
+            user_id: ID of the user
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def refresh(self, db: Session) -> int:
+        """
+        Load calibrations for queued misses and for rows changed since the last refresh
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of cache entries updated
+        """
+        with self._lock:
+            pending = set(self._pending)
+            self._pending.clear()
+            watermark = self._watermark
+
+        calibration = models.user.DetectionCalibration
+        latest = db.query(func.max(calibration.updated_at)).scalar()
+
+        conditions = []
+        if pending:
+            conditions.append(calibration.user_id.in_(pending))
+        if watermark is not None:
+            # updated_at has one-second resolution: rows from the watermark's own second are read
+            # again, since they may have changed after the last refresh within that second
+            conditions.append(calibration.updated_at >= watermark)
+
+        rows = db.query(calibration).filter(or_(*conditions)).all() if conditions else []
+
+        updated = 0
+        with self._lock:
+            for row in rows:
+                # Changed rows only matter for users that are cached or waiting
+                if row.user_id in pending or row.user_id in self._entries:
+                    params = {
+                        "video_weight": row.video_weight,
+                        "audio_weight": row.audio_weight,
+                        "threshold": row.threshold
+                    }
+                    # Re-read watermark rows that did not change are not counted as updates
+                    if row.user_id in pending or self._entries.get(row.user_id) != params:
+                        self._put_locked(row.user_id, params)
+                        updated += 1
+                pending.discard(row.user_id)
+
+            for user_id in pending:
+                self._put_locked(user_id, None)
+
+            self._watermark = latest
+
+        return updated
+
+    def start_refresher(self, session_factory: Callable[[], Session], interval_seconds: float = 30.0):
+        """
+        Start a background thread that refreshes the cache periodically
+
+        Args:
+            session_factory: Callable returning a new database session
+            interval_seconds: Seconds between refreshes
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+
+        def run():
+            while not self._stop_event.wait(interval_seconds):
+                db = session_factory()
+                try:
+                    self.refresh(db)
+                except Exception as e:
+                    logger.error(f"Error refreshing calibration cache: {str(e)}")
+                finally:
+                    db.close()
+
+        self._stop_event.clear()
+        self._refresher = threading.Thread(target=run, name="calibration-refresher", daemon=True)
+        self._refresher.start()
+        logger.info(f"Calibration cache refresher started (every {interval_seconds}s)")
+
+    def stop_refresher(self):
+        """
+        Stop the background refresh thread
+        """
+        self._stop_event.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with size, hits, misses and pending loads
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "pending": len(self._pending)
+            }
+
+    def _put_locked(self, user_id: int, params: Optional[Dict[str, float]]):
+        self._entries[user_id] = _UNCALIBRATED if params is None else params
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+def run_calibration(db: Session, user_ids: Optional[List[int]] = None,
+                    defaults: Optional[Dict[str, float]] = None,
+                    cache: Optional[CalibrationCache] = None,
+                    max_scores: Optional[int] = None) -> Dict[int, Dict[str, float]]:
+    """
+    Fit and store per-user detection parameters from alert history
+
+    Each user's history is first trimmed to its newest max_scores scores.
+
+    Args:
+        db: Database session
+        user_ids: Users to calibrate (all users with stored scores if None)
+        defaults: Fallback parameters for users with too little history
+        cache: Cache to update with the new parameters
+        max_scores: Scores kept per user (CALIBRATION_MAX_SCORES_PER_USER if None)
+
+    Returns:
+        Dictionary mapping user ID to fitted parameters
+    """
+    if user_ids is None:
+        user_ids = [
+            user_id for (user_id,) in db.query(models.user.DetectionScore.user_id).distinct()
+        ]
+
+    max_scores = max_scores if max_scores is not None else MAX_SCORES_PER_USER
+    results = {}
+
+    for user_id in user_ids:
+        pruned = prune_detection_scores(db, user_id, max_scores)
+        if pruned:
+            logger.info(f"Pruned {pruned} old detection scores of user {user_id}")
+        samples, labels = load_labeled_scores(db, user_id)
+        params = fit_calibration(samples, labels, defaults)
+        results[user_id] = params
+
+        if not params["calibrated"]:
+            continue
+
+        row = db.query(models.user.DetectionCalibration).filter(
+            models.user.DetectionCalibration.user_id == user_id
+        ).first()
+        if row is None:
+            row = models.user.DetectionCalibration(user_id=user_id)
+            db.add(row)
+
+        row.video_weight = params["video_weight"]
+        row.audio_weight = params["audio_weight"]
+        row.threshold = params["threshold"]
+        row.sample_count = params["sample_count"]
+
+    db.commit()
+
+    if cache is not None:
+        for user_id, params in results.items():
+            cache.put(user_id, {
+                "video_weight": params["video_weight"],
+                "audio_weight": params["audio_weight"],
+                "threshold": params["threshold"]
+            } if params["calibrated"] else None)
+
+    calibrated = sum(1 for params in results.values() if params["calibrated"])
+    logger.info(f"Calibrated {calibrated} of {len(results)} users")
+    return results
+
+# Retention bound on each user's stored detection scores
+MAX_SCORES_PER_USER = int(os.getenv("CALIBRATION_MAX_SCORES_PER_USER", "2000"))
+
+# Global calibration cache instance
+calibration_cache = CalibrationCache(int(os.getenv("CALIBRATION_CACHE_SIZE", "10000")))
+
+# Global rate limit on stored near-miss scores
+score_sampler = ScoreSampler(float(os.getenv("CALIBRATION_SCORE_INTERVAL_SECONDS", "10")))
+
+# Example usage
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        results = run_calibration(db)
+        for user_id, params in results.items():
+            print(f"User {user_id}: {params}")
+    finally:
+        db.close()
@@ -0,0 +1,294 @@
+"""
+Circuit breakers for the notification providers
+
+Every channel and provider pair (SMS through one Twilio account, email
+through one SMTP server, ...) has a breaker that stops calling a provider
+after repeated failures and lets a single probe through once it has had
+time to recover. Each call also gets an adaptive deadline derived from the
+provider's recent latency, so a slow provider is given up on quickly
+instead of holding sends for the full network timeout.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        """
+        Raised instead of calling a provider whose circuit is open
+
+        Args:
+            name: Circuit name
+            retry_after: Seconds until the circuit lets a probe through
+        """
+        super().__init__(f"{name} circuit open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 min_timeout: float = 0.5, max_timeout: float = 10.0):
+        """
+        Initialize a circuit breaker with a latency-based adaptive timeout
+
+        After failure_threshold consecutive provider failures the circuit
+        opens and calls fail immediately. After reset_timeout one probe call
+        is let through (half-open): its success closes the circuit, its
+        failure opens it again. Call deadlines follow the provider's recent
+        latency (smoothed latency plus four deviations, as for TCP
+        retransmission timeouts), so a degraded provider is given up on long
+        before the fixed network timeout.
+
+        Args:
+            name: Circuit name (e.g. "sms:twilio:AC123")
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe
+            min_timeout: Lower bound of the adaptive timeout in seconds
+            max_timeout: Upper bound of the adaptive timeout (used until latency is known)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._smoothed: Optional[float] = None
+        self._deviation = 0.0
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def timeout(self) -> float:
+        """
+        Get the deadline for the next call
+
+        Returns:
+            Timeout in seconds
+        """
+        with self._lock:
+            if self._smoothed is None:
+                return self.max_timeout
+            return min(self.max_timeout, max(self.min_timeout, self._smoothed + 4 * self._deviation))
+
+    def before_call(self) -> bool:
+        """
+        Admit a call or fail fast
+
+        Returns:
+            True if the call is the half-open probe
+
+        Raises:
+            CircuitOpenError: If the circuit is open or its probe is in flight
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+
+            now = time.monotonic()
+            if self.state == OPEN:
+                remaining = self.reset_timeout - (now - self.opened_at)
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = HALF_OPEN
+                self._probing = False
+
+            if self._probing:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.min_timeout)
+            self._probing = True
+            return True
+
+    def record_success(self, latency: float, probe: bool = False):
+        """
+        Record a call the provider answered (including requests it rejected as invalid)
+
+        Args:
+            latency: Call duration in seconds
+            probe: Whether the call was the half-open probe
+        """
+        with self._lock:
+            self.successes += 1
+            if self._smoothed is None:
+                self._smoothed, self._deviation = latency, latency / 2
+            else:
+                self._deviation = 0.75 * self._deviation + 0.25 * abs(self._smoothed - latency)
+                self._smoothed = 0.875 * self._smoothed + 0.125 * latency
+
+            if self.state == CLOSED:
+                self.consecutive_failures = 0
+            elif probe:
+                # Only the probe may close the circuit; calls admitted before it opened don't count
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                self._probing = False
+                logger.info(f"Circuit {self.name} closed")
+
+    def record_failure(self, probe: bool = False, timed_out: bool = False):
+        """
+        Record a call the provider failed, refused for load, or did not answer in time
+
+        Args:
+            probe: Whether the call was the half-open probe
+            timed_out: Whether the call hit the adaptive timeout
+        """
+        with self._lock:
+            self.failures += 1
+            self.timeouts += timed_out
+            if self.state == CLOSED:
+                self.consecutive_failures += 1
+                if self.consecutive_failures < self.failure_threshold:
+                    return
+            elif not probe:
+                return
+
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+            self.trips += 1
+            logger.warning(f"Circuit {self.name} opened after {self.consecutive_failures} consecutive failures")
+
+    def abandon(self, probe: bool):
+        """
+        Forget a call that was cancelled before the provider answered
+
+        Args:
+            probe: Whether the call was the half-open probe (its slot is released)
+        """
+        with self._lock:
+            if probe:
+                self._probing = False
+
+    async def call(self, make_call: Callable[[], Awaitable[Any]],
+                   is_failure: Callable[[Exception], bool] = lambda error: True) -> Any:
+        """
+        Run a provider call through the breaker with the adaptive timeout
+
+        Args:
+            make_call: Returns the coroutine making the call
+            is_failure: Whether an error means the provider is unhealthy (as opposed to a bad request)
+
+        Returns:
+            The call's result
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            TimeoutError: If the call exceeded the adaptive timeout
+        """
+        probe = self.before_call()
+        timeout = self.timeout()
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(make_call(), timeout)
+        except asyncio.TimeoutError:
+            self.record_failure(probe, timed_out=True)
+            raise TimeoutError(f"{self.name} did not answer within {timeout:.2f}s")
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure(probe)
+            else:
+                self.record_success(time.perf_counter() - started, probe)
+            raise
+        except BaseException:
+            self.abandon(probe)
+            raise
+        self.record_success(time.perf_counter() - started, probe)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get breaker state and counters
+
+        Returns:
+            Dictionary with state, timeout and call outcome counts
+        """
+        timeout = self.timeout()
+        with self._lock:
+            return {
+                "state": self.state,
+                "timeout_ms": round(timeout * 1000, 1),
+                "latency_ms": round(self._smoothed * 1000, 1) if self._smoothed is not None else None,
+                "consecutive_failures": self.consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "trips": self.trips
+            }
+
+class CircuitBreakers:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 min_timeout: float = 0.5, max_timeout: float = 10.0):
+        """
+        Initialize the registry of circuit breakers, one per channel and provider
+
+        Args:
+            failure_threshold: Consecutive failures that open a circuit
+            reset_timeout: Seconds a circuit stays open before a probe
+            min_timeout: Lower bound of the adaptive timeouts in seconds
+            max_timeout: Upper bound of the adaptive timeouts in seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, channel: str, provider: str) -> CircuitBreaker:
+        """
+        Get the breaker of a channel and provider, creating it on first use
+
+        Args:
+            channel: Channel name (e.g. "sms")
+            provider: Provider identity (e.g. "twilio:AC123")
+
+        Returns:
+            Circuit breaker
+        """
+        key = (channel, provider)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = self._breakers[key] = CircuitBreaker(
+                        f"{channel}:{provider}", self.failure_threshold, self.reset_timeout,
+                        self.min_timeout, self.max_timeout)
+        return breaker
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the state of every breaker
+
+        Returns:
+            Mapping of circuit name to breaker statistics
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.get_stats() for breaker in breakers}
+
+# Global circuit breakers of the notification channels
+circuit_breakers = CircuitBreakers(
+    failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
+    min_timeout=float(os.getenv("CIRCUIT_MIN_TIMEOUT_SECONDS", "0.5")),
+    max_timeout=float(os.getenv("TWILIO_TIMEOUT_SECONDS", "10")))
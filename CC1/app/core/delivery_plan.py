@@ -0,0 +1,271 @@
+"""
+Per-incident delivery plans
+
+Before an alert fans out, its recipients are collected into a plan that
+normalizes every contact point (E.164 phone numbers, lower-cased email
+addresses), applies each recipient's channel preferences and drops
+duplicates: the same number listed on two accounts, written two ways, or
+reachable by both SMS and WhatsApp gets one text message. Voice calls,
+email and push are separate media and are planned independently. Every
+plan counts the sends it saved.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PHONE_CHANNELS = ("sms", "whatsapp", "voice")
+
+# Channels delivering the same text message: a contact gets it on one of them
+TEXT_CHANNELS = ("sms", "whatsapp")
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def normalize_phone(number: Optional[str], default_country_code: str = "1") -> Optional[str]:
+    """
+    Normalize a phone number to E.164
+
+    Args:
+        number: Phone number as entered (spaces, dashes, dots, parentheses and a "00" prefix allowed)
+        default_country_code: Country calling code of numbers written without one
+
+    Returns:
+        Number as "+<digits>", or None if it cannot be a valid number
+    """
+    if not number:
+        return None
+    number = number.strip()
+    if number.startswith("whatsapp:"):
+        number = number[len("whatsapp:"):]
+    international = number.startswith("+") or number.startswith("00")
+    digits = re.sub(r"[\s().\-/]", "", number).lstrip("+")
+    if not digits.isdigit():
+        return None
+
+    if number.startswith("00"):
+        digits = digits[2:]
+    elif not international:
+        # National format: drop the trunk prefix and add the default country code
+        national = digits[1:] if digits.startswith("0") else digits
+        if default_country_code == "1" and len(digits) == 11 and digits.startswith("1"):
+            national = digits[1:]
+        digits = default_country_code + national
+
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+    return "+" + digits
+
+def normalize_email(address: Optional[str]) -> Optional[str]:
+    """
+    Normalize an email address for comparison
+
+    Args:
+        address: Email address as entered
+
+    Returns:
+        Lower-cased address, or None if it is not an address
+    """
+    if not address:
+        return None
+    address = address.strip().lower()
+    return address if EMAIL_PATTERN.match(address) else None
+
+class Delivery(NamedTuple):
+    channel: str
+    recipient: str
+    user_id: Optional[int] = None
+    locale: Optional[str] = None
+
+class DeliveryPlan:
+    def __init__(self, preferences: Optional[Dict[int, Sequence[str]]] = None,
+                 default_country_code: Optional[str] = None):
+        """
+        Initialize an empty delivery plan for one incident
+
+        Args:
+            preferences: Allowed channels per user ID, most preferred first (users not listed allow all)
+            default_country_code: Country calling code of national phone numbers (DEFAULT_COUNTRY_CODE if None)
+        """
+        self.preferences = preferences or {}
+        self.default_country_code = default_country_code or os.getenv("DEFAULT_COUNTRY_CODE", "1")
+        self._planned: Dict[Tuple[str, str], Optional[Delivery]] = {}
+        self.requested = 0
+        self.invalid = 0
+        self.opted_out = 0
+        self.duplicates = 0
+        self.already_sent = 0
+
+    def normalize(self, channel: str, recipient: Optional[str]) -> Optional[str]:
+        """
+        Normalize a contact point for its channel
+
+        Args:
+            channel: Notification channel
+            recipient: Phone number, email address or device token
+
+        Returns:
+            Normalized contact point, or None if it is invalid
+        """
+        if channel in PHONE_CHANNELS:
+            return normalize_phone(recipient, self.default_country_code)
+        if channel == "email":
+            return normalize_email(recipient)
+        return recipient.strip() if recipient and recipient.strip() else None
+
+    @staticmethod
+    def _medium(channel: str) -> str:
+        return "text" if channel in TEXT_CHANNELS else channel
+
+    def _choose_channel(self, channel: str, user_id: Optional[int]) -> Optional[str]:
+        """
+        Apply a user's channel preferences to a requested channel
+
+        A text message goes out on the user's preferred text channel, so a
+        WhatsApp-only user gets WhatsApp where others get SMS.
+
+        Args:
+            channel: Requested channel
+            user_id: ID of the recipient's user, if known
+
+        Returns:
+            Channel to use, or None if the user opted out of it
+        """
+        allowed = self.preferences.get(user_id) if user_id is not None else None
+        if allowed is None:
+            return channel
+        if channel in TEXT_CHANNELS:
+            return next((preferred for preferred in allowed if preferred in TEXT_CHANNELS), None)
+        return channel if channel in allowed else None
+
+    def mark_sent(self, channel: str, recipient: str):
+        """
+        Record a delivery made earlier for this incident (e.g. by a previous escalation rung)
+
+        Args:
+            channel: Notification channel
+            recipient: Contact point
+        """
+        contact = self.normalize(channel, recipient) or recipient
+        self._planned.setdefault((self._medium(channel), contact), None)
+
+    def add(self, channel: str, recipient: Optional[str], user_id: Optional[int] = None,
+            locale: Optional[str] = None) -> Optional[Delivery]:
+        """
+        Request a delivery
+
+        Args:
+            channel: Requested notification channel
+            recipient: Contact point as stored
+            user_id: ID of the recipient's user, if known
+            locale: Recipient locale
+
+        Returns:
+            The planned delivery, or None if it was invalid, opted out or a duplicate
+        """
+        self.requested += 1
+        channel = self._choose_channel(channel, user_id)
+        if channel is None:
+            self.opted_out += 1
+            return None
+
+        contact = self.normalize(channel, recipient)
+        if contact is None:
+            self.invalid += 1
+            return None
+
+        key = (self._medium(channel), contact)
+        if key in self._planned:
+            if self._planned[key] is None:
+                self.already_sent += 1
+            else:
+                self.duplicates += 1
+            return None
+
+        delivery = self._planned[key] = Delivery(channel, contact, user_id, locale)
+        return delivery
+
+    @property
+    def deliveries(self) -> List[Delivery]:
+        """
+        Planned deliveries in the order they were added
+        """
+        return [delivery for delivery in self._planned.values() if delivery is not None]
+
+    def recipients_by_channel(self) -> Dict[str, List[str]]:
+        """
+        Group the planned deliveries by channel
+
+        Returns:
+            Mapping of channel to contact points
+        """
+        grouped: Dict[str, List[str]] = {}
+        for delivery in self.deliveries:
+            grouped.setdefault(delivery.channel, []).append(delivery.recipient)
+        return grouped
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get the plan's counts
+
+        Returns:
+            Dictionary with requested, planned and dropped deliveries; sends_saved
+            counts the requests that will not be sent (duplicates and opt-outs)
+        """
+        planned = len(self.deliveries)
+        return {
+            "requested": self.requested,
+            "planned": planned,
+            "duplicates": self.duplicates,
+            "already_sent": self.already_sent,
+            "opted_out": self.opted_out,
+            "invalid": self.invalid,
+            "sends_saved": self.duplicates + self.already_sent + self.opted_out
+        }
+
+class DeliveryStats:
+    def __init__(self):
+        """
+        Initialize the totals of all delivery plans of this process
+        """
+        self._totals: Dict[str, int] = {}
+        self.plans = 0
+        self._lock = threading.Lock()
+
+    def record(self, plan: DeliveryPlan) -> Dict[str, int]:
+        """
+        Add a plan's counts to the totals and log the sends it saved
+
+        Args:
+            plan: Completed delivery plan
+
+        Returns:
+            The plan's counts
+        """
+        stats = plan.get_stats()
+        with self._lock:
+            self.plans += 1
+            for key, value in stats.items():
+                self._totals[key] = self._totals.get(key, 0) + value
+        if stats["sends_saved"] or stats["invalid"]:
+            logger.info(f"Delivery plan: {stats['planned']} sends planned, {stats['sends_saved']} saved, "
+                        f"{stats['invalid']} invalid contacts")
+        return stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the totals of all plans
+
+        Returns:
+            Dictionary with the number of plans and summed counts
+        """
+        with self._lock:
+            return {"plans": self.plans, **self._totals}
+
+# Global totals reported in the runtime stats
+delivery_stats = DeliveryStats()
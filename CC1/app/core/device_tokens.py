@@ -0,0 +1,121 @@
+"""
+Registry of push notification device tokens
+
+Apps register a token per device for the signed-in user; a token moves to
+the new user when the device changes hands. Tokens the push provider
+reports as unregistered or malformed are deactivated, so later alerts stop
+paying for sends that can never be delivered.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PLATFORMS = ("android", "ios", "web")
+
+def register_device_token(db: Session, user_id: int, token: str, platform: str = "android") -> Any:
+    """
+    Register a device token for a user, reactivating or reassigning a known token
+
+    Args:
+        db: Database session
+        user_id: ID of the user signed in on the device
+        token: Push provider token of the device
+        platform: Device platform (android, ios or web)
+
+    Returns:
+        The active device token row
+    """
+    if platform not in PLATFORMS:
+        raise ValueError(f"Unknown platform {platform}")
+
+    row = db.query(models.user.DeviceToken).filter(models.user.DeviceToken.token == token).first()
+    if row is None:
+        row = models.user.DeviceToken(token=token)
+        db.add(row)
+    row.user_id = user_id
+    row.platform = platform
+    row.is_active = True
+    row.invalid_reason = None
+    row.last_seen_at = datetime.utcnow()
+    db.commit()
+    db.refresh(row)
+    return row
+
+def get_active_tokens(db: Session, user_ids: List[int]) -> Dict[int, List[str]]:
+    """
+    Get the active device tokens of users
+
+    Args:
+        db: Database session
+        user_ids: IDs of the users
+
+    Returns:
+        Mapping of user ID to device tokens
+    """
+    if not user_ids:
+        return {}
+
+    tokens: Dict[int, List[str]] = {}
+    for user_id, token in db.query(models.user.DeviceToken.user_id, models.user.DeviceToken.token).filter(
+        models.user.DeviceToken.user_id.in_(user_ids),
+        models.user.DeviceToken.is_active == True
+    ).order_by(models.user.DeviceToken.id):
+        tokens.setdefault(user_id, []).append(token)
+    return tokens
+
+def deactivate_tokens(db: Session, tokens: List[str], reason: str) -> int:
+    """
+    Deactivate device tokens (committed with the caller's transaction)
+
+    Args:
+        db: Database session
+        tokens: Tokens to deactivate
+        reason: Why the tokens are no longer usable
+
+    Returns:
+        Number of tokens deactivated
+    """
+    if not tokens:
+        return 0
+    return db.query(models.user.DeviceToken).filter(
+        models.user.DeviceToken.token.in_(tokens),
+        models.user.DeviceToken.is_active == True
+    ).update({"is_active": False, "invalid_reason": reason}, synchronize_session=False)
+
+def prune_invalid_tokens(tokens: List[str], reason: str = "unregistered",
+                         session_factory: Optional[Callable[[], Session]] = None) -> int:
+    """
+    Deactivate tokens the push provider rejected
+
+    Args:
+        tokens: Tokens reported invalid
+        reason: Provider error for the tokens
+        session_factory: Creates the database session (SessionLocal if None)
+
+    Returns:
+        Number of tokens deactivated
+    """
+    db = (session_factory or SessionLocal)()
+    try:
+        pruned = deactivate_tokens(db, tokens, reason)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to prune device tokens: {str(e)}")
+        return 0
+    finally:
+        db.close()
+
+    if pruned:
+        logger.info(f"Pruned {pruned} invalid device tokens")
+    return pruned
@@ -4,6 +4,11 @@ from app import models, schemas
 from sqlalchemy.orm import Session
 import logging
 
+from app.core.delivery_plan import DeliveryPlan, delivery_stats
+from app.core.device_tokens import get_active_tokens
+from app.core.message_templates import build_alert_context, message_templates
+from app.core.metrics import metrics
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -46,6 +51,7 @@ class EmergencyNetwork:
         
         return c * r
 
+    @metrics.timed("emergency_network", "find_volunteers")
     def find_nearest_volunteers(self, user_lat: float, user_lon: float, 
                               max_distance_km: float = 2.0, 
                               max_volunteers: int = 5) -> List[Dict]:
@@ -111,6 +117,7 @@ class EmergencyNetwork:
             logger.error(f"Error finding nearest volunteers: {str(e)}")
             return []
 
+    @metrics.timed("emergency_network", "find_doctors")
     def find_available_doctors(self, specialty: str = "general", 
                               max_doctors: int = 3) -> List[Dict]:
         """
@@ -154,6 +161,119 @@ class EmergencyNetwork:
             logger.error(f"Error finding available doctors: {str(e)}")
             return []
 
+    def _build_alert_context(self, user_id: int, alert_data: Dict) -> Dict[str, str]:
+        """
+        Build the template context of the messages sent to emergency contacts
+        
+        Args:
+            user_id: ID of the user who triggered the alert
+            alert_data: Dictionary containing alert information
+            
+        Returns:
+            Template context (see message_templates.build_alert_context)
+        """
+        # Get user's primary location
+        user_location = self.db.query(models.user.Location).filter(
+            models.user.Location.user_id == user_id,
+            models.user.Location.is_primary == True
+        ).first()
+        
+        location_str = None
+        if user_location:
+            location_str = user_location.address or f"{user_location.latitude}, {user_location.longitude}"
+        
+        return build_alert_context(alert_data, location_str)
+
+    def _get_preferences(self, user_ids: List[int]) -> Dict[int, Tuple[Optional[str], Optional[List[str]]]]:
+        """
+        Get the notification preferences of users
+        
+        Args:
+            user_ids: IDs of the users
+            
+        Returns:
+            Mapping of user ID to (locale, allowed channels or None for all); users without
+            preferences are left out
+        """
+        if not user_ids:
+            return {}
+        rows = self.db.query(models.user.NotificationPreference).filter(
+            models.user.NotificationPreference.user_id.in_(user_ids)
+        ).all()
+        return {
+            row.user_id: (row.locale, [c.strip() for c in row.channels.split(",") if c.strip()]
+                          if row.channels is not None else None)
+            for row in rows
+        }
+
+    @metrics.timed("emergency_network", "queue_contact_notifications")
+    def queue_contact_notifications(self, user_id: int, alert_id: int, alert_data: Dict,
+                                    channels: Tuple[str, ...] = ("sms", "email")) -> int:
+        """
+        Add notifications for the user's emergency contacts to the outbox
+        
+        The rows join the caller's transaction, so they are committed together
+        with the alert and delivered by the outbox dispatcher. Recipients go
+        through a delivery plan: contact points are normalized, duplicates and
+        opted-out channels dropped, and contacts already notified for this
+        alert (on the same channel, or by text on SMS or WhatsApp) are skipped,
+        so an escalation rung can run again safely.
+        
+        Args:
+            user_id: ID of the user who triggered the alert
+            alert_id: ID of the (flushed) alert
+            alert_data: Dictionary containing alert information
+            channels: Channels to notify on (sms, whatsapp, email, push, voice)
+            
+        Returns:
+            Number of notifications queued
+        """
+        from app.core.notification_outbox import enqueue_notification
+        
+        # Each (channel, locale) text is rendered once and shared by its recipients
+        messages = message_templates.for_incident(self._build_alert_context(user_id, alert_data))
+        
+        caregivers = self.db.query(models.user.User).filter(
+            models.user.User.role == "caregiver"
+        ).all()
+        
+        device_tokens = {}
+        if "push" in channels:
+            device_tokens = get_active_tokens(self.db, [caregiver.id for caregiver in caregivers])
+        
+        preferences = self._get_preferences([caregiver.id for caregiver in caregivers])
+        
+        # Normalized contact points, one text message per number, preferences applied
+        plan = DeliveryPlan({user: allowed for user, (_, allowed) in preferences.items() if allowed is not None})
+        for channel, recipient in self.db.query(
+            models.user.NotificationOutbox.channel, models.user.NotificationOutbox.recipient
+        ).filter(models.user.NotificationOutbox.alert_id == alert_id):
+            plan.mark_sent(channel, recipient)
+        
+        for caregiver in caregivers:
+            locale = preferences.get(caregiver.id, (None, None))[0]
+            for channel in channels:
+                if channel == "push":
+                    # One row per registered device; the dispatcher sends them as one multicast
+                    recipients = device_tokens.get(caregiver.id, [])
+                else:
+                    recipient = caregiver.email if channel == "email" else caregiver.phone_number
+                    recipients = [recipient] if recipient else []
+                for recipient in recipients:
+                    plan.add(channel, recipient, caregiver.id, locale)
+        
+        pending = plan.deliveries
+        for delivery in pending:
+            message = messages.get(delivery.channel, delivery.locale)
+            enqueue_notification(self.db, alert_id, user_id, delivery.channel, delivery.recipient, message.body,
+                                 subject=message.subject)
+        delivery_stats.record(plan)
+        
+        logger.info(f"Queued {len(pending)} notifications for alert {alert_id} "
+                    f"({messages.renders} distinct messages rendered)")
+        return len(pending)
+
+    @metrics.timed("emergency_network", "notify_contacts")
     def notify_emergency_contacts(self, user_id: int, alert_data: Dict) -> Dict:
         """
         Notify emergency contacts about an alert
@@ -171,25 +291,8 @@ class EmergencyNetwork:
                 models.user.User.role == "caregiver"
             ).all()
             
-            # Get user's primary location
-            user_location = self.db.query(models.user.Location).filter(
-                models.user.Location.user_id == user_id,
-                models.user.Location.is_primary == True
-            ).first()
-            
-            location_str = "Unknown location"
-            if user_location:
-                location_str = user_location.address or f"{user_location.latitude}, {user_location.longitude}"
-            
             # Prepare notification message
-            message = (
-                f"🚨 EMERGENCY ALERT 🚨\n"
-                f"Fall detected for {alert_data.get('user_name', 'Unknown User')}\n"
-                f"Time: {alert_data.get('timestamp', 'Unknown Time')}\n"
-                f"Location: {location_str}\n"
-                f"Status: {alert_data.get('status', 'Critical')}\n"
-                f"Please check on them immediately!"
-            )
+            message = message_templates.for_incident(self._build_alert_context(user_id, alert_data)).get("sms").body
             
             # Collect contact information
             sms_contacts = []
@@ -220,6 +323,7 @@ class EmergencyNetwork:
                 "error": str(e)
             }
 
+    @metrics.timed("emergency_network", "response_team")
     def create_emergency_response_team(self, user_id: int, 
                                      user_lat: float, user_lon: float) -> Dict:
         """
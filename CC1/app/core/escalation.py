@@ -0,0 +1,417 @@
+"""
+Timed escalation of unacknowledged alerts
+
+Each alert runs an escalation ladder: rungs of steps (notification channels,
+the volunteer response team) that fire after a delay unless a caregiver
+acknowledges the alert first. Rungs with no delay run in the alert's own
+transaction; later rungs wait in a heap of timers, one per alert, so tens
+of thousands of pending escalations cost one heap entry each and an
+acknowledgment cancels its alert's timer in O(log n).
+
+The database stays the source of truth: a rung only fires while its alert
+is still pending, so an acknowledgment handled by another worker process
+also stops the escalation.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.metrics import metrics
+from app.core.notification_outbox import notification_dispatcher
+from app.database import SessionLocal
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Steps joined by "+" run together; each rung fires the given seconds after the alert
+DEFAULT_LADDER = "push+email:0,sms:30,voice:90,volunteers:180"
+
+def parse_ladder(spec: str) -> List[Tuple[float, Tuple[str, ...]]]:
+    """
+    Parse an escalation ladder specification
+
+    Args:
+        spec: Comma separated rungs of "step+step:delay_seconds"
+
+    Returns:
+        Rungs as (delay in seconds, steps), earliest first
+    """
+    rungs = []
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        steps, _, delay = part.strip().partition(":")
+        rungs.append((float(delay or 0), tuple(step.strip() for step in steps.split("+") if step.strip())))
+    return sorted(rungs, key=lambda rung: rung[0])
+
+class TimerHeap:
+    def __init__(self):
+        """
+        Initialize a binary min-heap of keyed timers
+
+        A position index maps each key to its slot, so a timer can be
+        cancelled or rescheduled in O(log n) without scanning the heap.
+        """
+        self._heap: List[list] = []  # [due, sequence, key, payload]
+        self._positions: Dict[Any, int] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._positions
+
+    def push(self, key: Any, due: float, payload: Any = None):
+        """
+        Schedule a timer, replacing any pending timer with the same key
+
+        Args:
+            key: Timer key
+            due: Monotonic time the timer fires at
+            payload: Value returned with the timer when it fires
+        """
+        self.cancel(key)
+        self._heap.append([due, next(self._sequence), key, payload])
+        self._positions[key] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def cancel(self, key: Any) -> bool:
+        """
+        Remove a pending timer
+
+        Args:
+            key: Timer key
+
+        Returns:
+            True if a timer was removed
+        """
+        position = self._positions.pop(key, None)
+        if position is None:
+            return False
+
+        last = self._heap.pop()
+        if position < len(self._heap):
+            # Move the last entry into the hole and restore the heap in whichever direction it violates
+            self._heap[position] = last
+            self._positions[last[2]] = position
+            self._sift_up(position)
+            self._sift_down(self._positions[last[2]])
+        return True
+
+    def next_due(self) -> Optional[float]:
+        """
+        Get when the earliest timer fires
+
+        Returns:
+            Monotonic due time, or None if no timer is pending
+        """
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[Tuple[Any, Any]]:
+        """
+        Remove and return all timers due by now
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            List of (key, payload), earliest first
+        """
+        fired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, payload = self._heap[0]
+            self.cancel(key)
+            fired.append((key, payload))
+        return fired
+
+    def _swap(self, i: int, j: int):
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._positions[heap[i][2]] = i
+        self._positions[heap[j][2]] = j
+
+    def _sift_up(self, index: int):
+        while index > 0:
+            parent = (index - 1) // 2
+            if self._heap[index][:2] >= self._heap[parent][:2]:
+                return
+            self._swap(index, parent)
+            index = parent
+
+    def _sift_down(self, index: int):
+        size = len(self._heap)
+        while True:
+            smallest = index
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size and self._heap[child][:2] < self._heap[smallest][:2]:
+                    smallest = child
+            if smallest == index:
+                return
+            self._swap(index, smallest)
+            index = smallest
+
+class EscalationScheduler:
+    def __init__(self, session_factory: Callable[[], Session], ladder: List[Tuple[float, Tuple[str, ...]]]):
+        """
+        Initialize the escalation scheduler
+
+        Args:
+            session_factory: Creates database sessions for firing rungs
+            ladder: Rungs as (delay in seconds, steps), earliest first
+        """
+        self.session_factory = session_factory
+        self.ladder = ladder
+        self._handlers: Dict[str, Callable[[Session, Any, Dict[str, Any]], Any]] = {}
+        self._timers = TimerHeap()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.scheduled = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.skipped = 0
+
+    def register(self, step: str, handler: Callable[[Session, Any, Dict[str, Any]], Any]):
+        """
+        Register the handler of a ladder step
+
+        Handlers run in the session of the rung and must not commit.
+
+        Args:
+            step: Step name used in the ladder (e.g. "sms", "volunteers")
+            handler: Callable taking (db, alert, payload) and returning a result
+        """
+        self._handlers[step] = handler
+
+    def run_immediate(self, db: Session, alert: Any, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the rungs without delay in the caller's transaction
+
+        Args:
+            db: Database session holding the flushed alert
+            alert: The alert
+            payload: Escalation data passed to the step handlers
+
+        Returns:
+            Mapping of step name to handler result
+        """
+        results = {}
+        for delay, steps in self.ladder:
+            if delay > 0:
+                break
+            for step in steps:
+                results[step] = self._run_step(db, alert, step, payload)
+        return results
+
+    def schedule(self, alert_id: int, payload: Dict[str, Any]) -> bool:
+        """
+        Schedule the delayed rungs of an alert (call after its transaction commits)
+
+        Args:
+            alert_id: ID of the alert
+            payload: Escalation data passed to the step handlers
+
+        Returns:
+            True if a rung was scheduled
+        """
+        return self._schedule_rung(alert_id, self._first_delayed_rung(), time.monotonic(), payload)
+
+    def cancel(self, alert_id: int) -> bool:
+        """
+        Stop escalating an alert
+
+        Args:
+            alert_id: ID of the alert
+
+        Returns:
+            True if a pending rung was cancelled
+        """
+        with self._condition:
+            cancelled = self._timers.cancel(alert_id)
+            if cancelled:
+                self.cancelled += 1
+        return cancelled
+
+    def _first_delayed_rung(self) -> int:
+        for index, (delay, _) in enumerate(self.ladder):
+            if delay > 0:
+                return index
+        return len(self.ladder)
+
+    def _schedule_rung(self, alert_id: int, rung: int, started: float, payload: Dict[str, Any]) -> bool:
+        """
+        Put the timer of an alert's next rung on the heap
+
+        Args:
+            alert_id: ID of the alert
+            rung: Index of the rung in the ladder
+            started: Monotonic time the escalation started
+            payload: Escalation data
+
+        Returns:
+            True if the rung exists and was scheduled
+        """
+        if rung >= len(self.ladder):
+            return False
+        self.start()
+        with self._condition:
+            self._timers.push(alert_id, started + self.ladder[rung][0], (rung, started, payload))
+            self.scheduled += 1
+            # Wake the scheduler in case this timer is now the earliest
+            self._condition.notify()
+        return True
+
+    def start(self):
+        """
+        Start the scheduler thread if it is not running
+        """
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="escalation", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the scheduler thread (pending timers are kept)
+        """
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._condition.notify()
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        """
+        Sleep until the earliest timer is due, then fire every due rung
+        """
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    due = self._timers.next_due()
+                    now = time.monotonic()
+                    if due is not None and due <= now:
+                        break
+                    self._condition.wait(None if due is None else due - now)
+                if self._stopping:
+                    return
+                fired = self._timers.pop_due(time.monotonic())
+
+            for alert_id, (rung, started, payload) in fired:
+                try:
+                    self._fire(alert_id, rung, started, payload)
+                except Exception as e:
+                    logger.error(f"Escalation of alert {alert_id} failed: {str(e)}")
+
+    def _fire(self, alert_id: int, rung: int, started: float, payload: Dict[str, Any]):
+        """
+        Run one rung of an alert that is still pending and schedule the next
+
+        Args:
+            alert_id: ID of the alert
+            rung: Index of the rung in the ladder
+            started: Monotonic time the escalation started
+            payload: Escalation data
+        """
+        db = self.session_factory()
+        try:
+            alert = db.query(models.user.Alert).filter(models.user.Alert.id == alert_id).first()
+            if alert is None or alert.status != "pending":
+                with self._condition:
+                    self.skipped += 1
+                return
+
+            with metrics.stage("escalation", "rung"):
+                for step in self.ladder[rung][1]:
+                    self._run_step(db, alert, step, payload)
+                db.commit()
+            logger.info(f"Alert {alert_id} escalated to {'+'.join(self.ladder[rung][1])}")
+        except Exception as e:
+            # A failed rung must not stop the ladder: the next rung still goes out
+            db.rollback()
+            logger.error(f"Escalation rung {rung} of alert {alert_id} failed: {str(e)}")
+        finally:
+            db.close()
+
+        with self._condition:
+            self.fired += 1
+        notification_dispatcher.wake()
+        if not self._schedule_rung(alert_id, rung + 1, started, payload):
+            with self._condition:
+                self.completed += 1
+
+    def _run_step(self, db: Session, alert: Any, step: str, payload: Dict[str, Any]) -> Any:
+        """
+        Run the handler of one step
+
+        Args:
+            db: Database session of the rung
+            alert: The alert
+            step: Step name
+            payload: Escalation data
+
+        Returns:
+            Handler result, or None if the step has no handler
+        """
+        handler = self._handlers.get(step)
+        if handler is None:
+            logger.warning(f"No escalation handler registered for step {step}")
+            return None
+        return handler(db, alert, payload)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler counters
+
+        Returns:
+            Dictionary with the ladder, pending timers and outcome counts
+        """
+        with self._condition:
+            return {
+                "ladder": ",".join(f"{'+'.join(steps)}:{delay:g}" for delay, steps in self.ladder),
+                "pending": len(self._timers),
+                "scheduled": self.scheduled,
+                "fired": self.fired,
+                "cancelled": self.cancelled,
+                "completed": self.completed,
+                "skipped": self.skipped
+            }
+
+def acknowledge_alert(db: Session, alert_id: int, status: str = "acknowledged") -> Optional[Any]:
+    """
+    Acknowledge a pending alert and stop its escalation
+
+    Args:
+        db: Database session
+        alert_id: ID of the alert
+        status: Status to set (acknowledged, resolved or false_alarm)
+
+    Returns:
+        The alert, or None if it does not exist
+    """
+    alert = db.query(models.user.Alert).filter(models.user.Alert.id == alert_id).first()
+    if alert is None:
+        return None
+
+    if alert.status == "pending":
+        alert.status = status
+        db.commit()
+        db.refresh(alert)
+    escalation_scheduler.cancel(alert_id)
+    return alert
+
+# Global scheduler escalating the alerts raised by this process
+escalation_scheduler = EscalationScheduler(
+    SessionLocal, parse_ladder(os.getenv("ESCALATION_LADDER", DEFAULT_LADDER)))
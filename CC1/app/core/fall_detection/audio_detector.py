@@ -2,6 +2,8 @@ import numpy as np
 import logging
 from typing import Tuple, List
 
+from app.core.metrics import metrics
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -42,6 +44,7 @@ class AudioFallDetector:
         
         logger.info("AudioFallDetector initialized")
 
+    @metrics.timed("audio_detector", "features")
     def extract_features(self, audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
         """
         Extract MFCC features from audio data
@@ -162,12 +165,29 @@ class AudioFallDetector:
         # Extract features
         features = self.extract_features(audio_data, sample_rate)
         
+        return self.detect_fall_from_features(features)
+
+    @metrics.timed("audio_detector", "classify")
+    def detect_fall_from_features(self, features: np.ndarray) -> Tuple[bool, float]:
+        """
+        Classify pre-extracted MFCC features (e.g. recorded or computed on an edge device)
+        
+        Args:
+            features: Feature vector from extract_features
+            
+        Returns:
+            Tuple of (is_fall_detected, confidence_score)
+        """
+        if not self.is_trained:
+            logger.warning("Model not trained yet")
+            return False, 0.0
+        
         # Predict
         prediction = self.model.predict([features])[0]
         probabilities = self.model.predict_proba([features])[0]
         
         # Get confidence score (probability of positive class)
-        confidence_score = probabilities[1] if len(probabilities) > 1 else 0.0
+        confidence_score = float(probabilities[1]) if len(probabilities) > 1 else 0.0
         
         is_fall = bool(prediction)
         
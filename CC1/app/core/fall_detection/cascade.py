@@ -0,0 +1,168 @@
+import cv2
+import numpy as np
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class MotionGate:
+    def __init__(self, width: int = 64, height: int = 48, pixel_threshold: int = 25,
+                 full_scale: float = 0.15):
+        """
+        Initialize the MotionGate, a cheap frame-differencing detector
+
+        Args:
+            width: Width of the downscaled grayscale frame
+            height: Height of the downscaled grayscale frame
+            pixel_threshold: Per-pixel intensity change counted as motion
+            full_scale: Fraction of moving pixels mapped to a suspicion of 1.0
+        """
+        self.size = (width, height)
+        self.pixel_threshold = pixel_threshold
+        self.full_scale = full_scale
+
+    def score(self, frame: np.ndarray, prev_small: Optional[np.ndarray]) -> Tuple[float, np.ndarray]:
+        """
+        Score motion between the given frame and the previous downscaled frame
+
+        Args:
+            frame: Input image frame (BGR)
+            prev_small: Previous downscaled grayscale frame (or None)
+
+        Returns:
+            Tuple of (suspicion in [0, 1], downscaled grayscale frame)
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+
+        if prev_small is None:
+            return 0.0, small
+
+        diff = cv2.absdiff(small, prev_small)
+        moving_fraction = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+        return min(moving_fraction / self.full_scale, 1.0), small
+
+class AudioOnsetGate:
+    def __init__(self, onset_db: float = 12.0, baseline_alpha: float = 0.05):
+        """
+        Initialize the AudioOnsetGate, a cheap energy-onset detector
+
+        Args:
+            onset_db: Energy rise above the background (in dB) mapped to a suspicion of 1.0
+            baseline_alpha: Smoothing factor for the running background energy
+        """
+        self.onset_db = onset_db
+        self.baseline_alpha = baseline_alpha
+
+    def score(self, audio_data: np.ndarray, baseline_db: Optional[float]) -> Tuple[float, float]:
+        """
+        Score the energy onset of an audio chunk against the running background
+
+        Args:
+            audio_data: Audio signal chunk
+            baseline_db: Running background energy in dB (or None)
+
+        Returns:
+            Tuple of (suspicion in [0, 1], updated background energy in dB)
+        """
+        samples = np.asarray(audio_data, dtype=np.float32)
+        if samples.size == 0:
+            return 0.0, baseline_db if baseline_db is not None else -120.0
+
+        rms = float(np.sqrt(np.mean(np.square(samples))))
+        energy_db = 20.0 * np.log10(rms + 1e-10)
+
+        if baseline_db is None:
+            return 0.0, energy_db
+
+        suspicion = min(max(energy_db - baseline_db, 0.0) / self.onset_db, 1.0)
+
+        # Only quiet chunks update the background so a long impact does not mask itself
+        if suspicion < 0.5:
+            baseline_db = (1 - self.baseline_alpha) * baseline_db + self.baseline_alpha * energy_db
+
+        return suspicion, baseline_db
+
+class CascadeState:
+    def __init__(self, pre_trigger_frames: int):
+        """
+        Initialize the per-stream detector state (previous landmarks and cascade buffers)
+
+        Args:
+            pre_trigger_frames: Number of recent frames kept for escalation
+        """
+        self.frame_buffer: Deque[Tuple[float, np.ndarray]] = deque(maxlen=pre_trigger_frames)  # (capture time, frame)
+        self.audio_buffer: Deque[np.ndarray] = deque(maxlen=pre_trigger_frames)
+        self.prev_small: Optional[np.ndarray] = None
+        self.audio_baseline_db: Optional[float] = None
+        self.prev_landmarks = None
+        self.escalation_remaining = 0
+        self.stats = CascadeStats()
+        self.lock = threading.RLock()
+        self.last_seen = time.monotonic()
+
+class CascadeStats:
+    def __init__(self):
+        """
+        Initialize the cascade stage counters
+        """
+        self.frames_total = 0
+        self.gate_triggers = 0
+        self.full_stage_frames = 0
+        self.confirmed_falls = 0
+        self.gate_seconds = 0.0
+        self.full_stage_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """
+        Summarize per-stage pass rates and compute savings
+
+        Returns:
+            Dictionary with counters, pass rates and estimated savings
+        """
+        gate_pass_rate = self.gate_triggers / self.frames_total if self.frames_total else 0.0
+        confirm_rate = self.confirmed_falls / self.gate_triggers if self.gate_triggers else 0.0
+        full_stage_fraction = self.full_stage_frames / self.frames_total if self.frames_total else 0.0
+
+        # Cost of running the full stage on every frame, estimated from observed full-stage frames
+        full_cost_per_frame = (
+            self.full_stage_seconds / self.full_stage_frames if self.full_stage_frames else 0.0
+        )
+        always_on_seconds = full_cost_per_frame * self.frames_total
+        cascade_seconds = self.gate_seconds + self.full_stage_seconds
+
+        return {
+            "frames_total": self.frames_total,
+            "gate_triggers": self.gate_triggers,
+            "full_stage_frames": self.full_stage_frames,
+            "confirmed_falls": self.confirmed_falls,
+            "gate_pass_rate": gate_pass_rate,
+            "confirm_rate": confirm_rate,
+            "full_stage_fraction": full_stage_fraction,
+            "gate_seconds": self.gate_seconds,
+            "full_stage_seconds": self.full_stage_seconds,
+            "estimated_always_on_seconds": always_on_seconds,
+            "estimated_compute_savings": (
+                1.0 - cascade_seconds / always_on_seconds if always_on_seconds > 0 else 0.0
+            )
+        }
+
+    def merge(self, other: "CascadeStats"):
+        """
+        Accumulate another stats object into this one
+
+        Args:
+            other: Stats to add
+        """
+        self.frames_total += other.frames_total
+        self.gate_triggers += other.gate_triggers
+        self.full_stage_frames += other.full_stage_frames
+        self.confirmed_falls += other.confirmed_falls
+        self.gate_seconds += other.gate_seconds
+        self.full_stage_seconds += other.full_stage_seconds
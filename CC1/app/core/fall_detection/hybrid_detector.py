@@ -1,85 +1,486 @@
 from app.core.fall_detection.video_detector import VideoFallDetector
 from app.core.fall_detection.audio_detector import AudioFallDetector
+from app.core.fall_detection.cascade import AudioOnsetGate, CascadeState, CascadeStats, MotionGate
+from app.core.fall_detection.recording import StreamRecorder
+from app.core.metrics import metrics
+import numpy as np
 import logging
-from typing import Tuple, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class HybridFallDetector:
-    def __init__(self):
+    def __init__(self, cascade_mode: bool = False, max_streams: int = 1000, stream_ttl: float = 600.0):
         """
         Initialize the Hybrid Fall Detector with both video and audio detectors
+
+        Args:
+            cascade_mode: Gate the full pose/audio models behind a cheap always-on stage
+            max_streams: Streams whose state is kept; the least recently seen is dropped beyond this
+            stream_ttl: Seconds after which the state of a silent stream is dropped
         """
         self.video_detector = VideoFallDetector()
         self.audio_detector = AudioFallDetector()
-        
+
         # Hybrid detection parameters
         self.VIDEO_WEIGHT = 0.6
         self.AUDIO_WEIGHT = 0.4
         self.HYBRID_THRESHOLD = 0.65  # Threshold for hybrid fall detection
-        
-        logger.info("HybridFallDetector initialized")
 
-    def detect_fall(self, video_frame=None, audio_data=None) -> Tuple[bool, float, dict]:
+        # Cascade parameters
+        self.cascade_mode = cascade_mode
+        self.CASCADE_SUSPICION_THRESHOLD = 0.5  # Gate score that escalates to the full models
+        self.CASCADE_PRE_TRIGGER_FRAMES = 8  # Buffered frames analysed when the gate fires
+        self.CASCADE_POST_TRIGGER_FRAMES = 15  # Frames kept at full resolution after the trigger
+        self.motion_gate = MotionGate()
+        self.audio_gate = AudioOnsetGate()
+        # Stream IDs come from clients, so their state is bounded: least recently seen first
+        self.max_streams = max_streams
+        self.stream_ttl = stream_ttl
+        self._streams: "OrderedDict[str, CascadeState]" = OrderedDict()
+        self._streams_lock = threading.Lock()
+        self._evicted_stats = CascadeStats()
+        self.evicted_streams = 0
+        self._recorders: Dict[str, StreamRecorder] = {}
+
+        logger.info(f"HybridFallDetector initialized (cascade mode: {cascade_mode})")
+
+    def detect_fall(self, video_frame=None, audio_data=None, sample_rate: Optional[int] = None,
+                    stream_id: str = "default",
+                    params: Optional[Dict[str, float]] = None,
+                    timestamp: Optional[float] = None) -> Tuple[bool, float, dict]:
         """
         Detect fall using both video and audio data
-        
+
         Args:
             video_frame: Video frame for pose analysis
             audio_data: Audio data for sound analysis
-            
+            sample_rate: Sample rate of the audio data
+            stream_id: Identifier of the camera/microphone stream (cascade mode)
+            params: Per-user fusion weights and threshold (detector defaults if None)
+            timestamp: Capture time of the frame in seconds (recorded; arrival time if None)
+
+        Returns:
+            Tuple of (is_fall, confidence_score, details)
+        """
+        if self.cascade_mode:
+            return self.detect_fall_cascade(video_frame, audio_data, sample_rate, stream_id, params, timestamp)
+
+        # Previous landmarks are tracked per stream so vertical movement can be measured
+        state = self._get_stream_state(stream_id)
+        recorder = self._recorders.get(stream_id)
+        timestamp = time.time() if timestamp is None else timestamp
+        frames = [(timestamp, video_frame)] if video_frame is not None else []
+        # Frames of one stream are processed in order even when requests run concurrently
+        with state.lock:
+            video_fall, video_confidence, state.prev_landmarks, posed = self._run_video_stage(
+                frames, state.prev_landmarks, record=recorder is not None)
+            audio_fall, audio_confidence, audio_features = self._run_audio_stage(audio_data, sample_rate)
+
+            if recorder is not None:
+                self._record(recorder, posed, audio_features, timestamp)
+
+        return self._fuse(video_fall, video_confidence, audio_fall, audio_confidence, params)
+
+    def detect_fall_from_landmarks(self, landmarks: Optional[np.ndarray], audio_features: Optional[np.ndarray] = None,
+                                   stream_id: str = "default",
+                                   params: Optional[Dict[str, float]] = None,
+                                   timestamp: Optional[float] = None) -> Tuple[bool, float, dict]:
+        """
+        Detect fall from pose landmarks and audio features computed elsewhere
+
+        Skips frame decoding, pose estimation and MFCC extraction, so it serves
+        replayed recordings and edge devices that run pose locally.
+
+        Args:
+            landmarks: Landmark array of shape (33, 4), or None if no pose was found
+            audio_features: Audio feature vector, or None
+            stream_id: Identifier of the camera/microphone stream
+            params: Per-user fusion weights and threshold (detector defaults if None)
+            timestamp: Capture time of the frame in seconds (recorded; arrival time if None)
+
         Returns:
             Tuple of (is_fall, confidence_score, details)
         """
+        state = self._get_stream_state(stream_id)
+
         video_fall = False
         video_confidence = 0.0
+        if landmarks is not None:
+            with state.lock:
+                video_fall, video_confidence = self.video_detector.is_fall_detected(
+                    landmarks, state.prev_landmarks)
+                state.prev_landmarks = landmarks
+
         audio_fall = False
         audio_confidence = 0.0
-        
-        # Video-based detection
-        if video_frame is not None and hasattr(self.video_detector, 'mp_pose') and self.video_detector.mp_pose is not None:
+        if audio_features is not None and self.audio_detector.is_trained:
             try:
-                pose_result = self.video_detector.detect_pose(video_frame)
-                if pose_result["visibility"]:
-                    # For simplicity, we're not tracking previous landmarks here
-                    # In a real implementation, you'd need to maintain state
-                    video_fall, video_confidence = self.video_detector.is_fall_detected(
-                        pose_result["landmarks"], None)
+                audio_fall, audio_confidence = self.audio_detector.detect_fall_from_features(audio_features)
             except Exception as e:
-                logger.error(f"Error in video fall detection: {str(e)}")
-        
-        # Audio-based detection
-        if audio_data is not None and hasattr(self.audio_detector, 'model') and self.audio_detector.model is not None:
+                logger.error(f"Error in audio fall detection: {str(e)}")
+
+        recorder = self._recorders.get(stream_id)
+        if recorder is not None:
+            timestamp = time.time() if timestamp is None else timestamp
+            with state.lock:
+                self._record(recorder, [(timestamp, landmarks)] if landmarks is not None else [],
+                             audio_features, timestamp)
+
+        return self._fuse(video_fall, video_confidence, audio_fall, audio_confidence, params)
+
+    def detect_fall_cascade(self, video_frame=None, audio_data=None, sample_rate: Optional[int] = None,
+                            stream_id: str = "default",
+                            params: Optional[Dict[str, float]] = None,
+                            timestamp: Optional[float] = None) -> Tuple[bool, float, dict]:
+        """
+        Detect fall with a cheap always-on gate that escalates to the full models
+
+        The gate scores frame-difference motion and audio energy onset. Only when
+        it crosses the suspicion threshold are the buffered frames around the
+        trigger (and the following frames) run through pose and audio classification.
+
+        Args:
+            video_frame: Video frame for pose analysis
+            audio_data: Audio data for sound analysis
+            sample_rate: Sample rate of the audio data
+            stream_id: Identifier of the camera/microphone stream
+            params: Per-user fusion weights and threshold (detector defaults if None)
+            timestamp: Capture time of the frame in seconds (recorded; arrival time if None)
+
+        Returns:
+            Tuple of (is_fall, confidence_score, details)
+        """
+        state = self._get_stream_state(stream_id)
+        timestamp = time.time() if timestamp is None else timestamp
+        # Frames of one stream are processed in order even when requests run concurrently
+        with state.lock:
+            stats = state.stats
+            stats.frames_total += 1
+
+            # Stage 1: cheap gate
+            gate_start = time.perf_counter()
+            motion_suspicion = 0.0
+            audio_suspicion = 0.0
+            if video_frame is not None:
+                motion_suspicion, state.prev_small = self.motion_gate.score(video_frame, state.prev_small)
+            if audio_data is not None:
+                audio_suspicion, state.audio_baseline_db = self.audio_gate.score(
+                    audio_data, state.audio_baseline_db)
+            suspicion = max(motion_suspicion, audio_suspicion)
+            stats.gate_seconds += time.perf_counter() - gate_start
+
+            cascade_details = {
+                "suspicion": suspicion,
+                "motion_suspicion": motion_suspicion,
+                "audio_suspicion": audio_suspicion
+            }
+
+            if state.escalation_remaining > 0:
+                # Still inside the window after a trigger: confirm every frame
+                state.escalation_remaining -= 1
+                frames = [(timestamp, video_frame)] if video_frame is not None else []
+                audio_chunks = [audio_data] if audio_data is not None else []
+                cascade_details["stage"] = "confirm"
+            elif suspicion >= self.CASCADE_SUSPICION_THRESHOLD:
+                # Gate fired: analyse the buffered window leading up to the trigger
+                stats.gate_triggers += 1
+                frames = list(state.frame_buffer) + ([(timestamp, video_frame)] if video_frame is not None else [])
+                audio_chunks = list(state.audio_buffer) + ([audio_data] if audio_data is not None else [])
+                state.frame_buffer.clear()
+                state.audio_buffer.clear()
+                state.prev_landmarks = None
+                state.escalation_remaining = self.CASCADE_POST_TRIGGER_FRAMES
+                cascade_details["stage"] = "escalate"
+            else:
+                if video_frame is not None:
+                    # Frames passed as views (e.g. shared memory slots) are reused by the caller
+                    state.frame_buffer.append(
+                        (timestamp, video_frame if video_frame.flags.owndata else video_frame.copy()))
+                if audio_data is not None:
+                    state.audio_buffer.append(audio_data)
+                cascade_details["stage"] = "gate"
+                is_fall, confidence, details = self._fuse(False, 0.0, False, 0.0, params)
+                details["cascade"] = cascade_details
+                return is_fall, confidence, details
+
+            # Stage 2: full-resolution pose and audio classifier
+            full_start = time.perf_counter()
+            recorder = self._recorders.get(stream_id)
+            video_fall, video_confidence, state.prev_landmarks, posed = self._run_video_stage(
+                frames, state.prev_landmarks, record=recorder is not None)
+            audio_window = np.concatenate(audio_chunks) if audio_chunks else None
+            audio_fall, audio_confidence, audio_features = self._run_audio_stage(audio_window, sample_rate)
+            stats.full_stage_seconds += time.perf_counter() - full_start
+            stats.full_stage_frames += max(len(frames), 1)
+
+            if recorder is not None:
+                self._record(recorder, posed, audio_features, timestamp)
+
+            is_fall, confidence, details = self._fuse(
+                video_fall, video_confidence, audio_fall, audio_confidence, params)
+            if is_fall:
+                stats.confirmed_falls += 1
+
+            cascade_details["window_frames"] = len(frames)
+            details["cascade"] = cascade_details
+            return is_fall, confidence, details
+
+    def after_fork(self):
+        """
+        Prepare a detector inherited from a pre-fork parent for use in a worker
+
+        Models and imported runtimes stay shared copy-on-write; only the pose
+        tracking graph (which owns threads) and the locks are recreated.
+        """
+        self.video_detector.reset_pose_model()
+        self._streams = OrderedDict()
+        self._streams_lock = threading.Lock()
+        self._recorders = {}
+
+    def get_cascade_stats(self, stream_id: Optional[str] = None) -> Dict[str, float]:
+        """
+        Get per-stage pass rates and compute savings of the cascade
+
+        Args:
+            stream_id: Stream to report on (all streams if None)
+
+        Returns:
+            Dictionary with cascade statistics
+        """
+        with self._streams_lock:
+            if stream_id is not None:
+                state = self._streams.get(stream_id)
+                return state.stats.to_dict() if state else CascadeStats().to_dict()
+
+            totals = CascadeStats()
+            totals.merge(self._evicted_stats)
+            for state in self._streams.values():
+                totals.merge(state.stats)
+            result = totals.to_dict()
+            result["streams"] = len(self._streams)
+            result["evicted_streams"] = self.evicted_streams
+            return result
+
+    def reset_stream(self, stream_id: str):
+        """
+        Drop the detector state kept for a stream
+
+        Args:
+            stream_id: Identifier of the stream
+        """
+        with self._streams_lock:
+            self._streams.pop(stream_id, None)
+
+    def start_recording(self, stream_id: str, directory: str) -> StreamRecorder:
+        """
+        Record landmarks and audio features of a stream for later replay
+
+        Args:
+            stream_id: Identifier of the stream
+            directory: Directory for the recording
+
+        Returns:
+            The stream recorder
+        """
+        self.stop_recording(stream_id)
+        recorder = StreamRecorder(directory, audio_feature_size=self.audio_detector.n_mfcc * 2)
+        self._recorders[stream_id] = recorder
+        logger.info(f"Recording stream {stream_id} to {directory}")
+        return recorder
+
+    def stop_recording(self, stream_id: str) -> bool:
+        """
+        Stop recording a stream
+
+        Args:
+            stream_id: Identifier of the stream
+
+        Returns:
+            True if the stream was being recorded
+        """
+        recorder = self._recorders.pop(stream_id, None)
+        if recorder is None:
+            return False
+        recorder.close()
+        return True
+
+    def _record(self, recorder: StreamRecorder, posed: List[Tuple[float, np.ndarray]],
+                audio_features: Optional[np.ndarray], timestamp: float):
+        """
+        Append the inputs of one detection call to a recording
+
+        Records carry the capture time of their frame, so replays keep the
+        capture cadence. Audio features are attached to the last frame of
+        the call so the replayed fusion sees the same video/audio pairing.
+
+        Args:
+            recorder: Recorder of the stream
+            posed: (capture time, landmark array) of the analysed frames
+            audio_features: Audio feature vector of the call, or None
+            timestamp: Capture time of the call's frame (used when no frame was posed)
+        """
+        try:
+            if not posed:
+                recorder.append(timestamp, None, audio_features)
+                return
+            for frame_timestamp, landmarks in posed[:-1]:
+                recorder.append(frame_timestamp, landmarks, None)
+            recorder.append(posed[-1][0], posed[-1][1], audio_features)
+        except Exception as e:
+            logger.error(f"Error recording stream: {str(e)}")
+
+    def _get_stream_state(self, stream_id: str) -> CascadeState:
+        """
+        Get or create the cascade state for a stream
+
+        Args:
+            stream_id: Identifier of the stream
+
+        Returns:
+            Cascade state for the stream
+        """
+        now = time.monotonic()
+        with self._streams_lock:
+            state = self._streams.get(stream_id)
+            if state is None:
+                self._evict_streams(now)
+                state = CascadeState(self.CASCADE_PRE_TRIGGER_FRAMES)
+                self._streams[stream_id] = state
+            else:
+                self._streams.move_to_end(stream_id)
+            state.last_seen = now
+            return state
+
+    def _evict_streams(self, now: float):
+        """
+        Drop expired streams and make room for one more (call with the streams lock held)
+
+        Args:
+            now: Monotonic time
+        """
+        while self._streams:
+            stream_id, oldest = next(iter(self._streams.items()))
+            if len(self._streams) < self.max_streams and now - oldest.last_seen <= self.stream_ttl:
+                break
+            del self._streams[stream_id]
+            self._evicted_stats.merge(oldest.stats)
+            self.evicted_streams += 1
+
+    def _run_video_stage(self, frames: List[Tuple[float, np.ndarray]], prev_landmarks,
+                         record: bool = False) -> Tuple[bool, float, object, List[Tuple[float, np.ndarray]]]:
+        """
+        Run pose analysis over a sequence of frames
+
+        Args:
+            frames: (capture time, frame) pairs to analyse, oldest first
+            prev_landmarks: Landmarks from the frame preceding the sequence
+            record: Collect landmark arrays of the posed frames
+
+        Returns:
+            Tuple of (is_fall, highest confidence, landmarks of the last posed frame,
+            (capture time, landmark array) pairs if recording)
+        """
+        video_fall = False
+        video_confidence = 0.0
+        posed = []
+
+        if not frames or getattr(self.video_detector, 'mp_pose', None) is None:
+            return video_fall, video_confidence, prev_landmarks, posed
+
+        for frame_timestamp, frame in frames:
             try:
-                audio_fall, audio_confidence = self.audio_detector.detect_fall_sound(audio_data)
+                pose_result = self.video_detector.detect_pose(frame)
+                if pose_result["visibility"]:
+                    frame_fall, frame_confidence = self.video_detector.is_fall_detected(
+                        pose_result["landmarks"], prev_landmarks)
+                    video_fall = video_fall or frame_fall
+                    video_confidence = max(video_confidence, frame_confidence)
+                    prev_landmarks = pose_result["landmarks"]
+                    if record:
+                        posed.append((frame_timestamp, self.video_detector.landmarks_to_array(prev_landmarks)))
             except Exception as e:
-                logger.error(f"Error in audio fall detection: {str(e)}")
-        
-        # Combine results using weighted average
+                logger.error(f"Error in video fall detection: {str(e)}")
+
+        return video_fall, video_confidence, prev_landmarks, posed
+
+    def _run_audio_stage(self, audio_data, sample_rate: Optional[int]) -> Tuple[bool, float, Optional[np.ndarray]]:
+        """
+        Run the audio classifier over an audio window
+
+        Args:
+            audio_data: Audio signal data
+            sample_rate: Sample rate of the audio (detector default if None)
+
+        Returns:
+            Tuple of (is_fall, confidence_score, extracted features or None)
+        """
+        if audio_data is None or getattr(self.audio_detector, 'model', None) is None:
+            return False, 0.0, None
+
+        if not self.audio_detector.is_trained:
+            return False, 0.0, None
+
+        try:
+            features = self.audio_detector.extract_features(
+                audio_data, sample_rate or self.audio_detector.sample_rate)
+            if features.size == 0:
+                return False, 0.0, None
+            audio_fall, audio_confidence = self.audio_detector.detect_fall_from_features(features)
+            return audio_fall, audio_confidence, features
+        except Exception as e:
+            logger.error(f"Error in audio fall detection: {str(e)}")
+            return False, 0.0, None
+
+    @metrics.timed("hybrid_detector", "fusion")
+    def _fuse(self, video_fall: bool, video_confidence: float, audio_fall: bool,
+              audio_confidence: float, params: Optional[Dict[str, float]] = None) -> Tuple[bool, float, dict]:
+        """
+        Combine video and audio results using a weighted average
+
+        Args:
+            video_fall: Video detector decision
+            video_confidence: Video detector confidence
+            audio_fall: Audio detector decision
+            audio_confidence: Audio detector confidence
+            params: Per-user fusion weights and threshold (detector defaults if None)
+
+        Returns:
+            Tuple of (is_fall, confidence_score, details)
+        """
+        video_weight = params["video_weight"] if params else self.VIDEO_WEIGHT
+        audio_weight = params["audio_weight"] if params else self.AUDIO_WEIGHT
+        threshold = params["threshold"] if params else self.HYBRID_THRESHOLD
+
         hybrid_confidence = (
-            self.VIDEO_WEIGHT * video_confidence + 
-            self.AUDIO_WEIGHT * audio_confidence
+            video_weight * video_confidence +
+            audio_weight * audio_confidence
         )
-        
+
         # Determine if fall is detected based on hybrid threshold
-        is_fall = hybrid_confidence >= self.HYBRID_THRESHOLD
-        
+        is_fall = hybrid_confidence >= threshold
+
         details = {
             "video_fall": video_fall,
             "video_confidence": video_confidence,
             "audio_fall": audio_fall,
             "audio_confidence": audio_confidence,
-            "hybrid_confidence": hybrid_confidence
+            "hybrid_confidence": hybrid_confidence,
+            "threshold": threshold,
+            "calibrated": params is not None
         }
-        
+
         return is_fall, hybrid_confidence, details
 
     def update_audio_model(self, audio_samples, labels):
         """
         Update the audio detection model with new samples
-        
+
         Args:
             audio_samples: List of audio samples
             labels: Corresponding labels for the samples
@@ -95,4 +496,8 @@ if __name__ == "__main__":
     detector = HybridFallDetector()
     # For testing (uncomment to use)
     # is_fall, confidence, details = detector.detect_fall()
-    # print(f"Fall detected: {is_fall}, Confidence: {confidence}")
\ No newline at end of file
+    # print(f"Fall detected: {is_fall}, Confidence: {confidence}")
+
+    # Cascade mode reports how much full-model compute the gate saved
+    # cascade_detector = HybridFallDetector(cascade_mode=True)
+    # print(cascade_detector.get_cascade_stats())
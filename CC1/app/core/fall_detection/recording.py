@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RECORDING_FORMAT_VERSION = 1
+LANDMARK_SHAPE = (33, 4)  # MediaPipe pose: x, y, z, visibility
+INDEX_FILE = "index.json"
+
+class StreamRecorder:
+    def __init__(self, directory: str, audio_feature_size: int = 26,
+                 segment_frames: int = 4096, flush_every: int = 64):
+        """
+        Initialize an append-only recorder of per-frame detector inputs
+
+        Records are stored in fixed-size NumPy memmap segments (timestamps,
+        landmarks and audio features) plus a JSON index. The index only counts
+        flushed records, so a crash never exposes a partially written frame.
+        Missing landmarks or audio features are stored as NaN.
+
+        Args:
+            directory: Directory for the recording (created if missing)
+            audio_feature_size: Length of the audio feature vector
+            segment_frames: Records per memmap segment
+            flush_every: Records between index updates
+        """
+        self.directory = directory
+        self.audio_feature_size = audio_feature_size
+        self.segment_frames = segment_frames
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._segments: List[Dict] = []
+        self._current = None
+        self._position = 0
+        self._unflushed = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            # Continue an existing recording in a fresh segment
+            with open(index_path) as f:
+                index = json.load(f)
+            self._segments = index["segments"]
+            self.audio_feature_size = index["audio_feature_size"]
+
+        logger.info(f"StreamRecorder writing to {directory}")
+
+    def append(self, timestamp: float, landmarks: Optional[np.ndarray] = None,
+               audio_features: Optional[np.ndarray] = None):
+        """
+        Append one frame record
+
+        Args:
+            timestamp: Capture time of the frame (seconds)
+            landmarks: Landmark array of shape (33, 4), or None if no pose was found
+            audio_features: Audio feature vector, or None if no audio was analysed
+        """
+        with self._lock:
+            if self._current is None or self._position >= self.segment_frames:
+                self._open_segment()
+
+            timestamps, landmark_map, audio_map = self._current
+            timestamps[self._position] = timestamp
+            landmark_map[self._position] = np.nan if landmarks is None else landmarks
+            audio_map[self._position] = np.nan if audio_features is None else audio_features
+
+            self._position += 1
+            self._segments[-1]["count"] = self._position
+            self._unflushed += 1
+
+            if self._position >= self.segment_frames or self._unflushed >= self.flush_every:
+                self._flush()
+
+    def close(self):
+        """
+        Flush pending records and release the current segment
+        """
+        with self._lock:
+            if self._current is not None:
+                self._flush()
+                self._current = None
+
+    def _open_segment(self):
+        if self._current is not None:
+            self._flush()
+
+        name = f"seg-{len(self._segments):05d}"
+        base = os.path.join(self.directory, name)
+        self._current = (
+            open_memmap(f"{base}.timestamps.npy", mode="w+", dtype=np.float64,
+                        shape=(self.segment_frames,)),
+            open_memmap(f"{base}.landmarks.npy", mode="w+", dtype=np.float32,
+                        shape=(self.segment_frames,) + LANDMARK_SHAPE),
+            open_memmap(f"{base}.audio.npy", mode="w+", dtype=np.float32,
+                        shape=(self.segment_frames, self.audio_feature_size))
+        )
+        self._position = 0
+        self._segments.append({"name": name, "count": 0})
+
+    def _flush(self):
+        for array in self._current:
+            array.flush()
+
+        index = {
+            "version": RECORDING_FORMAT_VERSION,
+            "landmark_shape": list(LANDMARK_SHAPE),
+            "audio_feature_size": self.audio_feature_size,
+            "segments": self._segments
+        }
+
+        # Atomic replace so readers never see a torn index
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+        self._unflushed = 0
+
+class StreamReplayer:
+    def __init__(self, directory: str):
+        """
+        Initialize a replayer for a recording made by StreamRecorder
+
+        Args:
+            directory: Directory of the recording
+        """
+        self.directory = directory
+
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            self.index = json.load(f)
+
+        if self.index["version"] != RECORDING_FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording format version {self.index['version']}")
+
+    def __len__(self) -> int:
+        return sum(segment["count"] for segment in self.index["segments"])
+
+    def __iter__(self) -> Iterator[Tuple[float, Optional[np.ndarray], Optional[np.ndarray]]]:
+        """
+        Iterate over records in capture order
+
+        Yields:
+            Tuple of (timestamp, landmarks or None, audio features or None)
+        """
+        for segment in self.index["segments"]:
+            count = segment["count"]
+            if count == 0:
+                continue
+
+            base = os.path.join(self.directory, segment["name"])
+            timestamps = np.load(f"{base}.timestamps.npy", mmap_mode="r")
+            landmarks = np.load(f"{base}.landmarks.npy", mmap_mode="r")
+            audio = np.load(f"{base}.audio.npy", mmap_mode="r")
+
+            for i in range(count):
+                frame_landmarks = landmarks[i]
+                frame_audio = audio[i]
+                yield (
+                    float(timestamps[i]),
+                    None if np.isnan(frame_landmarks[0, 0]) else frame_landmarks,
+                    None if np.isnan(frame_audio[0]) else frame_audio
+                )
+
+    def replay(self, detector, realtime: bool = False, stream_id: str = "replay",
+               params: Optional[Dict[str, float]] = None) -> Dict:
+        """
+        Feed the recording through a detector's landmark pipeline
+
+        Args:
+            detector: HybridFallDetector (or anything with detect_fall_from_landmarks)
+            realtime: Pace records by their original timestamps instead of max speed
+            stream_id: Stream identifier used for detector state
+            params: Per-user fusion weights and threshold
+
+        Returns:
+            Dictionary with per-frame confidences, fall frames and throughput
+        """
+        detector.reset_stream(stream_id)
+
+        confidences = []
+        fall_frames = []
+        first_timestamp = None
+        start = time.perf_counter()
+
+        for frame_index, (timestamp, landmarks, audio_features) in enumerate(self):
+            if realtime:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                delay = (timestamp - first_timestamp) - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            is_fall, confidence, _ = detector.detect_fall_from_landmarks(
+                landmarks, audio_features, stream_id=stream_id, params=params)
+            confidences.append(confidence)
+            if is_fall:
+                fall_frames.append(frame_index)
+
+        elapsed = time.perf_counter() - start
+        detector.reset_stream(stream_id)
+
+        return {
+            "frames": len(confidences),
+            "fall_frames": fall_frames,
+            "confidences": confidences,
+            "elapsed_seconds": elapsed,
+            "frames_per_second": len(confidences) / elapsed if elapsed > 0 else 0.0
+        }
@@ -2,6 +2,9 @@ import cv2
 import numpy as np
 from typing import List, Tuple
 import logging
+import threading
+
+from app.core.metrics import metrics
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -36,13 +39,7 @@ class VideoFallDetector:
             try:
                 self.mp_pose = mp.solutions.pose
                 self.mp_drawing = mp.solutions.drawing_utils
-                self.pose = self.mp_pose.Pose(
-                    static_image_mode=False,
-                    model_complexity=1,
-                    enable_segmentation=False,
-                    min_detection_confidence=0.5,
-                    min_tracking_confidence=0.5
-                )
+                self.pose = self._create_pose_model()
                 logger.info("MediaPipe Pose model initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize MediaPipe Pose model: {e}")
@@ -51,6 +48,8 @@ class VideoFallDetector:
             self.mp_drawing = None
             self.pose = None
         
+        self._pose_lock = threading.Lock()
+        
         # Fall detection parameters
         self.FALL_THRESHOLD = 0.7  # Threshold for fall detection confidence
         self.VERTICAL_CHANGE_THRESHOLD = 0.3  # Significant vertical movement threshold
@@ -58,6 +57,30 @@ class VideoFallDetector:
         
         logger.info("VideoFallDetector initialized")
 
+    def _create_pose_model(self):
+        """
+        Create the MediaPipe Pose tracking graph
+        
+        Returns:
+            MediaPipe Pose instance
+        """
+        return self.mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=1,
+            enable_segmentation=False,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def reset_pose_model(self):
+        """
+        Rebuild the Pose graph, e.g. in a forked worker where the graph's
+        threads from the parent process no longer exist
+        """
+        self._pose_lock = threading.Lock()
+        if getattr(self, "mp_pose", None) is not None:
+            self.pose = self._create_pose_model()
+
     def detect_pose(self, frame: np.ndarray) -> dict:
         """
         Detect human pose in the given frame using MediaPipe
@@ -76,10 +99,12 @@ class VideoFallDetector:
             }
         
         # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with metrics.stage("video_detector", "bgr_to_rgb"):
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         
-        # Process the frame
-        results = self.pose.process(rgb_frame)
+        # Process the frame (the tracking graph is not safe for concurrent calls)
+        with self._pose_lock, metrics.stage("video_detector", "pose_process"):
+            results = self.pose.process(rgb_frame)
         
         pose_data = {
             "landmarks": None,
@@ -92,49 +117,72 @@ class VideoFallDetector:
             
         return pose_data
 
+    @staticmethod
+    def landmarks_to_array(landmarks) -> np.ndarray:
+        """
+        Convert pose landmarks to a (33, 4) array of x, y, z and visibility
+        
+        Args:
+            landmarks: MediaPipe pose landmarks or an existing landmark array
+            
+        Returns:
+            Landmark array (float32)
+        """
+        if isinstance(landmarks, np.ndarray):
+            return landmarks
+        
+        return np.array(
+            [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmark],
+            dtype=np.float32
+        )
+
     def calculate_vertical_movement(self, landmarks, prev_landmarks) -> float:
         """
         Calculate vertical movement between frames
         
         Args:
-            landmarks: Current frame landmarks
-            prev_landmarks: Previous frame landmarks
+            landmarks: Current frame landmarks (MediaPipe or (33, 4) array)
+            prev_landmarks: Previous frame landmarks (MediaPipe or (33, 4) array)
             
         Returns:
             Vertical movement value
         """
-        if not prev_landmarks:
+        if prev_landmarks is None:
             return 0.0
             
+        current = self.landmarks_to_array(landmarks)
+        prev = self.landmarks_to_array(prev_landmarks)
+        
         # Get hip positions (landmark indices 23 and 24)
-        current_hip_y = (landmarks.landmark[23].y + landmarks.landmark[24].y) / 2
-        prev_hip_y = (prev_landmarks.landmark[23].y + prev_landmarks.landmark[24].y) / 2
+        current_hip_y = (current[23, 1] + current[24, 1]) / 2
+        prev_hip_y = (prev[23, 1] + prev[24, 1]) / 2
         
         # Calculate vertical change
         vertical_change = abs(current_hip_y - prev_hip_y)
-        return vertical_change
+        return float(vertical_change)
 
     def calculate_body_angles(self, landmarks) -> List[float]:
         """
         Calculate key body angles for fall detection
         
         Args:
-            landmarks: Pose landmarks
+            landmarks: Pose landmarks (MediaPipe or (33, 4) array)
             
         Returns:
             List of calculated angles
         """
         angles = []
+        points = self.landmarks_to_array(landmarks)
         
         # Calculate torso angle (between shoulders and hips)
         shoulder_midpoint = (
-            (landmarks.landmark[11].x + landmarks.landmark[12].x) / 2,
-            (landmarks.landmark[11].y + landmarks.landmark[12].y) / 2
+            (points[11, 0] + points[12, 0]) / 2,
+            (points[11, 1] + points[12, 1]) / 2
         )
         
         hip_midpoint = (
-            (landmarks.landmark[23].x + landmarks.landmark[24].x) / 2,
-            (landmarks.landmark[23].y + landmarks.landmark[24].y) / 2
+            (points[23, 0] + points[24, 0]) / 2,
+            (points[23, 1] + points[24, 1]) / 2
         )
         
         # Calculate angle with vertical axis
@@ -143,22 +191,23 @@ class VideoFallDetector:
         
         if delta_y != 0:
             angle = np.degrees(np.arctan(delta_x / delta_y))
-            angles.append(abs(angle))
+            angles.append(float(abs(angle)))
         
         return angles
 
+    @metrics.timed("video_detector", "features")
     def is_fall_detected(self, landmarks, prev_landmarks) -> Tuple[bool, float]:
         """
         Determine if a fall is detected based on pose analysis
         
         Args:
-            landmarks: Current frame landmarks
-            prev_landmarks: Previous frame landmarks
+            landmarks: Current frame landmarks (MediaPipe or (33, 4) array)
+            prev_landmarks: Previous frame landmarks (MediaPipe or (33, 4) array)
             
         Returns:
             Tuple of (is_fall, confidence_score)
         """
-        if not MEDIAPIPE_AVAILABLE or not landmarks or not prev_landmarks:
+        if landmarks is None or prev_landmarks is None:
             return False, 0.0
             
         # Calculate vertical movement
@@ -0,0 +1,112 @@
+import struct
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# Binary frame message layout (network byte order):
+#   version    uint8   PROTOCOL_VERSION
+#   kind       uint8   KIND_* payload type
+#   id_length  uint16  length of the UTF-8 stream id
+#   timestamp  float64 capture time in seconds
+#   stream_id  bytes[id_length]
+#   payload    remaining bytes
+HEADER = struct.Struct("!BBHd")
+PROTOCOL_VERSION = 1
+
+KIND_JPEG = 1
+KIND_LANDMARKS = 2
+
+# Landmark payloads are little-endian (33, 4) arrays of x, y, z and visibility,
+# as float32 (528 bytes) or float16 (264 bytes); an empty payload means no pose
+LANDMARK_SHAPE = (33, 4)
+LANDMARK_DTYPES = {528: np.dtype("<f4"), 264: np.dtype("<f2")}  # Payload size -> dtype
+
+class FrameMessage(NamedTuple):
+    kind: int
+    stream_id: str
+    timestamp: float
+    payload: bytes
+
+def encode_frame_message(stream_id: str, timestamp: float, payload: bytes, kind: int = KIND_JPEG) -> bytes:
+    """
+    Encode a binary frame message for the detection stream WebSocket
+
+    Args:
+        stream_id: Identifier of the camera stream
+        timestamp: Capture time of the frame (seconds)
+        payload: Frame payload (e.g. JPEG bytes)
+        kind: Payload type
+
+    Returns:
+        Encoded message
+    """
+    stream_bytes = stream_id.encode("utf-8")
+    return HEADER.pack(PROTOCOL_VERSION, kind, len(stream_bytes), timestamp) + stream_bytes + payload
+
+def decode_frame_message(data: bytes) -> FrameMessage:
+    """
+    Decode a binary frame message
+
+    Args:
+        data: Raw WebSocket binary message
+
+    Returns:
+        Decoded frame message
+
+    Raises:
+        ValueError: If the message is truncated or has an unsupported version
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Frame message shorter than header")
+
+    version, kind, id_length, timestamp = HEADER.unpack_from(data)
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported frame protocol version {version}")
+
+    payload_start = HEADER.size + id_length
+    if len(data) < payload_start:
+        raise ValueError("Frame message truncated in stream id")
+
+    stream_id = data[HEADER.size:payload_start].decode("utf-8")
+    return FrameMessage(kind, stream_id, timestamp, data[payload_start:])
+
+def encode_landmarks(landmarks: Optional[np.ndarray], half_precision: bool = False) -> bytes:
+    """
+    Encode a landmark array as a KIND_LANDMARKS payload
+
+    Args:
+        landmarks: Array of shape (33, 4), or None if no pose was found
+        half_precision: Send float16 instead of float32 (half the size)
+
+    Returns:
+        Payload bytes
+    """
+    if landmarks is None:
+        return b""
+    return np.asarray(landmarks).astype("<f2" if half_precision else "<f4", copy=False).tobytes()
+
+def decode_landmarks(payload: bytes) -> Optional[np.ndarray]:
+    """
+    Decode a KIND_LANDMARKS payload, inferring the precision from its size
+
+    Args:
+        payload: Payload bytes
+
+    Returns:
+        Landmark array of shape (33, 4) as float32, or None if no pose was found
+
+    Raises:
+        ValueError: If the payload is not a float16 or float32 landmark array
+    """
+    if not payload:
+        return None
+
+    dtype = LANDMARK_DTYPES.get(len(payload))
+    if dtype is None:
+        raise ValueError(f"Landmark payload must be {' or '.join(map(str, sorted(LANDMARK_DTYPES)))} bytes, "
+                         f"got {len(payload)}")
+
+    landmarks = np.frombuffer(payload, dtype=dtype).reshape(LANDMARK_SHAPE).astype(np.float32)
+    if not np.isfinite(landmarks).all():
+        raise ValueError("Landmark payload contains non-finite values")
+    return landmarks
@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class Incident:
+    def __init__(self, user_id: int, confidence: float, now: float):
+        """
+        Initialize an incident opened by a positive detection
+
+        Args:
+            user_id: ID of the user
+            confidence: Confidence of the first positive detection
+            now: Monotonic time of the first positive detection
+        """
+        self.user_id = user_id
+        self.alert_id: Optional[int] = None
+        self.first_seen = now
+        self.last_seen = now
+        self.peak_confidence = confidence
+        self.positive_frames = 1
+        self.peak_pending = False  # Peak raised before the alert row existed
+
+    def to_dict(self) -> Dict:
+        """
+        Serialize the incident for API responses
+
+        Returns:
+            Dictionary with incident information
+        """
+        return {
+            "user_id": self.user_id,
+            "alert_id": self.alert_id,
+            "peak_confidence": self.peak_confidence,
+            "positive_frames": self.positive_frames,
+            "duration_seconds": round(self.last_seen - self.first_seen, 3)
+        }
+
+class IncidentManager:
+    def __init__(self, cooldown_seconds: float = 120.0):
+        """
+        Initialize the per-user incident state machine
+
+        A user is either idle or has one active incident. Positive detections
+        while an incident is active are coalesced into it; the incident closes
+        when no positive has been seen for the cooldown window or when its
+        alert is resolved.
+
+        Args:
+            cooldown_seconds: Quiet period after which a new positive opens a new incident
+        """
+        self.cooldown_seconds = cooldown_seconds
+        self._incidents: Dict[int, Incident] = {}
+        self._lock = threading.Lock()
+        self.suppressed_positives = 0
+        logger.info(f"IncidentManager initialized (cooldown: {cooldown_seconds}s)")
+
+    def observe(self, user_id: int, confidence: float, now: Optional[float] = None) -> Tuple[Incident, bool, bool]:
+        """
+        Record a positive detection for a user
+
+        Args:
+            user_id: ID of the user
+            confidence: Detection confidence
+            now: Monotonic timestamp (defaults to the current time)
+
+        Returns:
+            Tuple of (incident, is_new_incident, peak_confidence_raised)
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            incident = self._incidents.get(user_id)
+
+            if incident is None or now - incident.last_seen > self.cooldown_seconds:
+                incident = Incident(user_id, confidence, now)
+                self._incidents[user_id] = incident
+                return incident, True, False
+
+            incident.last_seen = now
+            incident.positive_frames += 1
+            self.suppressed_positives += 1
+
+            peak_raised = confidence > incident.peak_confidence
+            if peak_raised:
+                incident.peak_confidence = confidence
+                if incident.alert_id is None:
+                    incident.peak_pending = True
+
+            return incident, False, peak_raised
+
+    def attach_alert(self, user_id: int, alert_id: int) -> Optional[Incident]:
+        """
+        Link the alert created for a new incident
+
+        Args:
+            user_id: ID of the user
+            alert_id: ID of the alert row
+
+        Returns:
+            The incident if its peak was raised before the alert existed, otherwise None
+        """
+        with self._lock:
+            incident = self._incidents.get(user_id)
+            if incident is None:
+                return None
+
+            incident.alert_id = alert_id
+            if incident.peak_pending:
+                incident.peak_pending = False
+                return incident
+            return None
+
+    def discard(self, user_id: int):
+        """
+        Drop an incident whose downstream work failed, so the next positive retries
+
+        Args:
+            user_id: ID of the user
+        """
+        with self._lock:
+            self._incidents.pop(user_id, None)
+
+    def resolve(self, user_id: int, alert_id: Optional[int] = None) -> bool:
+        """
+        Close a user's active incident
+
+        Args:
+            user_id: ID of the user
+            alert_id: Only close the incident if it belongs to this alert
+
+        Returns:
+            True if an incident was closed
+        """
+        with self._lock:
+            incident = self._incidents.get(user_id)
+            if incident is None or (alert_id is not None and incident.alert_id != alert_id):
+                return False
+
+            del self._incidents[user_id]
+            logger.info(f"Incident for user {user_id} resolved after {incident.positive_frames} positive frames")
+            return True
+
+    def is_active(self, user_id: int, now: Optional[float] = None) -> bool:
+        """
+        Check whether a user has an incident inside its cooldown window
+
+        An incident past its cooldown is dropped here, so a user whose fall
+        went quiet is treated as idle again.
+
+        Args:
+            user_id: ID of the user
+            now: Monotonic timestamp (defaults to the current time)
+
+        Returns:
+            True if the user has an active incident
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            incident = self._incidents.get(user_id)
+            if incident is None:
+                return False
+            if now - incident.last_seen > self.cooldown_seconds:
+                del self._incidents[user_id]
+                return False
+            return True
+
+    def get_incident(self, user_id: int) -> Optional[Dict]:
+        """
+        Get a user's current incident
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            Incident dictionary, or None if the user is idle
+        """
+        with self._lock:
+            incident = self._incidents.get(user_id)
+            return incident.to_dict() if incident else None
+
+    def get_active_incidents(self, now: Optional[float] = None) -> List[Dict]:
+        """
+        Get incidents still inside their cooldown window
+
+        Args:
+            now: Monotonic timestamp (defaults to the current time)
+
+        Returns:
+            List of incident dictionaries
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            expired = [
+                user_id for user_id, incident in self._incidents.items()
+                if now - incident.last_seen > self.cooldown_seconds
+            ]
+            for user_id in expired:
+                del self._incidents[user_id]
+
+            return [incident.to_dict() for incident in self._incidents.values()]
+
+# Global incident manager instance
+incident_manager = IncidentManager(float(os.getenv("INCIDENT_COOLDOWN_SECONDS", "120")))
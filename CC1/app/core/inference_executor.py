@@ -0,0 +1,250 @@
+import asyncio
+import functools
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.admission import PRIORITY_CRITICAL, PRIORITY_ROUTINE
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the inference executor has no free worker or queue slot"""
+
+class InferenceExecutor:
+    def __init__(self, max_workers: int = 2, max_queue: int = 8, critical_reserve: int = 4):
+        """
+        Initialize a bounded executor for decoding and inference work
+
+        At most max_workers jobs run at once and at most max_queue more wait
+        for a worker; further routine submissions are rejected instead of piling
+        up behind slow frames. Critical jobs may use critical_reserve slots that
+        routine work cannot fill, and a free worker always takes the oldest
+        critical job before any routine one.
+
+        Args:
+            max_workers: Number of worker threads
+            max_queue: Number of jobs allowed to wait for a worker
+            critical_reserve: Extra slots only critical jobs may take
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.critical_reserve = critical_reserve
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0  # Running plus queued jobs
+        self._jobs: List[Tuple[int, int, Future, Callable[[], Any]]] = []  # Heap of jobs not started yet
+        self._queue_waits: Deque[float] = deque(maxlen=1000)
+        self._waiting: Dict[int, float] = {}  # Ticket -> submit time of jobs not started yet
+        self._next_ticket = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        logger.info(f"InferenceExecutor initialized ({max_workers} workers, queue limit {max_queue}, "
+                    f"{critical_reserve} reserved for critical jobs)")
+
+    async def run(self, fn: Callable[..., Any], *args, priority: str = PRIORITY_ROUTINE, **kwargs) -> Any:
+        """
+        Run a blocking function on the executor without blocking the event loop
+
+        Args:
+            fn: Function to run
+            *args: Positional arguments for the function
+            priority: PRIORITY_CRITICAL or PRIORITY_ROUTINE
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            The function's return value
+
+        Raises:
+            ExecutorSaturatedError: If all workers are busy and the queue is full
+        """
+        limit = self.max_workers + self.max_queue
+        if priority == PRIORITY_CRITICAL:
+            limit += self.critical_reserve
+        future: Future = Future()
+
+        with self._lock:
+            if self._pending >= limit:
+                self.rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Inference queue full ({self._pending} jobs pending)")
+            self._pending += 1
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            submitted = time.perf_counter()
+            self._waiting[ticket] = submitted
+            rank = 0 if priority == PRIORITY_CRITICAL else 1
+            heapq.heappush(self._jobs, (rank, ticket, future, functools.partial(fn, *args, **kwargs)))
+
+        # The slot is freed when the job finishes or is cancelled before starting,
+        # not when the awaiting coroutine goes away while the job still runs
+        future.add_done_callback(lambda f: self._job_done(ticket, f))
+        self._executor.submit(self._run_next)
+        return await asyncio.wrap_future(future)
+
+    def _run_next(self):
+        """
+        Run the highest priority job waiting (one call is submitted per job)
+        """
+        with self._lock:
+            if not self._jobs:
+                return
+            _, ticket, future, call = heapq.heappop(self._jobs)
+            submitted = self._waiting.pop(ticket, None)
+
+        if not future.set_running_or_notify_cancel():
+            return  # Cancelled while queued
+        if submitted is not None:
+            self._queue_waits.append(time.perf_counter() - submitted)
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _job_done(self, ticket: int, future: Future):
+        """
+        Release the slot of a finished or cancelled job
+
+        Args:
+            ticket: Ticket of the job
+            future: Future of the job
+        """
+        with self._lock:
+            self._waiting.pop(ticket, None)
+            self._pending -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            else:
+                self.completed += 1
+
+    def queue_latency(self) -> float:
+        """
+        Get how long the oldest job still waiting for a worker has been queued
+
+        Returns:
+            Seconds (0.0 if no job is waiting)
+        """
+        with self._lock:
+            # Dicts keep insertion order, so the first entry is the oldest submission
+            oldest = next(iter(self._waiting.values()), None)
+        return time.perf_counter() - oldest if oldest is not None else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get executor occupancy and queue wait statistics
+
+        Returns:
+            Dictionary with executor statistics
+        """
+        with self._lock:
+            pending = self._pending
+        waits = sorted(self._queue_waits)
+
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": min(pending, self.max_workers),
+            "queued": max(pending - self.max_workers, 0),
+            "critical_reserve": self.critical_reserve,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "queue_latency_ms": round(self.queue_latency() * 1000, 2),
+            "queue_wait_p50_ms": round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0,
+            "queue_wait_p99_ms": round(waits[int(len(waits) * 0.99)] * 1000, 2) if waits else 0.0
+        }
+
+    def shutdown(self):
+        """
+        Stop the worker threads after running jobs finish
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            jobs, self._jobs = self._jobs, []
+        for _, _, future, _ in jobs:
+            future.cancel()
+
+class EventLoopLagMonitor:
+    def __init__(self, interval: float = 0.5, window: int = 600):
+        """
+        Initialize a monitor that measures how late the event loop wakes up
+
+        A coroutine sleeps for a fixed interval; any extra delay before it runs
+        again is time the loop spent blocked by other work.
+
+        Args:
+            interval: Seconds between measurements
+            window: Number of recent measurements kept for percentiles
+        """
+        self.interval = interval
+        self._lags: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.max_lag = 0.0
+
+    def start(self):
+        """
+        Start measuring on the running event loop
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop measuring
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """
+        Measurement loop
+        """
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - expected, 0.0)
+            self._lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > 0.1:
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get event loop lag statistics over the recent window
+
+        Returns:
+            Dictionary with lag statistics in milliseconds
+        """
+        lags = sorted(self._lags)
+        if not lags:
+            return {"samples": 0, "last_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        return {
+            "samples": len(lags),
+            "last_ms": round(self._lags[-1] * 1000, 2),
+            "p50_ms": round(lags[len(lags) // 2] * 1000, 2),
+            "p99_ms": round(lags[int(len(lags) * 0.99)] * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2)
+        }
+
+# Global instances shared by the detection endpoints
+inference_executor = InferenceExecutor(
+    int(os.getenv("DETECTION_WORKERS", "2")),
+    int(os.getenv("DETECTION_QUEUE_LIMIT", "8")),
+    int(os.getenv("DETECTION_CRITICAL_RESERVE", "4")))
+loop_lag_monitor = EventLoopLagMonitor(float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.5")))
@@ -0,0 +1,805 @@
+"""
+Dedicated inference server process shared by the API workers
+
+Workers connect over a local socket and pass frame pixels through slots of a
+shared memory block they own; only slot index, shape and stream metadata
+cross the socket, and the server hands a view of the slot to the detector.
+Requests from all workers are processed in micro-batches with one reply per
+worker per batch. MediaPipe Pose has no batched API, so frames in a batch
+still run through the pose graph one at a time.
+
+Requests are pickled, so the server only listens on a Unix socket or a
+loopback address (frames travel through local shared memory anyway) and
+refuses to start without an explicit INFERENCE_SERVER_AUTHKEY.
+
+Run from the CC1 directory:
+    INFERENCE_SERVER_AUTHKEY=<secret> python -m app.core.inference_server --address /tmp/careconnect-inference.sock
+"""
+
+import argparse
+import ipaddress
+import itertools
+import logging
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = "/tmp/careconnect-inference.sock"
+DEFAULT_SLOT_BYTES = 1280 * 720 * 3  # One 720p BGR frame
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 5.0
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """
+    Parse a server address
+
+    Args:
+        address: Unix socket path, or "host:port" for TCP
+
+    Returns:
+        Address accepted by multiprocessing.connection
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return host, int(port)
+    return address
+
+def check_authkey(authkey: Optional[bytes]) -> bytes:
+    """
+    Make sure a connection key was configured
+
+    Args:
+        authkey: Key from the caller (INFERENCE_SERVER_AUTHKEY)
+
+    Returns:
+        The key
+
+    Raises:
+        ValueError: If no key was given
+    """
+    if not authkey:
+        raise ValueError("The inference server requires an authkey (set INFERENCE_SERVER_AUTHKEY)")
+    return authkey
+
+def check_local_address(address: Union[str, Tuple[str, int]]):
+    """
+    Make sure the server only listens locally
+
+    Args:
+        address: Parsed server address
+
+    Raises:
+        ValueError: If a TCP address is not a loopback address
+    """
+    if isinstance(address, str):
+        return
+    host = address[0]
+    try:
+        local = host == "localhost" or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        local = False
+    if not local:
+        raise ValueError(f"The inference server only listens on a Unix socket or a loopback address, not {host}")
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a shared memory block owned by another process
+
+    The block's creator unlinks it; the attaching side must not, so it is
+    kept out of this process's resource tracker.
+
+    Args:
+        name: Name of the shared memory block
+
+    Returns:
+        Attached shared memory block
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track parameter
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+class _ClientConnection:
+    def __init__(self, conn: Connection, shm: shared_memory.SharedMemory, slot_bytes: int):
+        """
+        Initialize the server-side state of one API worker connection
+
+        Args:
+            conn: Connection to the worker
+            shm: The worker's frame slot block
+            slot_bytes: Size of one slot
+        """
+        self.conn = conn
+        self.shm = shm
+        self.slot_bytes = slot_bytes
+        self.send_lock = threading.Lock()
+
+    def frame(self, slot: int, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Get a view of a frame stored in a slot (no copy)
+
+        Args:
+            slot: Slot index
+            shape: Frame shape
+
+        Returns:
+            Array backed by the shared memory slot
+        """
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def send(self, message: Dict[str, Any]):
+        """
+        Send a message to the worker
+
+        Args:
+            message: Message to send
+        """
+        with self.send_lock:
+            self.conn.send(message)
+
+class InferenceServer:
+    def __init__(self, detector, address: str = DEFAULT_ADDRESS, authkey: Optional[bytes] = None,
+                 max_batch: int = 16, batch_window: float = 0.002):
+        """
+        Initialize the inference server
+
+        Args:
+            detector: Fall detector shared by all workers (HybridFallDetector)
+            address: Unix socket path or loopback "host:port"
+            authkey: Key workers must present (required)
+            max_batch: Maximum requests processed per batch
+            batch_window: Seconds to wait for more requests after the first of a batch
+
+        Raises:
+            ValueError: If no authkey is given or the address is not local
+        """
+        self.detector = detector
+        self.address = parse_address(address)
+        check_local_address(self.address)
+        self.authkey = check_authkey(authkey)
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._requests: "queue.Queue[Optional[Tuple[_ClientConnection, Dict[str, Any]]]]" = queue.Queue()
+        self._listener: Optional[Listener] = None
+        self._connections: Set[Connection] = set()
+        self._connections_lock = threading.Lock()
+        self._running = False
+        self.requests_processed = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+
+    def start(self):
+        """
+        Start accepting workers and processing requests in background threads
+        """
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, authkey=self.authkey)
+        if isinstance(self.address, str):
+            os.chmod(self.address, 0o600)
+        self._running = True
+        threading.Thread(target=self._accept_loop, name="inference-accept", daemon=True).start()
+        threading.Thread(target=self._inference_loop, name="inference-loop", daemon=True).start()
+        logger.info(f"Inference server listening on {self.address}")
+
+    def stop(self):
+        """
+        Stop the server
+        """
+        self._running = False
+        self._requests.put(None)
+        if self._listener is not None:
+            self._listener.close()
+
+        # Disconnect the workers; they reconnect once a server is back
+        with self._connections_lock:
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                with socket.socket(fileno=os.dup(conn.fileno())) as sock:
+                    sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get batching statistics
+
+        Returns:
+            Dictionary with request and batch counters
+        """
+        return {
+            "requests": self.requests_processed,
+            "batches": self.batches,
+            "mean_batch_size": round(self.requests_processed / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen
+        }
+
+    def _accept_loop(self):
+        """
+        Accept worker connections
+        """
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                if self._running:
+                    logger.error(f"Error accepting inference client: {str(e)}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn: Connection):
+        """
+        Read requests from one worker
+
+        Detection requests are queued for the inference loop; control
+        requests are answered directly.
+
+        Args:
+            conn: Connection to the worker
+        """
+        client = None
+        with self._connections_lock:
+            self._connections.add(conn)
+        try:
+            hello = conn.recv()
+            client = _ClientConnection(conn, attach_shared_memory(hello["shm"]), hello["slot_bytes"])
+            client.send({
+                "video_weight": self.detector.VIDEO_WEIGHT,
+                "audio_weight": self.detector.AUDIO_WEIGHT,
+                "threshold": self.detector.HYBRID_THRESHOLD,
+                "cascade_mode": self.detector.cascade_mode
+            })
+
+            while True:
+                message = conn.recv()
+                if message["type"] == "detect":
+                    self._requests.put((client, message))
+                else:
+                    client.send(self._handle_control(message))
+        except (EOFError, OSError):
+            pass
+        except Exception as e:
+            logger.error(f"Error serving inference client: {str(e)}")
+        finally:
+            with self._connections_lock:
+                self._connections.discard(conn)
+            conn.close()
+            if client is not None:
+                try:
+                    client.shm.close()
+                except BufferError:
+                    # A queued request still holds a view; the mapping goes with the process
+                    pass
+
+    def _handle_control(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a non-batched request
+
+        Args:
+            message: Request message
+
+        Returns:
+            Reply message
+        """
+        try:
+            kind = message["type"]
+            if kind == "detect_landmarks":
+                result = self.detector.detect_fall_from_landmarks(
+                    message["landmarks"], message.get("audio_features"),
+                    stream_id=message["stream_id"], params=message.get("params"),
+                    timestamp=message.get("timestamp"))
+            elif kind == "reset_stream":
+                result = self.detector.reset_stream(message["stream_id"])
+            elif kind == "cascade_stats":
+                result = self.detector.get_cascade_stats(message.get("stream_id"))
+            elif kind == "start_recording":
+                self.detector.start_recording(message["stream_id"], message["directory"])
+                result = message["directory"]
+            elif kind == "stop_recording":
+                result = self.detector.stop_recording(message["stream_id"])
+            elif kind == "server_stats":
+                result = self.get_stats()
+            else:
+                raise ValueError(f"Unknown request type {kind}")
+            return {"id": message["id"], "result": result}
+        except Exception as e:
+            return {"id": message["id"], "error": str(e)}
+
+    def _inference_loop(self):
+        """
+        Collect requests into batches, run them and reply once per worker per batch
+        """
+        while self._running:
+            item = self._requests.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._running = False
+                    break
+                batch.append(item)
+
+            replies: Dict[int, Tuple[_ClientConnection, List[Dict[str, Any]]]] = {}
+            for client, message in batch:
+                replies.setdefault(id(client), (client, []))[1].append(self._run_detection(client, message))
+
+            for client, client_replies in replies.values():
+                try:
+                    client.send({"type": "batch", "replies": client_replies})
+                except (EOFError, OSError):
+                    pass
+
+            self.batches += 1
+            self.requests_processed += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+    def _run_detection(self, client: _ClientConnection, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run one detection request
+
+        Args:
+            client: Worker connection that sent the request
+            message: Detection request
+
+        Returns:
+            Reply for the request
+        """
+        try:
+            frame = None
+            if message.get("slot") is not None:
+                frame = client.frame(message["slot"], message["shape"])
+            elif message.get("frame") is not None:
+                frame = message["frame"]
+
+            result = self.detector.detect_fall(
+                video_frame=frame,
+                audio_data=message.get("audio_data"),
+                sample_rate=message.get("sample_rate"),
+                stream_id=message["stream_id"],
+                params=message.get("params"),
+                timestamp=message.get("timestamp"))
+            return {"id": message["id"], "result": result}
+        except Exception as e:
+            logger.error(f"Error in inference request: {str(e)}")
+            return {"id": message["id"], "error": str(e)}
+
+class _SlotPool:
+    def __init__(self, slots: int, slot_bytes: int):
+        """
+        Create the frame slots of one server connection
+
+        Args:
+            slots: Number of slots
+            slot_bytes: Size of one slot
+        """
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._closed = False
+
+    def acquire(self, timeout: float) -> int:
+        """
+        Take a free slot, waiting for one if all are in flight
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            Slot index
+
+        Raises:
+            queue.Empty: If no slot became free in time
+        """
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot: int):
+        """
+        Return a slot the server no longer reads
+
+        Args:
+            slot: Slot index
+        """
+        self._free.put(slot)
+
+    def store(self, slot: int, frame: np.ndarray):
+        """
+        Copy a frame into a slot
+
+        Args:
+            slot: Slot index
+            frame: Frame that fits in a slot
+
+        Raises:
+            RuntimeError: If the pool's connection was reset
+        """
+        if self._closed:
+            raise RuntimeError("Inference server connection was reset")
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(view, frame)
+
+    def close(self):
+        """
+        Release the block (slots still in flight are retired with it)
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller is still copying a frame; the mapping goes when it is done
+            pass
+        self.shm.unlink()
+
+class RemoteFallDetector:
+    def __init__(self, address: str = DEFAULT_ADDRESS, authkey: Optional[bytes] = None,
+                 slots: int = 8, slot_bytes: int = DEFAULT_SLOT_BYTES, timeout: float = 10.0):
+        """
+        Initialize a client for the inference server with the HybridFallDetector interface
+
+        If the server goes away, pending calls fail and the client reconnects
+        in the background; calls made while it is disconnected fail at once.
+
+        Args:
+            address: Unix socket path or "host:port" of the server
+            authkey: Server key (required)
+            slots: Number of frame slots (concurrent in-flight frames)
+            slot_bytes: Size of one slot; larger frames are sent inline
+            timeout: Seconds to wait for a reply
+
+        Raises:
+            ValueError: If no authkey is given
+        """
+        self.address = parse_address(address)
+        self.authkey = check_authkey(authkey)
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.timeout = timeout
+        self.reconnects = 0
+        self._conn: Optional[Connection] = None
+        self._slots: Optional[_SlotPool] = None
+        self._pending: Dict[int, Future] = {}
+        # Slots of sent frames by request ID, returned when the server's reply arrives
+        self._held: Dict[int, Tuple[_SlotPool, int]] = {}
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._closed = False
+
+        self._connect()
+        threading.Thread(target=self._read_replies, name="inference-client", daemon=True).start()
+        logger.info(f"Connected to inference server at {address}")
+
+    def _connect(self):
+        """
+        Connect to the server with a new block of frame slots
+        """
+        conn = Client(self.address, authkey=self.authkey)
+        pool = _SlotPool(self.slots, self.slot_bytes)
+        try:
+            conn.send({"type": "hello", "shm": pool.shm.name, "slot_bytes": self.slot_bytes})
+            config = conn.recv()
+        except Exception:
+            conn.close()
+            pool.close()
+            raise
+
+        self.VIDEO_WEIGHT = config["video_weight"]
+        self.AUDIO_WEIGHT = config["audio_weight"]
+        self.HYBRID_THRESHOLD = config["threshold"]
+        self.cascade_mode = config["cascade_mode"]
+        with self._send_lock:
+            self._conn = conn
+            self._slots = pool
+
+    def detect_fall(self, video_frame=None, audio_data=None, sample_rate: Optional[int] = None,
+                    stream_id: str = "default",
+                    params: Optional[Dict[str, float]] = None,
+                    timestamp: Optional[float] = None) -> Tuple[bool, float, dict]:
+        """
+        Detect fall on the inference server
+
+        Args:
+            video_frame: Video frame (BGR, uint8)
+            audio_data: Audio data for sound analysis
+            sample_rate: Sample rate of the audio data
+            stream_id: Identifier of the camera/microphone stream
+            params: Per-user fusion weights and threshold
+            timestamp: Capture time of the frame in seconds
+
+        Returns:
+            Tuple of (is_fall, confidence_score, details)
+        """
+        message = {
+            "type": "detect",
+            "stream_id": stream_id,
+            "params": params,
+            "audio_data": audio_data,
+            "sample_rate": sample_rate,
+            "timestamp": timestamp
+        }
+
+        held = None
+        if video_frame is not None:
+            frame = np.asarray(video_frame, dtype=np.uint8)
+            pool = self._slots
+            if frame.nbytes <= self.slot_bytes:
+                slot = pool.acquire(self.timeout)
+                pool.store(slot, frame)
+                held = (pool, slot)
+                message["slot"] = slot
+                message["shape"] = frame.shape
+            else:
+                # Too large for a slot: send the pixels with the request
+                message["frame"] = frame
+
+        # The slot goes back when the server replies, not when this call stops
+        # waiting: after a timeout the server may still be reading it
+        return tuple(self._call(message, held))
+
+    def detect_fall_from_landmarks(self, landmarks: Optional[np.ndarray], audio_features: Optional[np.ndarray] = None,
+                                   stream_id: str = "default",
+                                   params: Optional[Dict[str, float]] = None,
+                                   timestamp: Optional[float] = None) -> Tuple[bool, float, dict]:
+        """
+        Detect fall from precomputed landmarks on the inference server
+
+        Args:
+            landmarks: Landmark array of shape (33, 4), or None
+            audio_features: Audio feature vector, or None
+            stream_id: Identifier of the camera/microphone stream
+            params: Per-user fusion weights and threshold
+            timestamp: Capture time of the frame in seconds
+
+        Returns:
+            Tuple of (is_fall, confidence_score, details)
+        """
+        return tuple(self._call({
+            "type": "detect_landmarks",
+            "landmarks": landmarks,
+            "audio_features": audio_features,
+            "stream_id": stream_id,
+            "params": params,
+            "timestamp": timestamp
+        }))
+
+    def reset_stream(self, stream_id: str):
+        """
+        Drop the server's state for a stream
+
+        Args:
+            stream_id: Identifier of the stream
+        """
+        self._call({"type": "reset_stream", "stream_id": stream_id})
+
+    def get_cascade_stats(self, stream_id: Optional[str] = None) -> Dict[str, float]:
+        """
+        Get the server's cascade statistics
+
+        Args:
+            stream_id: Stream to report on (all streams if None)
+
+        Returns:
+            Dictionary with cascade statistics
+        """
+        return self._call({"type": "cascade_stats", "stream_id": stream_id})
+
+    def start_recording(self, stream_id: str, directory: str) -> str:
+        """
+        Record a stream on the server
+
+        Args:
+            stream_id: Identifier of the stream
+            directory: Directory for the recording (on the server's filesystem)
+
+        Returns:
+            The recording directory
+        """
+        return self._call({"type": "start_recording", "stream_id": stream_id, "directory": directory})
+
+    def stop_recording(self, stream_id: str) -> bool:
+        """
+        Stop recording a stream on the server
+
+        Args:
+            stream_id: Identifier of the stream
+
+        Returns:
+            True if the stream was being recorded
+        """
+        return self._call({"type": "stop_recording", "stream_id": stream_id})
+
+    def get_server_stats(self) -> Dict[str, float]:
+        """
+        Get the server's batching statistics
+
+        Returns:
+            Dictionary with request and batch counters
+        """
+        return self._call({"type": "server_stats"})
+
+    def close(self):
+        """
+        Disconnect and release the frame slots
+        """
+        self._closed = True
+        with self._send_lock:
+            conn, pool = self._conn, self._slots
+            self._conn = None
+        if conn is not None:
+            conn.close()
+        if pool is not None:
+            pool.close()
+
+    def _call(self, message: Dict[str, Any], held: Optional[Tuple[_SlotPool, int]] = None) -> Any:
+        """
+        Send a request and wait for its reply
+
+        Args:
+            message: Request message (an ID is added)
+            held: Pool and index of the slot holding the request's frame
+
+        Returns:
+            Result of the request
+
+        Raises:
+            RuntimeError: If the server reported an error or is not connected
+        """
+        future = Future()
+        with self._send_lock:
+            if self._conn is None:
+                raise RuntimeError("Inference server not connected")
+            if held is not None and held[0] is not self._slots:
+                # The slot belongs to a connection that has since been replaced
+                raise RuntimeError("Inference server connection was reset")
+
+            with self._pending_lock:
+                message["id"] = next(self._ids)
+                self._pending[message["id"]] = future
+                if held is not None:
+                    self._held[message["id"]] = held
+            try:
+                self._conn.send(message)
+            except Exception:
+                with self._pending_lock:
+                    self._pending.pop(message["id"], None)
+                    self._held.pop(message["id"], None)
+                raise
+
+        try:
+            reply = future.result(timeout=self.timeout)
+        finally:
+            with self._pending_lock:
+                self._pending.pop(message["id"], None)
+
+        if "error" in reply:
+            raise RuntimeError(f"Inference server error: {reply['error']}")
+        return reply["result"]
+
+    def _read_replies(self):
+        """
+        Dispatch replies to the waiting callers and free their frame slots,
+        reconnecting whenever the server goes away
+        """
+        conn = self._conn
+        while conn is not None:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                if self._closed:
+                    return
+                logger.warning("Inference server connection closed")
+                conn = self._reconnect()
+                continue
+
+            replies = message["replies"] if message.get("type") == "batch" else [message]
+            with self._pending_lock:
+                for reply in replies:
+                    held = self._held.pop(reply["id"], None)
+                    if held is not None:
+                        held[0].release(held[1])
+                    future = self._pending.get(reply["id"])
+                    if future is not None and not future.done():
+                        future.set_result(reply)
+
+    def _reconnect(self) -> Optional[Connection]:
+        """
+        Fail the pending calls and connect again, backing off between attempts
+
+        Returns:
+            The new connection, or None if the client was closed
+        """
+        with self._send_lock:
+            self._conn = None
+            pool = self._slots
+        with self._pending_lock:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_result({"error": "connection closed"})
+            # The old server is gone: its slots are retired with the block
+            self._held.clear()
+        pool.close()
+
+        delay = RECONNECT_MIN_DELAY
+        while not self._closed:
+            time.sleep(delay)
+            try:
+                self._connect()
+            except (OSError, EOFError, AuthenticationError) as e:
+                logger.warning(f"Inference server reconnect failed: {str(e)}")
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                continue
+            self.reconnects += 1
+            logger.info("Reconnected to inference server")
+            return self._conn
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="CareConnect inference server")
+    parser.add_argument("--address", default=os.getenv("INFERENCE_SERVER_ADDRESS", DEFAULT_ADDRESS),
+                        help="Unix socket path or loopback host:port")
+    parser.add_argument("--max-batch", type=int, default=16, help="Maximum requests per batch")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="Milliseconds to wait for more requests after the first of a batch")
+    args = parser.parse_args()
+
+    authkey = os.getenv("INFERENCE_SERVER_AUTHKEY")
+    if not authkey:
+        parser.error("INFERENCE_SERVER_AUTHKEY must be set (requests are pickled; the key admits workers)")
+
+    from app.core.fall_detection.hybrid_detector import HybridFallDetector
+    detector = HybridFallDetector(
+        cascade_mode=os.getenv("CASCADE_DETECTION", "false").lower() == "true",
+        max_streams=int(os.getenv("DETECTOR_MAX_STREAMS", "1000")),
+        stream_ttl=float(os.getenv("DETECTOR_STREAM_TTL_SECONDS", "600")))
+
+    server = InferenceServer(
+        detector, args.address, authkey.encode(),
+        max_batch=args.max_batch, batch_window=args.batch_window_ms / 1000)
+    server.start()
+
+    # Exit through the finally block (socket cleanup) when the supervisor terminates us
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(f"Inference server stats: {server.get_stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class Job:
+    def __init__(self, job_id: str, name: str, payload: Dict[str, Any], max_attempts: int):
+        """
+        Initialize a background job
+
+        Args:
+            job_id: Unique job ID (prefixed with the queue name)
+            name: Name of the registered handler
+            payload: Handler arguments
+            max_attempts: Attempts before the job is marked failed
+        """
+        self.id = job_id
+        self.name = name
+        self.payload = payload
+        self.max_attempts = max_attempts
+        self.status = "queued"  # queued, running, retrying, succeeded, failed
+        self.attempts = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the job for API responses
+
+        Returns:
+            Dictionary with job information
+        """
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "alert_id": self.payload.get("alert_id"),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+class JobQueue:
+    def __init__(self, name: str, workers: int = 2, retry_base_delay: float = 1.0,
+                 retry_max_delay: float = 30.0, history_size: int = 1000):
+        """
+        Initialize an in-process job queue served by worker threads
+
+        Failed jobs are retried with exponential backoff up to their attempt
+        limit. Finished jobs stay queryable until they fall out of the history.
+
+        Args:
+            name: Queue name (used for thread names and logs)
+            workers: Number of worker threads
+            retry_base_delay: Delay before the first retry (seconds)
+            retry_max_delay: Upper bound on the retry delay (seconds)
+            history_size: Number of jobs kept for status queries
+        """
+        self.name = name
+        self.workers = workers
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.history_size = history_size
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = {}
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+
+    def register(self, name: str, handler: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]):
+        """
+        Register the handler for a job name
+
+        Args:
+            name: Job name
+            handler: Callable taking the job payload and returning a result dictionary
+        """
+        self._handlers[name] = handler
+
+    def enqueue(self, name: str, payload: Dict[str, Any], max_attempts: int = 3) -> Job:
+        """
+        Queue a job, starting the workers on first use
+
+        Args:
+            name: Name of a registered handler
+            payload: Handler arguments
+            max_attempts: Attempts before the job is marked failed
+
+        Returns:
+            The queued job
+        """
+        if name not in self._handlers:
+            raise ValueError(f"No handler registered for job {name}")
+
+        self.start()
+        with self._lock:
+            job = Job(f"{self.name}-{next(self._ids)}", name, payload, max_attempts)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history_size:
+                self._jobs.popitem(last=False)
+
+        self._queue.put(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's status
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            Job dictionary, or None if unknown or expired from the history
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def get_jobs(self, alert_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get recent jobs, optionally only those for one alert
+
+        Args:
+            alert_id: Alert the jobs were queued for
+
+        Returns:
+            List of job dictionaries, oldest first
+        """
+        with self._lock:
+            return [
+                job.to_dict() for job in self._jobs.values()
+                if alert_id is None or job.payload.get("alert_id") == alert_id
+            ]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get queue depth and outcome counters
+
+        Returns:
+            Dictionary with queue statistics
+        """
+        return {
+            "workers": len(self._threads),
+            "queued": self._queue.qsize(),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried
+        }
+
+    def start(self):
+        """
+        Start the worker threads if they are not running
+        """
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"{self.name}-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"JobQueue {self.name} started with {self.workers} workers")
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stop the worker threads after their current jobs
+
+        Args:
+            timeout: Seconds to wait for each worker
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    def _work(self):
+        """
+        Worker loop
+        """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: Job):
+        """
+        Run one attempt of a job and schedule a retry on failure
+
+        Args:
+            job: Job to run
+        """
+        job.status = "running"
+        job.attempts += 1
+
+        try:
+            job.result = self._handlers[job.name](job.payload)
+            job.status = "succeeded"
+            job.error = None
+            job.finished_at = time.time()
+            with self._lock:
+                self.succeeded += 1
+            return
+        except Exception as e:
+            job.error = str(e)
+            logger.error(f"Job {job.id} ({job.name}) attempt {job.attempts} failed: {str(e)}")
+
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            job.finished_at = time.time()
+            with self._lock:
+                self.failed += 1
+            return
+
+        job.status = "retrying"
+        with self._lock:
+            self.retried += 1
+        delay = min(self.retry_base_delay * 2 ** (job.attempts - 1), self.retry_max_delay)
+        timer = threading.Timer(delay, self._queue.put, args=(job,))
+        timer.daemon = True
+        timer.start()
+
+# Response-team assembly, queued by the escalation ladder's volunteers rung, runs here
+emergency_jobs = JobQueue(
+    "emergency",
+    workers=int(os.getenv("EMERGENCY_JOB_WORKERS", "4")),
+    retry_base_delay=float(os.getenv("EMERGENCY_JOB_RETRY_SECONDS", "2")))
+
+# Voice guidance takes over a minute and uses one speech engine, so it gets its own single worker
+guidance_jobs = JobQueue("guidance", workers=1)
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class LazyComponent:
+    def __init__(self, name: str, factory: Callable[[], Any],
+                 after_fork: Optional[Callable[[Any], None]] = None, fork_safe: bool = True):
+        """
+        Initialize a component whose imports and models load on first use
+
+        Args:
+            name: Component name reported by the readiness endpoint
+            factory: Callable that imports the dependencies and builds the component
+            after_fork: Called with the component in a forked worker to rebuild per-process parts
+            fork_safe: If False, a forked worker loads its own instance on first use
+                (the imported modules stay shared)
+        """
+        self.name = name
+        self.factory = factory
+        self.after_fork = after_fork
+        self.fork_safe = fork_safe
+        self.state = "pending"  # pending, loading, ready, unavailable
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """
+        Whether the component is loaded or may still load successfully
+        """
+        return self.state != "unavailable"
+
+    def get(self) -> Any:
+        """
+        Get the component, loading it if this is the first use
+
+        Concurrent callers wait for a single load.
+
+        Returns:
+            The component, or None if it could not be loaded
+        """
+        if self.state in ("ready", "unavailable"):
+            return self._value
+
+        with self._lock:
+            if self.state == "pending":
+                self.state = "loading"
+                started = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                    self.state = "ready"
+                except Exception as e:
+                    logger.warning(f"{self.name} not available: {e}")
+                    self.error = str(e)
+                    self.state = "unavailable"
+                self.load_seconds = round(time.perf_counter() - started, 3)
+                logger.info(f"{self.name} loaded in {self.load_seconds}s ({self.state})")
+
+        return self._value
+
+    def reset_after_fork(self):
+        """
+        Make an instance inherited from a pre-fork parent usable in this process
+        """
+        self._lock = threading.Lock()
+        if self.state != "ready":
+            return
+
+        if not self.fork_safe:
+            self._value = None
+            self.state = "pending"
+        elif self.after_fork is not None:
+            self.after_fork(self._value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the load state for the readiness endpoint
+
+        Returns:
+            Dictionary with component load state
+        """
+        return {
+            "name": self.name,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error
+        }
+
+class WarmupManager:
+    def __init__(self):
+        """
+        Initialize the registry of lazily loaded components
+        """
+        self._components: List[LazyComponent] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, component: LazyComponent) -> LazyComponent:
+        """
+        Register a component for background warm-up and readiness reporting
+
+        Args:
+            component: Component to register
+
+        Returns:
+            The registered component
+        """
+        self._components.append(component)
+        return component
+
+    def start(self):
+        """
+        Load all registered components in a background thread
+        """
+        if self._thread is not None:
+            return
+
+        def warm_up():
+            for component in list(self._components):
+                component.get()
+            logger.info("Warm-up complete")
+
+        self._thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+        self._thread.start()
+
+    def load_all(self):
+        """
+        Load the fork-safe components in the calling thread (pre-fork parent)
+
+        Components marked fork_safe=False hold threads, sockets or driver loops
+        that cannot cross a fork; every worker would discard them, so they are
+        left for the workers to load.
+        """
+        for component in list(self._components):
+            if component.fork_safe:
+                component.get()
+
+    def after_fork(self):
+        """
+        Reset thread and per-process state in a forked worker
+        """
+        self._thread = None
+        for component in self._components:
+            component.reset_after_fork()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get warm-up progress
+
+        A component that failed to load counts as done: the API serves
+        without it, as it would if the dependency were not installed.
+
+        Returns:
+            Dictionary with readiness, progress and per-component state
+        """
+        done = sum(1 for c in self._components if c.state in ("ready", "unavailable"))
+        total = len(self._components)
+
+        return {
+            "ready": done == total,
+            "progress": round(done / total, 3) if total else 1.0,
+            "components": [c.to_dict() for c in self._components]
+        }
+
+# Global registry of lazily loaded components
+warmup_manager = WarmupManager()
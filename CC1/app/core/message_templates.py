@@ -0,0 +1,350 @@
+"""
+Compiled alert message templates
+
+Alert texts live in one catalog of channel- and locale-specific templates
+that is parsed and checked once, when the module is imported, instead of
+being rebuilt with f-strings wherever an alert goes out. Each incident
+renders a (channel, locale) pair once and every recipient sharing it
+reuses the result; identical texts also let the outbox send them as one
+batch. SMS templates come as variants from longest to shortest, and the
+longest variant that fits the segment budget is sent.
+"""
+
+import logging
+import os
+import string
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from xml.sax.saxutils import escape as xml_escape
+
+from app.core.metrics import metrics
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fields a template may use
+FIELDS = ("user_name", "time", "location", "status")
+
+DEFAULT_CONTEXT = {
+    "user_name": "Unknown User",
+    "time": "Unknown Time",
+    "location": "Unknown location",
+    "status": "Critical"
+}
+
+# Characters of the GSM 03.38 alphabet; anything else sends the SMS as UCS-2
+GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà")
+GSM7_EXTENDED = set("^{}\\[~]|€")
+
+# Per locale and channel: "subject" (email subject, push title) and "body"; "sms" lists body variants.
+# Channels without an entry use the locale's "default" body.
+CATALOG: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "en": {
+        "default": {
+            "body": ("🚨 EMERGENCY ALERT 🚨\n"
+                     "Fall detected for {user_name}\n"
+                     "Time: {time}\n"
+                     "Location: {location}\n"
+                     "Status: {status}\n"
+                     "Please check on them immediately!")
+        },
+        "email": {"subject": "Emergency Alert - Fall Detected for {user_name}"},
+        "sms": {
+            "variants": [
+                "EMERGENCY: Fall detected for {user_name} at {time}. Location: {location}. "
+                "Status: {status}. Please check on them immediately!",
+                "FALL ALERT: {user_name} at {location}. Check on them now!",
+                "FALL ALERT: {user_name}. Check now!"
+            ]
+        },
+        "push": {
+            "subject": "Emergency Alert",
+            "body": "Fall detected for {user_name} at {location}. Please check on them immediately."
+        },
+        "voice": {
+            "body": ('<Response><Say language="en-US">Emergency alert. A fall was detected for {user_name} '
+                     'at {location}. Please check on them immediately.</Say></Response>')
+        }
+    },
+    "es": {
+        "default": {
+            "body": ("🚨 ALERTA DE EMERGENCIA 🚨\n"
+                     "Caída detectada: {user_name}\n"
+                     "Hora: {time}\n"
+                     "Ubicación: {location}\n"
+                     "Estado: {status}\n"
+                     "¡Compruebe su estado de inmediato!")
+        },
+        "email": {"subject": "Alerta de emergencia - Caída detectada: {user_name}"},
+        "sms": {
+            "variants": [
+                "EMERGENCIA: Caida detectada: {user_name} a las {time}. Lugar: {location}. "
+                "Estado: {status}. Compruebe su estado de inmediato.",
+                "ALERTA DE CAIDA: {user_name} en {location}. Compruebe ya.",
+                "ALERTA DE CAIDA: {user_name}. Compruebe ya."
+            ]
+        },
+        "push": {
+            "subject": "Alerta de emergencia",
+            "body": "Caída detectada: {user_name} en {location}. Compruebe su estado de inmediato."
+        },
+        "voice": {
+            "body": ('<Response><Say language="es-ES">Alerta de emergencia. Se ha detectado una caída de '
+                     '{user_name} en {location}. Compruebe su estado de inmediato.</Say></Response>')
+        }
+    },
+    "fr": {
+        "default": {
+            "body": ("🚨 ALERTE D'URGENCE 🚨\n"
+                     "Chute détectée : {user_name}\n"
+                     "Heure : {time}\n"
+                     "Lieu : {location}\n"
+                     "État : {status}\n"
+                     "Veuillez vérifier immédiatement !")
+        },
+        "email": {"subject": "Alerte d'urgence - Chute détectée : {user_name}"},
+        "sms": {
+            "variants": [
+                "URGENCE : chute détectée pour {user_name} à {time}. Lieu : {location}. "
+                "Etat : {status}. Veuillez vérifier immédiatement !",
+                "ALERTE CHUTE : {user_name} à {location}. Vérifiez vite !",
+                "ALERTE CHUTE : {user_name}. Vérifiez vite !"
+            ]
+        },
+        "push": {
+            "subject": "Alerte d'urgence",
+            "body": "Chute détectée : {user_name} à {location}. Veuillez vérifier immédiatement."
+        },
+        "voice": {
+            "body": ('<Response><Say language="fr-FR">Alerte d\'urgence. Une chute a été détectée pour '
+                     '{user_name} à {location}. Veuillez vérifier immédiatement.</Say></Response>')
+        }
+    }
+}
+
+def sms_segments(text: str) -> int:
+    """
+    Count the SMS segments a text is billed as
+
+    Args:
+        text: Message text
+
+    Returns:
+        Number of segments (160/153 characters for GSM-7, 70/67 for UCS-2)
+    """
+    if all(char in GSM7_BASIC or char in GSM7_EXTENDED for char in text):
+        length = sum(2 if char in GSM7_EXTENDED else 1 for char in text)
+        single, multi = 160, 153
+    else:
+        # UTF-16 code units: emoji take two
+        length = len(text.encode("utf-16-le")) // 2
+        single, multi = 70, 67
+    if length <= single:
+        return 1
+    return -(-length // multi)
+
+class RenderedMessage(NamedTuple):
+    subject: Optional[str]
+    body: str
+    segments: Optional[int] = None
+
+class CompiledTemplate:
+    def __init__(self, source: str, escape: Optional[Callable[[str], str]] = None):
+        """
+        Parse a template once into literal text and field slots
+
+        Args:
+            source: Template text with {field} placeholders
+            escape: Applied to every field value (e.g. XML escaping for TwiML)
+
+        Raises:
+            ValueError: If the template uses an unknown field, a format spec or a conversion
+        """
+        self.source = source
+        self.escape = escape
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if field is not None and field not in FIELDS:
+                raise ValueError(f"Unknown template field {{{field}}} in {source!r}")
+            if spec or conversion:
+                raise ValueError(f"Format specs are not supported in {source!r}")
+            self._parts.append((literal, field))
+
+    def render(self, context: Dict[str, str]) -> str:
+        """
+        Fill the template
+
+        Args:
+            context: Value of every field
+
+        Returns:
+            Rendered text
+        """
+        escape = self.escape
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field is not None:
+                value = context[field]
+                out.append(escape(value) if escape else value)
+        return "".join(out)
+
+class TemplateRegistry:
+    def __init__(self, catalog: Dict[str, Dict[str, Dict[str, Any]]], default_locale: str = "en",
+                 sms_max_segments: int = 2):
+        """
+        Compile every template of a catalog
+
+        Args:
+            catalog: Templates per locale and channel (see CATALOG)
+            default_locale: Locale used when a recipient's locale has no templates
+            sms_max_segments: Segments an SMS may use before a shorter variant is chosen
+        """
+        if default_locale not in catalog:
+            raise ValueError(f"Default locale {default_locale} has no templates")
+        self.default_locale = default_locale
+        self.sms_max_segments = sms_max_segments
+        self._templates: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for locale, channels in catalog.items():
+            for channel, spec in channels.items():
+                escape = xml_escape if channel == "voice" else None
+                compiled = {}
+                if "subject" in spec:
+                    compiled["subject"] = CompiledTemplate(spec["subject"])
+                if "body" in spec:
+                    compiled["body"] = CompiledTemplate(spec["body"], escape)
+                if "variants" in spec:
+                    compiled["variants"] = [CompiledTemplate(variant, escape) for variant in spec["variants"]]
+                self._templates[(locale, channel)] = compiled
+        logger.info(f"Compiled {len(self._templates)} alert templates for locales {', '.join(catalog)}")
+
+    def resolve_locale(self, locale: Optional[str]) -> str:
+        """
+        Map a requested locale to one with templates ("es-MX" uses "es")
+
+        Args:
+            locale: Requested locale, if any
+
+        Returns:
+            Locale with templates
+        """
+        if locale:
+            locale = locale.replace("_", "-").lower()
+            for candidate in (locale, locale.split("-")[0]):
+                if (candidate, "default") in self._templates:
+                    return candidate
+        return self.default_locale
+
+    def _lookup(self, locale: str, channel: str, part: str) -> Any:
+        for key in ((locale, channel), (locale, "default"), (self.default_locale, channel),
+                    (self.default_locale, "default")):
+            template = self._templates.get(key, {}).get(part)
+            if template is not None:
+                return template
+        return None
+
+    def render(self, channel: str, locale: Optional[str], context: Dict[str, str]) -> RenderedMessage:
+        """
+        Render the message of a channel and locale
+
+        Args:
+            channel: Notification channel
+            locale: Recipient locale
+            context: Alert context from build_alert_context
+
+        Returns:
+            Rendered subject and body (with the segment count for SMS)
+        """
+        locale = self.resolve_locale(locale)
+        subject = self._lookup(locale, channel, "subject")
+        subject = subject.render(context) if subject is not None else None
+
+        if channel == "sms":
+            variants = self._lookup(locale, channel, "variants") or [self._lookup(locale, channel, "body")]
+            for variant in variants:
+                body = variant.render(context)
+                segments = sms_segments(body)
+                if segments <= self.sms_max_segments:
+                    break
+            return RenderedMessage(subject, body, segments)
+
+        return RenderedMessage(subject, self._lookup(locale, channel, "body").render(context))
+
+    def for_incident(self, context: Dict[str, str]) -> "IncidentMessages":
+        """
+        Get the per-incident renderer reusing each (channel, locale) rendering
+
+        Args:
+            context: Alert context from build_alert_context
+
+        Returns:
+            Incident messages
+        """
+        return IncidentMessages(self, context)
+
+class IncidentMessages:
+    def __init__(self, registry: TemplateRegistry, context: Dict[str, str]):
+        """
+        Initialize the messages of one incident
+
+        Args:
+            registry: Compiled templates
+            context: Alert context from build_alert_context
+        """
+        self.registry = registry
+        self.context = context
+        self._rendered: Dict[Tuple[str, str], RenderedMessage] = {}
+        self.lookups = 0
+
+    def get(self, channel: str, locale: Optional[str] = None) -> RenderedMessage:
+        """
+        Get the message of a channel and locale, rendering it on first use
+
+        Args:
+            channel: Notification channel
+            locale: Recipient locale (the default locale if None)
+
+        Returns:
+            Rendered message
+        """
+        self.lookups += 1
+        key = (channel, self.registry.resolve_locale(locale))
+        message = self._rendered.get(key)
+        if message is None:
+            with metrics.stage("message_templates", "render"):
+                message = self._rendered[key] = self.registry.render(channel, key[1], self.context)
+        return message
+
+    @property
+    def renders(self) -> int:
+        return len(self._rendered)
+
+def build_alert_context(alert_data: Dict[str, Any], location: Optional[str] = None) -> Dict[str, str]:
+    """
+    Build the template context of an alert
+
+    Args:
+        alert_data: Alert information (user_name, timestamp, location, status)
+        location: Location text overriding alert_data["location"]
+
+    Returns:
+        Value of every template field
+    """
+    context = dict(DEFAULT_CONTEXT)
+    values = {
+        "user_name": alert_data.get("user_name"),
+        "time": alert_data.get("timestamp") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "location": location or alert_data.get("location"),
+        "status": alert_data.get("status")
+    }
+    context.update({field: str(value) for field, value in values.items() if value})
+    return context
+
+# Global templates, compiled at startup
+message_templates = TemplateRegistry(
+    CATALOG,
+    default_locale=os.getenv("ALERT_DEFAULT_LOCALE", "en"),
+    sms_max_segments=int(os.getenv("SMS_MAX_SEGMENTS", "2")))
@@ -0,0 +1,204 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) shared by all stage histograms: 100µs to 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize a fixed-bucket latency histogram
+
+        Observations only bump one bucket counter, so recording costs the same
+        regardless of how many samples have been seen.
+
+        Args:
+            buckets: Sorted bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """
+        Record one observation
+
+        Args:
+            value: Observed duration in seconds
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """
+        Get a consistent copy of the histogram
+
+        Returns:
+            Cumulative bucket counts (including +Inf), sum and count
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize the registry of per-stage latency histograms
+
+        Args:
+            enabled: Record observations (rendering still works when disabled)
+        """
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, component: str, stage: str) -> Histogram:
+        """
+        Get the histogram for a component stage, creating it on first use
+
+        Args:
+            component: Component name (e.g. "video_detector")
+            stage: Stage name within the component (e.g. "pose_process")
+
+        Returns:
+            The stage histogram
+        """
+        key = (component, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, component: str, stage: str, seconds: float):
+        """
+        Record a stage duration
+
+        Args:
+            component: Component name
+            stage: Stage name
+            seconds: Duration in seconds
+        """
+        if self.enabled:
+            self.histogram(component, stage).observe(seconds)
+
+    @contextmanager
+    def stage(self, component: str, stage: str):
+        """
+        Time the enclosed block as one stage observation
+
+        Args:
+            component: Component name
+            stage: Stage name
+        """
+        if not self.enabled:
+            yield
+            return
+
+        histogram = self.histogram(component, stage)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    def timed(self, component: str, stage: Optional[str] = None) -> Callable:
+        """
+        Decorator timing each call of a function or coroutine function
+
+        Args:
+            component: Component name
+            stage: Stage name (defaults to the function name)
+
+        Returns:
+            Decorator
+        """
+        def decorator(fn: Callable) -> Callable:
+            stage_name = stage or fn.__name__
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.stage(component, stage_name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(component, stage_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    def _sorted_histograms(self) -> List[Tuple[Tuple[str, str], Histogram]]:
+        """
+        Copy the registered histograms under the lock (stages may register concurrently)
+
+        Returns:
+            (component, stage) keys and histograms in key order
+        """
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the count and mean latency of each stage
+
+        Returns:
+            Mapping of "component.stage" to count and mean_ms
+        """
+        stats = {}
+        for (component, stage), histogram in self._sorted_histograms():
+            _, total, count = histogram.snapshot()
+            stats[f"{component}.{stage}"] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 3) if count else 0.0
+            }
+        return stats
+
+    def render_prometheus(self) -> str:
+        """
+        Render all histograms in the Prometheus text exposition format
+
+        Returns:
+            Metrics text (format version 0.0.4)
+        """
+        name = "careconnect_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each processing stage",
+            f"# TYPE {name} histogram"
+        ]
+
+        for (component, stage), histogram in self._sorted_histograms():
+            cumulative, total, count = histogram.snapshot()
+            labels = f'component="{component}",stage="{stage}"'
+            bounds = [repr(float(b)) for b in histogram.buckets] + ["+Inf"]
+            for bound, value in zip(bounds, cumulative):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {value}')
+            lines.append(f"{name}_sum{{{labels}}} {total!r}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+
+        return "\n".join(lines) + "\n"
+
+# Global registry of stage latency histograms
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
@@ -0,0 +1,835 @@
+"""
+Async notification channels
+
+Each channel (SMS, WhatsApp, email, push, voice) is a plugin with one
+coroutine, send(recipients, message, ...), built on non-blocking clients:
+the Twilio REST API over a pooled httpx.AsyncClient and SMTP over
+aiosmtplib. Sends wait on the network without holding a thread, so one
+event loop can keep thousands of notifications in flight. Synchronous
+callers (job workers, the outbox dispatcher) submit their coroutines to a
+shared background loop with NotificationRuntime.run().
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.circuit_breaker import CircuitBreaker, circuit_breakers
+from app.core.metrics import metrics
+from app.core.notification_pool import SmtpSessionPool, smtp_pools
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# httpx is needed for the Twilio channels (SMS, WhatsApp and voice)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"httpx not available: {e}. SMS, WhatsApp and voice alerts are disabled.")
+    HTTPX_AVAILABLE = False
+    httpx = None
+
+# aiosmtplib sends email without a thread; without it batches use the pooled sync sessions
+try:
+    import aiosmtplib
+    AIOSMTPLIB_AVAILABLE = True
+except Exception:
+    AIOSMTPLIB_AVAILABLE = False
+    aiosmtplib = None
+
+class NotificationProviderError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        """
+        Raised when a provider rejects or fails a send
+
+        Args:
+            message: Provider error message
+            status_code: HTTP or SMTP status code, if any
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
+class AsyncSmtpSessionPool:
+    def __init__(self, host: str, port: int, username: str = "", password: str = "", size: int = 2,
+                 starttls: bool = True, timeout: float = 10.0, idle_timeout: float = 60.0):
+        """
+        Initialize a pool of authenticated aiosmtplib sessions to one server (one event loop)
+
+        Mirrors SmtpSessionPool: a batch checks out one session, so it costs
+        at most one connect, STARTTLS and login, and a dropped connection is
+        reopened once per message.
+
+        Args:
+            host: SMTP server host
+            port: SMTP server port
+            username: Login user (no login if empty)
+            password: Login password
+            size: Maximum number of open sessions
+            starttls: Upgrade the connection with STARTTLS before logging in
+            timeout: Socket timeout in seconds
+            idle_timeout: Seconds after which an idle session is replaced rather than reused
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle: List[Tuple[Any, float]] = []  # (session, returned at), most recent last
+        self._slots = asyncio.Semaphore(size)
+        self.connects = 0
+        self.reconnects = 0
+
+    async def _connect(self):
+        """
+        Open and authenticate a new session
+
+        Returns:
+            Connected aiosmtplib.SMTP session
+        """
+        session = aiosmtplib.SMTP(hostname=self.host, port=self.port, timeout=self.timeout,
+                                  start_tls=self.starttls)
+        await session.connect()
+        try:
+            if self.username:
+                await session.login(self.username, self.password)
+        except Exception:
+            await self._close(session)
+            raise
+        self.connects += 1
+        return session
+
+    @staticmethod
+    async def _close(session):
+        """
+        Close a session, ignoring errors from a dead connection
+
+        Args:
+            session: Session to close
+        """
+        if session is None:
+            return
+        try:
+            await session.quit()
+        except Exception:
+            session.close()
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """
+        Whether an error means the session is unusable (as opposed to a refused message)
+
+        Args:
+            error: Error raised by a send
+
+        Returns:
+            True if the session should be replaced
+        """
+        if isinstance(error, aiosmtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, aiosmtplib.SMTPResponseException):
+            return error.code == 421  # Service closing transmission channel
+        return isinstance(error, (OSError, asyncio.TimeoutError))
+
+    @classmethod
+    def _is_provider_failure(cls, error: Exception) -> bool:
+        """
+        Whether an error means the server is unhealthy (dead connection or temporary 4xx reply)
+
+        Args:
+            error: Error raised by a send
+
+        Returns:
+            True if the failure should count against the server's circuit breaker
+        """
+        if cls._is_connection_error(error):
+            return True
+        return isinstance(error, aiosmtplib.SMTPResponseException) and 400 <= error.code < 500
+
+    async def send_batch(self, messages: List[Message], channel: str = "email",
+                         message_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Send messages over one pooled session
+
+        Args:
+            messages: Messages to send, each addressed by its To header
+            channel: Channel name for per-recipient latency metrics
+            message_timeout: Deadline for each message in seconds, reconnects included (none if None)
+
+        Returns:
+            Per-message results with success, latency_ms and (on failure) provider_failure
+            and timed_out, in message order
+        """
+        results = []
+        async with self._slots:
+            now = time.monotonic()
+            session = None
+            while self._idle and session is None:
+                candidate, returned_at = self._idle.pop()
+                if now - returned_at < self.idle_timeout:
+                    session = candidate
+                else:
+                    await self._close(candidate)
+
+            async def deliver(message: Message):
+                nonlocal session
+                for attempt in range(2):
+                    try:
+                        if session is None:
+                            session = await self._connect()
+                        await session.send_message(message)
+                        return
+                    except Exception as e:
+                        if attempt == 1 or not self._is_connection_error(e):
+                            raise
+                        await self._close(session)
+                        session = None
+                        self.reconnects += 1
+
+            try:
+                for message in messages:
+                    started = time.perf_counter()
+                    try:
+                        await asyncio.wait_for(deliver(message), message_timeout)
+                        result = {"success": True}
+                    except asyncio.TimeoutError:
+                        # The session is mid-command; drop it without waiting on the server
+                        if session is not None:
+                            session.close()
+                        session = None
+                        result = {"success": False, "error": f"SMTP server did not answer within {message_timeout}s",
+                                  "provider_failure": True, "timed_out": True}
+                    except Exception as e:
+                        result = {"success": False, "error": str(e), "provider_failure": self._is_provider_failure(e)}
+                        if self._is_connection_error(e):
+                            await self._close(session)
+                            session = None
+                    elapsed = time.perf_counter() - started
+                    metrics.observe("notification_recipient", channel, elapsed)
+                    result["latency_ms"] = round(elapsed * 1000, 2)
+                    results.append(result)
+            finally:
+                if session is not None:
+                    self._idle.append((session, time.monotonic()))
+        return results
+
+    async def close(self):
+        """
+        Close all idle sessions
+        """
+        idle, self._idle = self._idle, []
+        for session, _ in idle:
+            await self._close(session)
+
+class _LoopResources:
+    def __init__(self, http_client, max_in_flight: int):
+        """
+        Clients and limits bound to one event loop
+
+        Args:
+            http_client: Pooled httpx.AsyncClient (None without httpx)
+            max_in_flight: Sends in flight on the loop across all alerts
+        """
+        self.http_client = http_client
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.smtp_pools: Dict[Tuple[str, int, str, str], AsyncSmtpSessionPool] = {}
+
+class NotificationRuntime:
+    def __init__(self, max_in_flight: int = 1000, per_alert: int = 8, http_pool_size: int = 16,
+                 timeout: float = 10.0, smtp_pool_size: int = 2, smtp_starttls: bool = True,
+                 smtp_timeout: float = 10.0, smtp_idle_timeout: float = 60.0):
+        """
+        Initialize the shared state of the async channels
+
+        Connection pools and semaphores belong to an event loop, so each loop
+        that sends (the API loop, the background loop of sync callers) gets
+        its own HTTP client and SMTP pools, created on first use.
+
+        Args:
+            max_in_flight: Sends in flight on one loop across all alerts
+            per_alert: Sends in flight for one channel of one alert
+            http_pool_size: Keep-alive HTTP connections kept per loop
+            timeout: Seconds before a provider request times out
+            smtp_pool_size: SMTP sessions per server and login
+            smtp_starttls: Upgrade SMTP connections with STARTTLS
+            smtp_timeout: SMTP socket timeout in seconds
+            smtp_idle_timeout: Seconds after which an idle SMTP session is replaced
+        """
+        self.max_in_flight = max_in_flight
+        self.per_alert = per_alert
+        self.http_pool_size = http_pool_size
+        self.timeout = timeout
+        self.smtp_pool_size = smtp_pool_size
+        self.smtp_starttls = smtp_starttls
+        self.smtp_timeout = smtp_timeout
+        self.smtp_idle_timeout = smtp_idle_timeout
+        self._resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopResources]" = \
+            weakref.WeakKeyDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _loop_resources(self) -> _LoopResources:
+        """
+        Get the clients of the running loop, creating them on first use
+
+        Returns:
+            Resources of the running loop
+        """
+        loop = asyncio.get_running_loop()
+        resources = self._resources.get(loop)
+        if resources is None:
+            http_client = None
+            if HTTPX_AVAILABLE:
+                http_client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_in_flight,
+                                        max_keepalive_connections=self.http_pool_size))
+            resources = self._resources[loop] = _LoopResources(http_client, self.max_in_flight)
+        return resources
+
+    def http_client(self):
+        """
+        Get the pooled HTTP client of the running loop
+
+        Returns:
+            httpx.AsyncClient
+        """
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError("httpx library not installed")
+        return self._loop_resources().http_client
+
+    async def send_email_batch(self, host: str, port: int, username: str, password: str,
+                               messages: List[Message], message_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Send email messages over a pooled session of the running loop
+
+        Without aiosmtplib the batch runs on a pooled synchronous session in
+        one worker thread (one thread per batch, not per recipient), where
+        the per-message deadline becomes the session's socket timeout.
+
+        Args:
+            host: SMTP server host
+            port: SMTP server port
+            username: Login user
+            password: Login password
+            messages: Messages to send
+            message_timeout: Deadline for each message in seconds (none if None)
+
+        Returns:
+            Per-message results in message order
+        """
+        if not AIOSMTPLIB_AVAILABLE:
+            pool: SmtpSessionPool = smtp_pools.get(host, port, username, password)
+            return await asyncio.to_thread(pool.send_batch, messages, "email", message_timeout)
+
+        pools = self._loop_resources().smtp_pools
+        key = (host, port, username, hashlib.sha256(password.encode()).hexdigest())
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = AsyncSmtpSessionPool(
+                host, port, username, password, size=self.smtp_pool_size, starttls=self.smtp_starttls,
+                timeout=self.smtp_timeout, idle_timeout=self.smtp_idle_timeout)
+        return await pool.send_batch(messages, "email", message_timeout)
+
+    async def fan_out(self, channel: str, recipients: List[str],
+                      send_one: Callable[[str], Awaitable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Send to every recipient concurrently with bounded concurrency and time each send
+
+        A send that raises is reported as a failed result; it does not stop
+        the others.
+
+        Args:
+            channel: Channel name for latency metrics (e.g. "sms")
+            recipients: Recipient addresses in result order
+            send_one: Coroutine function sending to one recipient and returning its result fields
+
+        Returns:
+            Per-recipient results with success and latency_ms, in recipient order
+        """
+        in_flight = self._loop_resources().in_flight
+        per_alert = asyncio.Semaphore(self.per_alert)
+
+        async def timed_send(recipient: str) -> Dict[str, Any]:
+            async with per_alert, in_flight:
+                started = time.perf_counter()
+                try:
+                    result = {"success": True, **await send_one(recipient)}
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+                elapsed = time.perf_counter() - started
+            metrics.observe("notification_recipient", channel, elapsed)
+            result["latency_ms"] = round(elapsed * 1000, 2)
+            return result
+
+        return list(await asyncio.gather(*(timed_send(recipient) for recipient in recipients)))
+
+    def run(self, coroutine: Awaitable[Any]) -> Any:
+        """
+        Run a coroutine on the shared background loop and wait for its result
+
+        Used by the synchronous channel wrappers; the background loop keeps
+        its connection pools warm across calls.
+
+        Args:
+            coroutine: Coroutine to run
+
+        Returns:
+            The coroutine's result
+        """
+        loop = self._background_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            # Blocking the loop on its own coroutine would never return
+            coroutine.close()
+            raise RuntimeError("NotificationRuntime.run() called from the notification loop")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Get the background loop, starting its thread on first use
+
+        Returns:
+            Background event loop
+        """
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="notification-loop", daemon=True)
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    async def aclose(self):
+        """
+        Close the HTTP client and idle SMTP sessions of the running loop
+        """
+        resources = self._resources.pop(asyncio.get_running_loop(), None)
+        if resources is None:
+            return
+        if resources.http_client is not None:
+            await resources.http_client.aclose()
+        for pool in resources.smtp_pools.values():
+            await pool.close()
+
+    def shutdown(self):
+        """
+        Close the background loop's clients and stop its thread
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to close notification clients: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+class NotificationChannel:
+    name = ""
+    recipient_key = "recipient"
+    provider = "local"
+
+    def __init__(self, runtime: NotificationRuntime):
+        """
+        Initialize a channel plugin
+
+        Args:
+            runtime: Shared clients and concurrency limits
+        """
+        self.runtime = runtime
+
+    def configuration_error(self) -> Optional[str]:
+        """
+        Check the channel can send
+
+        Returns:
+            Error message if the channel is not configured, else None
+        """
+        return None
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """
+        Circuit breaker of this channel and provider
+        """
+        return circuit_breakers.get(self.name, self.provider)
+
+    def is_provider_failure(self, error: Exception) -> bool:
+        """
+        Whether a send error means the provider is unhealthy
+
+        Args:
+            error: Error raised by send_one
+
+        Returns:
+            True if the error should count against the circuit breaker
+        """
+        return True
+
+    async def send_one(self, recipient: str, message: str, subject: Optional[str],
+                       options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send to one recipient
+
+        Args:
+            recipient: Recipient address
+            message: Message text
+            subject: Subject or title, if the channel has one
+            options: Channel specific options
+
+        Returns:
+            Result fields (e.g. the provider's message ID)
+        """
+        raise NotImplementedError
+
+    async def send_batch(self, recipients: List[str], message: str, subject: Optional[str],
+                         options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Send to all recipients (one send_one per recipient by default)
+
+        Each send goes through the circuit breaker: it fails fast while the
+        provider's circuit is open and is cut off at the adaptive timeout.
+
+        Args:
+            recipients: Recipient addresses
+            message: Message text
+            subject: Subject or title
+            options: Channel specific options
+
+        Returns:
+            Per-recipient results in recipient order
+        """
+        breaker = self.breaker
+        return await self.runtime.fan_out(
+            self.name, recipients,
+            lambda recipient: breaker.call(
+                lambda: self.send_one(recipient, message, subject, options), self.is_provider_failure))
+
+    async def send(self, recipients: List[str], message: str, subject: Optional[str] = None,
+                   **options) -> Dict[str, Any]:
+        """
+        Send a notification to all recipients of this channel
+
+        Args:
+            recipients: Recipient addresses
+            message: Message text (TwiML or a TwiML URL for voice)
+            subject: Email subject or push title
+            **options: Channel specific options (html_message for email, data for push,
+                idempotency_keys with one key per recipient for email and push)
+
+        Returns:
+            Dictionary with success status and per-recipient results
+        """
+        error = self.configuration_error()
+        if error:
+            logger.warning(error)
+            return {"success": False, "error": error}
+
+        with metrics.stage("alert_system", self.name):
+            try:
+                results = await self.send_batch(recipients, message, subject, options)
+            except Exception as e:
+                logger.error(f"Failed to send {self.name} alerts: {str(e)}")
+                return {"success": False, "error": str(e)}
+
+        for recipient, result in zip(recipients, results):
+            # Failed sends only carry the error
+            result.setdefault(self.recipient_key, recipient)
+        logger.info(f"{self.name} alerts sent to {len(recipients)} recipients")
+        return {"success": True, "results": results}
+
+class TwilioChannel(NotificationChannel):
+    recipient_key = "phone_number"
+    resource = "Messages"
+
+    def __init__(self, runtime: NotificationRuntime, account_sid: str, auth_token: str, from_number: str,
+                 base_url: str = "https://api.twilio.com"):
+        """
+        Initialize a channel sending through the Twilio REST API
+
+        Args:
+            runtime: Shared clients and concurrency limits
+            account_sid: Twilio account SID
+            auth_token: Twilio auth token
+            from_number: Twilio phone number to send from
+            base_url: Twilio API base URL
+        """
+        super().__init__(runtime)
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.base_url = base_url.rstrip("/")
+        self.provider = f"twilio:{account_sid}"
+
+    def configuration_error(self) -> Optional[str]:
+        if not self.account_sid or not self.auth_token:
+            return "Twilio not configured"
+        if not HTTPX_AVAILABLE:
+            return "httpx library not installed"
+        return None
+
+    def is_provider_failure(self, error: Exception) -> bool:
+        # A rejected request (e.g. an invalid number) means Twilio is up; throttling means it is not
+        if isinstance(error, NotificationProviderError) and error.status_code is not None:
+            return error.status_code >= 500 or error.status_code == 429
+        return True
+
+    async def create(self, data: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Create a Twilio resource (a message or a call)
+
+        Args:
+            data: Form parameters of the resource
+
+        Returns:
+            Created resource
+
+        Raises:
+            NotificationProviderError: If Twilio rejects the request
+        """
+        response = await self.runtime.http_client().post(
+            f"{self.base_url}/2010-04-01/Accounts/{self.account_sid}/{self.resource}.json",
+            data=data, auth=(self.account_sid, self.auth_token))
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("message", response.text)
+            except ValueError:
+                detail = response.text
+            raise NotificationProviderError(f"Twilio error {response.status_code}: {detail}", response.status_code)
+        return response.json()
+
+class SmsChannel(TwilioChannel):
+    name = "sms"
+
+    async def send_one(self, recipient, message, subject, options):
+        created = await self.create({"Body": message, "From": self.from_number, "To": recipient})
+        return {"phone_number": recipient, "message_sid": created.get("sid")}
+
+class WhatsAppChannel(TwilioChannel):
+    name = "whatsapp"
+
+    def __init__(self, runtime: NotificationRuntime, account_sid: str, auth_token: str, from_number: str,
+                 base_url: str = "https://api.twilio.com", enabled: bool = False):
+        """
+        Initialize the WhatsApp channel (Twilio WhatsApp sender)
+
+        Args:
+            runtime: Shared clients and concurrency limits
+            account_sid: Twilio account SID
+            auth_token: Twilio auth token
+            from_number: WhatsApp-enabled Twilio number
+            base_url: Twilio API base URL
+            enabled: Whether WhatsApp alerts are turned on
+        """
+        super().__init__(runtime, account_sid, auth_token, from_number, base_url)
+        self.enabled = enabled
+
+    def configuration_error(self) -> Optional[str]:
+        if not self.enabled or not self.account_sid or not self.auth_token:
+            return "WhatsApp not configured"
+        return super().configuration_error()
+
+    async def send_one(self, recipient, message, subject, options):
+        created = await self.create({
+            "Body": message, "From": f"whatsapp:{self.from_number}", "To": f"whatsapp:{recipient}"})
+        return {"phone_number": recipient, "message_sid": created.get("sid")}
+
+class VoiceChannel(TwilioChannel):
+    name = "voice"
+    resource = "Calls"
+
+    async def send_one(self, recipient, message, subject, options):
+        # For voice the message is inline TwiML or the URL of the TwiML document to play
+        instructions = {"Twiml": message} if message.lstrip().startswith("<") else {"Url": message}
+        created = await self.create({**instructions, "From": self.from_number, "To": recipient})
+        return {"phone_number": recipient, "call_sid": created.get("sid")}
+
+class EmailChannel(NotificationChannel):
+    name = "email"
+    recipient_key = "email"
+
+    def __init__(self, runtime: NotificationRuntime, host: str, port: int, username: str, password: str):
+        """
+        Initialize the email channel
+
+        Args:
+            runtime: Shared clients and concurrency limits
+            host: SMTP server host
+            port: SMTP server port
+            username: Login user, also the sender address
+            password: Login password
+        """
+        super().__init__(runtime)
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.provider = f"smtp:{host}:{port}"
+
+    def configuration_error(self) -> Optional[str]:
+        if not self.username or not self.password:
+            return "Email not configured"
+        return None
+
+    def message_id(self, idempotency_key: str) -> str:
+        """
+        Build a stable Message-ID, so every retry of one delivery carries the same ID
+
+        Args:
+            idempotency_key: Key of the delivery
+
+        Returns:
+            Message-ID header value
+        """
+        digest = hashlib.sha256(idempotency_key.encode()).hexdigest()[:32]
+        domain = self.username.partition("@")[2] or self.host
+        return f"<{digest}@{domain}>"
+
+    async def send_batch(self, recipients, message, subject, options):
+        keys = options.get("idempotency_keys") or [None] * len(recipients)
+        messages = []
+        for email_address, key in zip(recipients, keys):
+            msg = MIMEMultipart("alternative")
+            msg["Subject"] = subject or "Emergency Alert"
+            msg["From"] = self.username
+            msg["To"] = email_address
+            if key:
+                # Receiving servers and clients drop copies with a Message-ID they already have
+                msg["Message-ID"] = self.message_id(key)
+            msg.attach(MIMEText(message, "plain"))
+            if options.get("html_message"):
+                msg.attach(MIMEText(options["html_message"], "html"))
+            messages.append(msg)
+
+        # The batch is one breaker call: it fails fast while the server's circuit is open,
+        # and each message gets the adaptive deadline
+        breaker = self.breaker
+        probe = breaker.before_call()
+        try:
+            # The whole batch goes over one pooled, already authenticated session
+            results = await self.runtime.send_email_batch(
+                self.host, self.port, self.username, self.password, messages,
+                message_timeout=breaker.timeout())
+        except Exception:
+            breaker.record_failure(probe)
+            raise
+        except BaseException:
+            breaker.abandon(probe)
+            raise
+
+        # A half-open probe has one outcome per batch: it succeeds if the server answered
+        # any message, and only that message's result is recorded as the probe
+        healthy = [result["success"] or not result.get("provider_failure") for result in results]
+        probe_index = healthy.index(True) if True in healthy else 0
+        if probe and not results:
+            breaker.abandon(probe)
+        for index, (result, answered) in enumerate(zip(results, healthy)):
+            is_probe = probe and index == probe_index
+            if answered:
+                breaker.record_success(result["latency_ms"] / 1000, is_probe)
+            else:
+                breaker.record_failure(is_probe, timed_out=bool(result.get("timed_out")))
+        return results
+
+class PushChannel(NotificationChannel):
+    name = "push"
+    recipient_key = "device_token"
+
+    def __init__(self, runtime: NotificationRuntime, push_provider: Any = None,
+                 on_invalid_tokens: Optional[Callable[[List[str]], Any]] = None):
+        """
+        Initialize the push channel
+
+        Args:
+            runtime: Shared clients and concurrency limits
+            push_provider: Provider with max_batch and send_multicast() (see push_providers)
+            on_invalid_tokens: Called from a worker thread with the tokens the provider rejected for good
+        """
+        super().__init__(runtime)
+        self.push_provider = push_provider
+        self.on_invalid_tokens = on_invalid_tokens
+        self.provider = push_provider.name if push_provider is not None else "none"
+
+    def configuration_error(self) -> Optional[str]:
+        if self.push_provider is None:
+            return "Push provider not configured"
+        return self.push_provider.configuration_error()
+
+    def is_provider_failure(self, error: Exception) -> bool:
+        if isinstance(error, NotificationProviderError) and error.status_code is not None:
+            return error.status_code >= 500 or error.status_code == 429
+        return True
+
+    async def send_batch(self, recipients, message, subject, options):
+        """
+        Send to all tokens in batches of up to max_batch tokens
+
+        Each batch goes through the circuit breaker and counts as one send
+        against the runtime's in-flight limit.
+        """
+        provider = self.push_provider
+        breaker = self.breaker
+        in_flight = self.runtime._loop_resources().in_flight
+        data = options.get("data") or {}
+        keys = options.get("idempotency_keys")
+
+        async def send_chunk(tokens: List[str], chunk_keys: Optional[List[str]]) -> List[Dict[str, Any]]:
+            async with in_flight:
+                started = time.perf_counter()
+                try:
+                    results = await breaker.call(
+                        lambda: provider.send_multicast(tokens, subject or "", message, data, chunk_keys),
+                        self.is_provider_failure)
+                except Exception as e:
+                    results = [{"success": False, "error": str(e)} for _ in tokens]
+                elapsed = time.perf_counter() - started
+            metrics.observe("notification_batch", self.name, elapsed)
+            for result in results:
+                result["latency_ms"] = round(elapsed * 1000, 2)
+            return results
+
+        size = max(1, provider.max_batch)
+        starts = range(0, len(recipients), size)
+        chunks = await asyncio.gather(*(
+            send_chunk(recipients[start:start + size], keys[start:start + size] if keys else None)
+            for start in starts))
+        results = [result for chunk in chunks for result in chunk]
+
+        invalid = [token for token, result in zip(recipients, results) if result.get("invalid_token")]
+        if invalid and self.on_invalid_tokens is not None:
+            try:
+                await asyncio.to_thread(self.on_invalid_tokens, invalid)
+            except Exception as e:
+                logger.error(f"Failed to prune invalid device tokens: {str(e)}")
+        return results
+
+# Global runtime shared by all channels
+notification_runtime = NotificationRuntime(
+    max_in_flight=int(os.getenv("NOTIFICATION_MAX_IN_FLIGHT", "1000")),
+    per_alert=int(os.getenv("NOTIFICATION_PER_ALERT_CONCURRENCY", "8")),
+    http_pool_size=int(os.getenv("TWILIO_POOL_SIZE", "16")),
+    timeout=float(os.getenv("TWILIO_TIMEOUT_SECONDS", "10")),
+    smtp_pool_size=int(os.getenv("SMTP_POOL_SIZE", "2")),
+    smtp_starttls=os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+    smtp_timeout=float(os.getenv("SMTP_TIMEOUT_SECONDS", "10")),
+    smtp_idle_timeout=float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60")))
@@ -0,0 +1,533 @@
+"""
+Durable notification outbox
+
+Notification rows are written in the same transaction as their Alert, so an
+alert is never committed without its notifications. Dispatchers claim due
+rows in batches with a conditional UPDATE (a row is won by exactly one
+claim), send them, and record every attempt. Failed sends are retried with
+exponential backoff. The lease of a batch is renewed while it is sending, so
+a slow provider cannot let it lapse and have another dispatcher claim it; a
+claim whose dispatcher died stops being renewed, expires and is picked up
+again. Any number of dispatcher threads or processes
+(python -m app.core.notification_outbox) can share one database.
+
+Delivery is at least once: a send that reached the provider but whose
+outcome was lost (a timeout, a crash before it was recorded) is retried.
+Each row's idempotency key goes out with every attempt, as the Message-ID
+of an email and in the data payload of a push, so recipients can drop the
+repeat. Twilio's Messages and Calls APIs take no idempotency key, so SMS,
+WhatsApp and voice can be delivered twice.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.metrics import metrics
+from app.core.notification_channels import notification_runtime
+from app.database import SessionLocal
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OUTBOX_CHANNELS = ("sms", "whatsapp", "email", "push", "voice")
+
+def enqueue_notification(db: Session, alert_id: int, user_id: int, channel: str, recipient: str,
+                         body: str, subject: Optional[str] = None) -> "models.user.NotificationOutbox":
+    """
+    Add a notification to the outbox (committed with the caller's transaction)
+
+    Args:
+        db: Database session holding the alert's transaction
+        alert_id: ID of the alert
+        user_id: ID of the user the alert is about
+        channel: One of OUTBOX_CHANNELS
+        recipient: Phone number, email address or device token
+        body: Message text (TwiML URL for voice)
+        subject: Email subject or push title
+
+    Returns:
+        The pending outbox row
+    """
+    if channel not in OUTBOX_CHANNELS:
+        raise ValueError(f"Unknown notification channel {channel}")
+
+    row = models.user.NotificationOutbox(
+        alert_id=alert_id,
+        user_id=user_id,
+        channel=channel,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        # One row per alert, channel and recipient; sent with every attempt for provider-side dedup
+        idempotency_key=f"alert-{alert_id}:{channel}:{recipient}",
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(row)
+    return row
+
+class AlertSystemSender:
+    def __init__(self, get_alert_system: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the sender that delivers outbox rows through AlertSystem
+
+        Args:
+            get_alert_system: Returns the AlertSystem to use (a new one is built on first use if None)
+        """
+        self._get_alert_system = get_alert_system
+        self._alert_system = None
+
+    def _alert_system_instance(self):
+        """
+        Get the AlertSystem, importing it (and the provider libraries) on first use
+
+        Returns:
+            AlertSystem instance
+        """
+        if self._get_alert_system is not None:
+            return self._get_alert_system()
+        if self._alert_system is None:
+            from app.core.alert_system import AlertSystem
+            self._alert_system = AlertSystem()
+        return self._alert_system
+
+    def send(self, rows: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Send outbox rows, one channel send per channel and message
+
+        Rows sharing a channel and message go out in one send, so they share
+        the concurrent fan-out and a single SMTP session; all sends of the
+        batch run concurrently on the notification loop.
+
+        Args:
+            rows: Claimed outbox rows
+
+        Returns:
+            Per-row outcomes (success, provider_id, error, latency_ms, permanent) in row order
+        """
+        alert_system = self._alert_system_instance()
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+
+        groups: Dict[Tuple[str, Optional[str], str], List[int]] = {}
+        for index, row in enumerate(rows):
+            groups.setdefault((row.channel, row.subject, row.body), []).append(index)
+
+        async def send_groups():
+            return await asyncio.gather(*(
+                alert_system.send_channel_alert(
+                    channel, [rows[i].recipient for i in indexes], body, subject or "Emergency Alert",
+                    idempotency_keys=[rows[i].idempotency_key for i in indexes])
+                for (channel, subject, body), indexes in groups.items()
+            ))
+
+        if alert_system is None:
+            group_outcomes = [{"success": False, "error": "Alert system not available"}] * len(groups)
+        else:
+            group_outcomes = notification_runtime.run(send_groups())
+
+        for indexes, outcome in zip(groups.values(), group_outcomes):
+            results = outcome.get("results") if outcome.get("success") else None
+            for position, index in enumerate(indexes):
+                if results is None or position >= len(results):
+                    outcomes[index] = {"success": False, "error": outcome.get("error", "No result")}
+                    continue
+                result = results[position]
+                outcomes[index] = {
+                    "success": bool(result.get("success")),
+                    "provider_id": result.get("message_sid") or result.get("call_sid") or result.get("message_id"),
+                    "error": result.get("error"),
+                    "latency_ms": result.get("latency_ms"),
+                    # Retrying a token the provider no longer knows cannot succeed
+                    "permanent": bool(result.get("invalid_token"))
+                }
+
+        return outcomes
+
+class OutboxDispatcher:
+    def __init__(self, session_factory: Callable[[], Session], sender: Any = None, name: Optional[str] = None,
+                 workers: int = 1, batch_size: int = 20, lease_seconds: float = 60.0,
+                 poll_interval: float = 1.0, retry_base_delay: float = 2.0,
+                 retry_max_delay: float = 300.0, max_attempts: int = 8):
+        """
+        Initialize a dispatcher that delivers outbox rows
+
+        Args:
+            session_factory: Creates database sessions
+            sender: Object whose send(rows) returns per-row outcomes (AlertSystemSender if None);
+                an outcome with "permanent" set is failed without retries
+            name: Dispatcher name recorded with each attempt (host and PID if None)
+            workers: Number of dispatch threads
+            batch_size: Rows claimed per batch
+            lease_seconds: Time a claim stays valid before another dispatcher may take the row
+                (renewed every third of it while the batch is sending)
+            poll_interval: Seconds between polls when the outbox is empty
+            retry_base_delay: Delay before the first retry (seconds)
+            retry_max_delay: Upper bound on the retry delay (seconds)
+            max_attempts: Attempts before a row is marked failed
+        """
+        self.session_factory = session_factory
+        self.sender = sender or AlertSystemSender()
+        self._name = name
+        self.workers = workers
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.claimed = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.lease_renewals = 0
+
+    @property
+    def name(self) -> str:
+        """
+        Dispatcher name (read at use, so forked workers report their own PID)
+        """
+        return self._name or f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self):
+        """
+        Start the dispatch threads
+        """
+        if self._threads:
+            return
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"outbox-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Outbox dispatcher {self.name} started with {self.workers} workers")
+
+    def stop(self):
+        """
+        Stop the dispatch threads after their current batch
+        """
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def wake(self):
+        """
+        Check the outbox now instead of at the next poll (call after committing new rows)
+        """
+        self._wake.set()
+
+    def _run(self):
+        """
+        Dispatch batches until stopped, sleeping while the outbox is empty
+        """
+        while not self._stopping.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {str(e)}")
+                processed = 0
+            if not processed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def run_once(self) -> int:
+        """
+        Claim, send and record one batch
+
+        Returns:
+            Number of rows processed
+        """
+        db = self.session_factory()
+        try:
+            token, rows = self._claim(db)
+            if not rows:
+                return 0
+
+            started = datetime.utcnow()
+            sending = self._keep_lease(token)
+            with metrics.stage("notification_outbox", "send_batch"):
+                try:
+                    outcomes = self.sender.send(rows)
+                except Exception as e:
+                    logger.error(f"Outbox sender failed: {str(e)}")
+                    outcomes = [{"success": False, "error": str(e)}] * len(rows)
+                finally:
+                    sending.set()
+
+            self._record(db, token, rows, outcomes, started)
+            return len(rows)
+        finally:
+            db.close()
+
+    def _claim(self, db: Session) -> Tuple[str, List[Any]]:
+        """
+        Claim a batch of due rows
+
+        Candidates are selected first, then taken with an UPDATE that re-checks
+        they are still due, so concurrent dispatchers never win the same row.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Tuple of (claim token, claimed rows)
+        """
+        Outbox = models.user.NotificationOutbox
+        now = datetime.utcnow()
+        due = or_(
+            and_(Outbox.status == "pending", Outbox.next_attempt_at <= now),
+            # Claimed by a dispatcher that stopped before recording the outcome
+            and_(Outbox.status == "in_flight", Outbox.claimed_until < now)
+        )
+
+        ids = [row_id for (row_id,) in db.query(Outbox.id).filter(due).order_by(
+            Outbox.next_attempt_at, Outbox.id).limit(self.batch_size).all()]
+        if not ids:
+            db.rollback()
+            return "", []
+
+        token = uuid.uuid4().hex
+        claimed = db.query(Outbox).filter(Outbox.id.in_(ids), due).update({
+            "status": "in_flight",
+            "claim_token": token,
+            "claimed_until": now + timedelta(seconds=self.lease_seconds),
+            # Counted at claim time so a row that keeps crashing dispatchers still runs out of attempts
+            "attempts": Outbox.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+
+        if not claimed:
+            return token, []
+        with self._lock:
+            self.claimed += claimed
+        return token, db.query(Outbox).filter(Outbox.claim_token == token).order_by(Outbox.id).all()
+
+    def _keep_lease(self, token: str) -> threading.Event:
+        """
+        Renew the lease of a claimed batch until it has been sent
+
+        Args:
+            token: Claim token of the batch
+
+        Returns:
+            Event to set when the batch has been sent
+        """
+        Outbox = models.user.NotificationOutbox
+        sent = threading.Event()
+
+        def renew():
+            while not sent.wait(self.lease_seconds / 3):
+                db = self.session_factory()
+                try:
+                    db.query(Outbox).filter(Outbox.claim_token == token, Outbox.status == "in_flight").update(
+                        {"claimed_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds)},
+                        synchronize_session=False)
+                    db.commit()
+                    with self._lock:
+                        self.lease_renewals += 1
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Outbox lease renewal failed: {str(e)}")
+                finally:
+                    db.close()
+
+        threading.Thread(target=renew, name="outbox-lease", daemon=True).start()
+        return sent
+
+    def retry_delay(self, attempts: int) -> float:
+        """
+        Get the backoff before the next attempt
+
+        Args:
+            attempts: Attempts made so far
+
+        Returns:
+            Delay in seconds
+        """
+        return min(self.retry_base_delay * 2 ** (attempts - 1), self.retry_max_delay)
+
+    def _record(self, db: Session, token: str, rows: List[Any], outcomes: List[Dict[str, Any]], started: datetime):
+        """
+        Record the attempt of each row and schedule retries
+
+        Updates are conditional on the claim token, so a dispatcher whose
+        lease expired cannot overwrite the outcome of the row's new owner.
+
+        Args:
+            db: Database session
+            token: Claim token of the batch
+            rows: Claimed rows
+            outcomes: Per-row outcomes from the sender
+            started: When sending started
+        """
+        Outbox = models.user.NotificationOutbox
+        now = datetime.utcnow()
+        sent = retried = failed = 0
+
+        for row, outcome in zip(rows, outcomes):
+            success = bool(outcome.get("success"))
+            db.add(models.user.NotificationAttempt(
+                notification_id=row.id,
+                attempt=row.attempts,
+                dispatcher=self.name,
+                started_at=started,
+                latency_ms=outcome.get("latency_ms"),
+                success=success,
+                provider_id=outcome.get("provider_id"),
+                error=outcome.get("error")
+            ))
+
+            update = {"claim_token": None, "claimed_until": None, "last_error": outcome.get("error")}
+            if success:
+                update.update({"status": "sent", "sent_at": now, "provider_id": outcome.get("provider_id")})
+                sent += 1
+            elif outcome.get("permanent") or row.attempts >= self.max_attempts:
+                update["status"] = "failed"
+                failed += 1
+                logger.error(f"Notification {row.idempotency_key} failed after {row.attempts} attempts")
+            else:
+                update.update({
+                    "status": "pending",
+                    "next_attempt_at": now + timedelta(seconds=self.retry_delay(row.attempts))
+                })
+                retried += 1
+
+            db.query(Outbox).filter(Outbox.id == row.id, Outbox.claim_token == token).update(
+                update, synchronize_session=False)
+
+        db.commit()
+        with self._lock:
+            self.sent += sent
+            self.retried += retried
+            self.failed += failed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get dispatcher counters
+
+        Returns:
+            Dictionary with dispatcher configuration and outcome counts
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "running": bool(self._threads),
+                "claimed": self.claimed,
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+                "lease_renewals": self.lease_renewals
+            }
+
+def get_alert_notifications(db: Session, alert_id: int) -> List[Dict[str, Any]]:
+    """
+    Get the outbox rows of an alert with their attempts
+
+    Args:
+        db: Database session
+        alert_id: ID of the alert
+
+    Returns:
+        List of notification dictionaries
+    """
+    rows = db.query(models.user.NotificationOutbox).filter(
+        models.user.NotificationOutbox.alert_id == alert_id
+    ).order_by(models.user.NotificationOutbox.id).all()
+
+    return [
+        {
+            "id": row.id,
+            "channel": row.channel,
+            "recipient": row.recipient,
+            "status": row.status,
+            "attempts": row.attempts,
+            "next_attempt_at": row.next_attempt_at.isoformat() if row.next_attempt_at else None,
+            "sent_at": row.sent_at.isoformat() if row.sent_at else None,
+            "provider_id": row.provider_id,
+            "last_error": row.last_error,
+            "attempt_log": [
+                {
+                    "attempt": attempt.attempt,
+                    "dispatcher": attempt.dispatcher,
+                    "started_at": attempt.started_at.isoformat() if attempt.started_at else None,
+                    "latency_ms": attempt.latency_ms,
+                    "success": attempt.success,
+                    "error": attempt.error
+                }
+                for attempt in sorted(row.attempt_log, key=lambda a: a.id)
+            ]
+        }
+        for row in rows
+    ]
+
+def build_dispatcher(session_factory: Callable[[], Session], workers: Optional[int] = None) -> OutboxDispatcher:
+    """
+    Build a dispatcher configured from the environment
+
+    Args:
+        session_factory: Creates database sessions
+        workers: Number of dispatch threads (OUTBOX_DISPATCHER_WORKERS if None)
+
+    Returns:
+        Outbox dispatcher
+    """
+    return OutboxDispatcher(
+        session_factory,
+        workers=workers if workers is not None else int(os.getenv("OUTBOX_DISPATCHER_WORKERS", "1")),
+        batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "20")),
+        lease_seconds=float(os.getenv("OUTBOX_LEASE_SECONDS", "60")),
+        poll_interval=float(os.getenv("OUTBOX_POLL_SECONDS", "1")),
+        retry_base_delay=float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "2")),
+        retry_max_delay=float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "300")),
+        max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8")))
+
+def main():
+    parser = argparse.ArgumentParser(description="CareConnect notification dispatcher")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("OUTBOX_DISPATCHER_WORKERS", "1")),
+                        help="Dispatch threads in this process")
+    args = parser.parse_args()
+
+    from app.database import Base, engine
+    Base.metadata.create_all(bind=engine)
+
+    dispatcher = build_dispatcher(SessionLocal, workers=args.workers)
+    dispatcher.start()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(f"Outbox dispatcher stats: {dispatcher.get_stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dispatcher.stop()
+
+# Global dispatcher started by the API workers
+notification_dispatcher = build_dispatcher(SessionLocal)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import hashlib
+import logging
+import os
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.metrics import metrics
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SmtpSessionPool:
+    def __init__(self, host: str, port: int, username: str = "", password: str = "", size: int = 2,
+                 starttls: bool = True, timeout: float = 10.0, idle_timeout: float = 60.0):
+        """
+        Initialize a pool of authenticated SMTP sessions to one server
+
+        A sender checks out a session, sends its whole batch over it and
+        returns it, so a batch costs at most one connect, STARTTLS and login.
+        At most size sessions exist; further concurrent senders wait for one.
+
+        Args:
+            host: SMTP server host
+            port: SMTP server port
+            username: Login user (no login if empty)
+            password: Login password
+            size: Maximum number of open sessions
+            starttls: Upgrade the connection with STARTTLS before logging in
+            timeout: Socket timeout in seconds
+            idle_timeout: Seconds after which an idle session is replaced rather than reused
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []  # (session, returned at), most recent last
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.reconnects = 0
+
+    def _connect(self, timeout: Optional[float] = None) -> smtplib.SMTP:
+        """
+        Open and authenticate a new session
+
+        Args:
+            timeout: Socket timeout in seconds (the pool's timeout if None)
+
+        Returns:
+            Connected SMTP session
+        """
+        session = smtplib.SMTP(self.host, self.port, timeout=timeout or self.timeout)
+        try:
+            if self.starttls:
+                session.starttls()
+            if self.username:
+                session.login(self.username, self.password)
+        except Exception:
+            self._close(session)
+            raise
+        with self._lock:
+            self.connects += 1
+        return session
+
+    @staticmethod
+    def _close(session: Optional[smtplib.SMTP]):
+        """
+        Close a session, ignoring errors from a dead connection
+
+        Args:
+            session: Session to close
+        """
+        if session is None:
+            return
+        try:
+            session.quit()
+        except Exception:
+            session.close()
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """
+        Whether an error means the session is unusable (as opposed to a refused message)
+
+        Args:
+            error: Error raised by a send
+
+        Returns:
+            True if the session should be replaced
+        """
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == 421  # Service closing transmission channel
+        # smtplib errors subclass OSError; anything else from the socket means a dead connection
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+    @staticmethod
+    def _is_timeout(error: Exception) -> bool:
+        """
+        Whether an error comes from a socket timeout
+
+        smtplib reports a timed-out read or write as a disconnect, with the
+        timeout as its context.
+
+        Args:
+            error: Error raised by a send
+
+        Returns:
+            True if the server did not answer in time
+        """
+        return isinstance(error, TimeoutError) or isinstance(error.__context__, TimeoutError)
+
+    @classmethod
+    def _is_provider_failure(cls, error: Exception) -> bool:
+        """
+        Whether an error means the server is unhealthy (dead connection or temporary 4xx reply)
+
+        Args:
+            error: Error raised by a send
+
+        Returns:
+            True if the failure should count against the server's circuit breaker
+        """
+        if cls._is_connection_error(error):
+            return True
+        return isinstance(error, smtplib.SMTPResponseException) and 400 <= error.smtp_code < 500
+
+    def _checkout(self) -> Optional[smtplib.SMTP]:
+        """
+        Take the most recently used idle session, dropping stale ones
+
+        Returns:
+            Idle session, or None if a new one must be opened
+        """
+        now = time.monotonic()
+        stale = []
+        session = None
+        with self._lock:
+            while self._idle:
+                candidate, returned_at = self._idle.pop()
+                if now - returned_at < self.idle_timeout:
+                    session = candidate
+                    break
+                stale.append(candidate)
+        for candidate in stale:
+            self._close(candidate)
+        return session
+
+    def send_batch(self, messages: List[Message], channel: str = "email",
+                   message_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Send messages over one pooled session
+
+        If the connection drops, the session is reopened and the interrupted
+        message is retried once; a message the server refuses fails alone.
+        A message that hits its timeout is not retried and its session is dropped.
+
+        Args:
+            messages: Messages to send, each addressed by its To header
+            channel: Channel name for per-recipient latency metrics
+            message_timeout: Socket timeout for each message in seconds (the pool's timeout if None)
+
+        Returns:
+            Per-message results with success, latency_ms and (on failure) provider_failure
+            and timed_out, in message order
+        """
+        results = []
+        self._slots.acquire()
+        session = None
+        try:
+            session = self._checkout()
+            for message in messages:
+                started = time.perf_counter()
+                try:
+                    for attempt in range(2):
+                        try:
+                            if session is None:
+                                session = self._connect(message_timeout)
+                            elif session.sock is not None:
+                                session.sock.settimeout(message_timeout or self.timeout)
+                            session.send_message(message)
+                            break
+                        except Exception as e:
+                            if attempt == 1 or not self._is_connection_error(e) or self._is_timeout(e):
+                                raise
+                            self._close(session)
+                            session = None
+                            with self._lock:
+                                self.reconnects += 1
+                    result = {"success": True}
+                except Exception as e:
+                    result = {"success": False, "error": str(e), "provider_failure": self._is_provider_failure(e),
+                              "timed_out": self._is_timeout(e)}
+                    if self._is_connection_error(e):
+                        # A timed-out session is mid-command; closing it must not wait on the server
+                        if self._is_timeout(e):
+                            if session is not None:
+                                session.close()
+                        else:
+                            self._close(session)
+                        session = None
+                elapsed = time.perf_counter() - started
+                metrics.observe("notification_recipient", channel, elapsed)
+                result["latency_ms"] = round(elapsed * 1000, 2)
+                results.append(result)
+        finally:
+            if session is not None:
+                with self._lock:
+                    self._idle.append((session, time.monotonic()))
+            self._slots.release()
+        return results
+
+    def close(self):
+        """
+        Close all idle sessions
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session, _ in idle:
+            self._close(session)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get session pool statistics
+
+        Returns:
+            Dictionary with pool size, idle sessions and connection counts
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "connects": self.connects,
+                "reconnects": self.reconnects
+            }
+
+class SmtpPools:
+    def __init__(self, size: int = 2, starttls: bool = True, timeout: float = 10.0, idle_timeout: float = 60.0):
+        """
+        Initialize the registry of SMTP session pools, one per server and login
+
+        Args:
+            size: Sessions per pool
+            starttls: Upgrade connections with STARTTLS
+            timeout: Socket timeout in seconds
+            idle_timeout: Seconds after which an idle session is replaced
+        """
+        self.size = size
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._pools: Dict[Tuple[str, int, str, str], SmtpSessionPool] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str, port: int, username: str, password: str) -> SmtpSessionPool:
+        """
+        Get the pool for a server and login, creating it on first use
+
+        Args:
+            host: SMTP server host
+            port: SMTP server port
+            username: Login user
+            password: Login password
+
+        Returns:
+            Session pool
+        """
+        key = (host, port, username, hashlib.sha256(password.encode()).hexdigest())
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = SmtpSessionPool(
+                    host, port, username, password, size=self.size, starttls=self.starttls,
+                    timeout=self.timeout, idle_timeout=self.idle_timeout)
+        return pool
+
+    def close(self):
+        """
+        Close the idle sessions of all pools
+        """
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
+
+# Global SMTP session pools shared by the email channel
+smtp_pools = SmtpPools(
+    size=int(os.getenv("SMTP_POOL_SIZE", "2")),
+    starttls=os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+    timeout=float(os.getenv("SMTP_TIMEOUT_SECONDS", "10")),
+    idle_timeout=float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60")))
@@ -0,0 +1,354 @@
+"""
+Push notification providers
+
+The push channel hands each provider a batch of device tokens instead of
+sending device by device. Providers are pluggable: FcmPushProvider fans a
+batch out over the Firebase Cloud Messaging HTTP v1 API on the pooled HTTP
+client, LocalPushProvider is an in-process stand-in for development, tests
+and benchmarks. Both report per-token results and flag tokens that can
+never be delivered to, so the channel can prune them from the registry.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from app.core.notification_channels import NotificationProviderError, NotificationRuntime
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# python-jose signs the service account assertion exchanged for FCM access tokens
+try:
+    from jose import jwt as jose_jwt
+    JOSE_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"python-jose not available: {e}. FCM push notifications are disabled.")
+    JOSE_AVAILABLE = False
+    jose_jwt = None
+
+FCM_SCOPE = "https://www.googleapis.com/auth/firebase.messaging"
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+# FCM error codes meaning the token is gone for good (app uninstalled, token rotated or from another project)
+INVALID_TOKEN_ERRORS = {"UNREGISTERED", "SENDER_ID_MISMATCH"}
+
+class PushProvider:
+    name = ""
+    max_batch = 500
+
+    def configuration_error(self) -> Optional[str]:
+        """
+        Check the provider can send
+
+        Returns:
+            Error message if the provider is not configured, else None
+        """
+        return None
+
+    async def send_multicast(self, tokens: List[str], title: str, body: str, data: Dict[str, Any],
+                             idempotency_keys: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Send one notification to up to max_batch device tokens
+
+        Args:
+            tokens: Device tokens
+            title: Notification title
+            body: Notification body
+            data: Custom key/value payload
+            idempotency_keys: Delivery key per token, added to the data payload so
+                the app can drop a repeated delivery
+
+        Returns:
+            Per-token results (success, message_id or error, invalid_token) in token order
+
+        Raises:
+            NotificationProviderError: If the provider failed the whole batch
+        """
+        raise NotImplementedError
+
+def load_service_account(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Read a Google service account key file
+
+    Args:
+        path: Path of the JSON key file, or None
+
+    Returns:
+        Service account fields, or None if no path is given or the file cannot be read
+    """
+    if not path:
+        return None
+    try:
+        with open(path) as key_file:
+            return json.load(key_file)
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot read FCM service account {path}: {str(e)}")
+        return None
+
+class ServiceAccountTokens:
+    def __init__(self, runtime: NotificationRuntime, credentials: Dict[str, Any], scope: str = FCM_SCOPE,
+                 refresh_margin: float = 300.0):
+        """
+        Initialize the OAuth2 access token source of a service account
+
+        Tokens come from the JWT bearer grant (an assertion signed with the
+        account's private key, exchanged at its token URI) and are reused
+        until shortly before they expire. Concurrent batches on one loop
+        share a single refresh.
+
+        Args:
+            runtime: Shared HTTP client
+            credentials: Service account key (client_email, private_key, private_key_id, token_uri)
+            scope: OAuth2 scope requested
+            refresh_margin: Seconds before expiry at which a token is replaced
+        """
+        self.runtime = runtime
+        self.credentials = credentials
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.token_uri = credentials.get("token_uri") or GOOGLE_TOKEN_URI
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = \
+            weakref.WeakKeyDictionary()
+        self.refreshes = 0
+
+    async def get(self) -> str:
+        """
+        Get a valid access token, fetching a new one if needed
+
+        Returns:
+            Bearer access token
+
+        Raises:
+            NotificationProviderError: If the token endpoint refused the assertion
+        """
+        if self._token is not None and time.monotonic() < self._expires_at:
+            return self._token
+
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        async with lock:
+            if self._token is not None and time.monotonic() < self._expires_at:
+                # Fetched by a concurrent batch
+                return self._token
+            return await self._refresh()
+
+    async def _refresh(self) -> str:
+        """
+        Exchange a signed assertion for a new access token
+
+        Returns:
+            Bearer access token
+        """
+        now = int(time.time())
+        headers = {"kid": self.credentials["private_key_id"]} if self.credentials.get("private_key_id") else None
+        assertion = jose_jwt.encode({
+            "iss": self.credentials["client_email"],
+            "scope": self.scope,
+            "aud": self.token_uri,
+            "iat": now,
+            "exp": now + 3600
+        }, self.credentials["private_key"], algorithm="RS256", headers=headers)
+
+        response = await self.runtime.http_client().post(self.token_uri, data={
+            "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+            "assertion": assertion
+        })
+        if response.status_code >= 400:
+            raise NotificationProviderError(
+                f"OAuth2 token error {response.status_code}: {response.text}", response.status_code)
+
+        payload = response.json()
+        self._token = payload["access_token"]
+        self._expires_at = time.monotonic() + float(payload.get("expires_in", 3600)) - self.refresh_margin
+        self.refreshes += 1
+        return self._token
+
+    def invalidate(self):
+        """
+        Drop the cached token (after the API refused it)
+        """
+        self._token = None
+
+class FcmPushProvider(PushProvider):
+    name = "fcm"
+
+    def __init__(self, runtime: NotificationRuntime, credentials: Optional[Dict[str, Any]],
+                 project_id: Optional[str] = None, base_url: str = "https://fcm.googleapis.com",
+                 max_batch: int = 500, concurrency: int = 100):
+        """
+        Initialize the Firebase Cloud Messaging provider (HTTP v1 API)
+
+        Args:
+            runtime: Shared HTTP client
+            credentials: Service account key with access to the Firebase project
+            project_id: Firebase project ID (the service account's project if None)
+            base_url: FCM API base URL
+            max_batch: Tokens per batch handed to send_multicast
+            concurrency: Sends in flight per batch
+        """
+        self.runtime = runtime
+        self.credentials = credentials
+        self.project_id = project_id or (credentials or {}).get("project_id")
+        self.base_url = base_url.rstrip("/")
+        self.max_batch = max_batch
+        self.concurrency = concurrency
+        self.tokens = ServiceAccountTokens(runtime, credentials) if credentials else None
+
+    def configuration_error(self) -> Optional[str]:
+        if not self.credentials or not self.project_id:
+            return "FCM not configured"
+        if not JOSE_AVAILABLE:
+            return "python-jose library not installed"
+        return None
+
+    @staticmethod
+    def _error_code(response) -> str:
+        """
+        Get the FCM error code of a failed send
+
+        Args:
+            response: Error response
+
+        Returns:
+            FCM error code (e.g. "UNREGISTERED"), else the API status
+        """
+        try:
+            error = response.json().get("error", {})
+        except ValueError:
+            return response.text[:200]
+        for detail in error.get("details", []):
+            if detail.get("errorCode"):
+                return detail["errorCode"]
+        return error.get("status") or str(response.status_code)
+
+    async def send_multicast(self, tokens, title, body, data, idempotency_keys=None):
+        """
+        Send the notification to every token, one HTTP v1 request per token
+
+        The v1 API has no multicast request, so the batch fans out over the
+        pooled HTTP client, at most concurrency requests at a time, all with
+        one cached access token.
+        """
+        access_token = await self.tokens.get()
+        client = self.runtime.http_client()
+        url = f"{self.base_url}/v1/projects/{self.project_id}/messages:send"
+        headers = {"Authorization": f"Bearer {access_token}"}
+        # Data payload values must be strings
+        data = {str(key): str(value) for key, value in data.items()}
+        slots = asyncio.Semaphore(self.concurrency)
+
+        keys = idempotency_keys or [None] * len(tokens)
+
+        async def send_one(token: str, key: Optional[str]):
+            message = {
+                "token": token,
+                "notification": {"title": title, "body": body},
+                "data": {**data, "idempotency_key": key} if key else data,
+                "android": {"priority": "high"},
+                "apns": {"headers": {"apns-priority": "10"}}
+            }
+            async with slots:
+                try:
+                    response = await client.post(url, json={"message": message}, headers=headers)
+                except Exception as e:
+                    return {"success": False, "error": str(e)}, None
+            if response.status_code < 400:
+                return {"success": True, "message_id": response.json().get("name")}, response.status_code
+            error_code = self._error_code(response)
+            return {"success": False, "error": f"FCM error {response.status_code}: {error_code}",
+                    "invalid_token": error_code in INVALID_TOKEN_ERRORS}, response.status_code
+
+        sent = await asyncio.gather(*(send_one(token, key) for token, key in zip(tokens, keys)))
+        if any(status == 401 for _, status in sent):
+            # Revoked before it expired: the next batch fetches a new one
+            self.tokens.invalidate()
+
+        # Every send failed on the provider's side: report the batch as failed so the breaker counts it
+        provider_failures = [
+            status for result, status in sent
+            if not result["success"] and not result.get("invalid_token")
+            and (status is None or status >= 500 or status in (401, 403, 429))
+        ]
+        if tokens and len(provider_failures) == len(tokens):
+            raise NotificationProviderError(sent[0][0]["error"], provider_failures[0])
+        return [result for result, _ in sent]
+
+class LocalPushProvider(PushProvider):
+    name = "local"
+
+    def __init__(self, max_batch: int = 500, latency: float = 0.0, invalid_tokens: Optional[Set[str]] = None,
+                 history: int = 1000):
+        """
+        Initialize the in-process push stand-in
+
+        Tokens starting with "invalid" or listed in invalid_tokens are
+        answered with UNREGISTERED, like uninstalled apps.
+
+        Args:
+            max_batch: Tokens per multicast request
+            latency: Seconds each request takes
+            invalid_tokens: Tokens to reject
+            history: Most recent deliveries kept in delivered
+        """
+        self.max_batch = max_batch
+        self.latency = latency
+        self.invalid_tokens = set(invalid_tokens or ())
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.delivered: Deque[Dict[str, Any]] = deque(maxlen=history)
+
+    async def send_multicast(self, tokens, title, body, data, idempotency_keys=None):
+        if len(tokens) > self.max_batch:
+            raise NotificationProviderError(f"Batch of {len(tokens)} exceeds {self.max_batch} tokens", 400)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        results = []
+        with self._lock:
+            self.requests += 1
+            for token, key in zip(tokens, idempotency_keys or [None] * len(tokens)):
+                if token.startswith("invalid") or token in self.invalid_tokens:
+                    results.append({"success": False, "error": "UNREGISTERED", "invalid_token": True})
+                    continue
+                message_id = f"local-{next(self._ids)}"
+                self.delivered.append({"token": token, "title": title, "body": body, "message_id": message_id,
+                                       "idempotency_key": key})
+                results.append({"success": True, "message_id": message_id})
+        return results
+
+def build_push_provider(runtime: NotificationRuntime) -> PushProvider:
+    """
+    Build the push provider selected by PUSH_PROVIDER
+
+    Args:
+        runtime: Shared HTTP client
+
+    Returns:
+        Push provider ("local" stand-in unless PUSH_PROVIDER=fcm)
+    """
+    max_batch = int(os.getenv("PUSH_BATCH_SIZE", "500"))
+    provider = os.getenv("PUSH_PROVIDER", "local").lower()
+    if provider == "fcm":
+        credentials = load_service_account(
+            os.getenv("FCM_SERVICE_ACCOUNT_FILE") or os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
+        return FcmPushProvider(runtime, credentials, os.getenv("FCM_PROJECT_ID") or None,
+                               os.getenv("FCM_API_BASE_URL", "https://fcm.googleapis.com"), max_batch,
+                               int(os.getenv("FCM_CONCURRENCY", "100")))
+    if provider != "local":
+        logger.warning(f"Unknown push provider {provider}, using the local stand-in")
+    logger.warning("Push notifications use the local stand-in and reach no device; set PUSH_PROVIDER=fcm")
+    return LocalPushProvider(max_batch)
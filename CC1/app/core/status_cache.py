@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Session.info key holding the users whose alerts changed in the current transaction
+_CHANGED_USERS_KEY = "status_cache_changed_users"
+
+class StatusCache:
+    def __init__(self, ttl: float = 30.0, recent_alerts: int = 5, max_entries: int = 10000):
+        """
+        Initialize the in-memory cache of per-user detection status
+
+        Entries are invalidated when a transaction that wrote one of the user's
+        alerts commits in this process. The TTL bounds staleness for writes made
+        by other processes (e.g. other pre-fork workers).
+
+        Args:
+            ttl: Seconds an entry may be served without re-reading the database
+            recent_alerts: Number of recent alerts reported per user
+            max_entries: Number of users cached before the cache is cleared
+        """
+        self.ttl = ttl
+        self.recent_alerts = recent_alerts
+        self.max_entries = max_entries
+        self._entries: Dict[int, Tuple[Dict[str, Any], str, float]] = {}  # user -> (status, digest, loaded at)
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_many(self, db: Session, user_ids: List[int]) -> List[Tuple[Dict[str, Any], str]]:
+        """
+        Get the status of several users, loading all misses with one query
+
+        Args:
+            db: Database session
+            user_ids: IDs of the users, in response order
+
+        Returns:
+            List of (status, content digest) in the order of user_ids
+        """
+        now = time.monotonic()
+        found: Dict[int, Tuple[Dict[str, Any], str]] = {}
+        missing: List[int] = []
+
+        with self._lock:
+            for user_id in dict.fromkeys(user_ids):
+                entry = self._entries.get(user_id)
+                if entry is not None and now - entry[2] < self.ttl:
+                    found[user_id] = entry[:2]
+                else:
+                    missing.append(user_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+            # A write committed while we query makes the loaded row stale: don't cache it then
+            generations = {user_id: self._generations.get(user_id, 0) for user_id in missing}
+
+        if missing:
+            loaded = self._load(db, missing)
+            with self._lock:
+                if len(self._entries) + len(loaded) > self.max_entries:
+                    self._entries.clear()
+                for user_id, status in loaded.items():
+                    digest = hashlib.sha1(json.dumps(status, sort_keys=True).encode()).hexdigest()
+                    found[user_id] = (status, digest)
+                    if self._generations.get(user_id, 0) == generations[user_id]:
+                        self._entries[user_id] = (status, digest, now)
+
+        return [found[user_id] for user_id in user_ids]
+
+    def _load(self, db: Session, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Read users and their most recent alerts in a single query
+
+        Args:
+            db: Database session
+            user_ids: IDs of the users to load
+
+        Returns:
+            Mapping of user ID to status
+        """
+        Alert = models.user.Alert
+        User = models.user.User
+
+        # Number each user's alerts newest first, then keep the first few per user
+        ranked = db.query(
+            Alert.id, Alert.user_id, Alert.timestamp, Alert.alert_type, Alert.status, Alert.notes,
+            func.row_number().over(
+                partition_by=Alert.user_id,
+                order_by=(Alert.timestamp.desc(), Alert.id.desc())
+            ).label("rank")
+        ).filter(Alert.user_id.in_(user_ids)).subquery()
+
+        rows = db.query(
+            User.id.label("user_id"), User.full_name, ranked.c.id.label("alert_id"), ranked.c.timestamp,
+            ranked.c.alert_type, ranked.c.status, ranked.c.notes
+        ).outerjoin(
+            ranked, (ranked.c.user_id == User.id) & (ranked.c.rank <= self.recent_alerts)
+        ).filter(User.id.in_(user_ids)).order_by(User.id, ranked.c.rank).all()
+
+        statuses = {user_id: {"user_id": user_id, "user_name": "Unknown", "active_alerts": 0, "recent_alerts": []}
+                    for user_id in user_ids}
+        for row in rows:
+            status = statuses[row.user_id]
+            status["user_name"] = row.full_name
+            if row.alert_id is None:
+                continue
+            status["recent_alerts"].append({
+                "id": row.alert_id,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+                "type": row.alert_type,
+                "status": row.status,
+                "notes": row.notes
+            })
+            if row.status == "pending":
+                status["active_alerts"] += 1
+
+        return statuses
+
+    def invalidate(self, user_ids: Iterable[int]):
+        """
+        Drop cached status of users whose alerts changed
+
+        Args:
+            user_ids: IDs of the users
+        """
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                self.invalidations += 1
+
+    def clear(self):
+        """
+        Drop all cached status
+        """
+        with self._lock:
+            for user_id in self._entries:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache hit statistics
+
+        Returns:
+            Dictionary with entries, hits, misses and invalidations
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl
+            }
+
+def combined_etag(digests: Iterable[str]) -> str:
+    """
+    Build a strong ETag from per-user status digests
+
+    Args:
+        digests: Content digests in response order
+
+    Returns:
+        Quoted ETag value
+    """
+    return '"' + hashlib.sha1("".join(digests).encode()).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag
+
+    Args:
+        if_none_match: Header value (may list several tags or be "*")
+        etag: Current ETag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def mark_alerts_changed(db: Session, user_id: int):
+    """
+    Invalidate a user's status when the session's transaction commits
+
+    Needed for bulk query updates, which the flush listener does not see.
+
+    Args:
+        db: Database session making the change
+        user_id: ID of the user whose alerts changed
+    """
+    db.info.setdefault(_CHANGED_USERS_KEY, set()).add(user_id)
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_alerts(session: Session, flush_context):
+    changed: Set[int] = session.info.setdefault(_CHANGED_USERS_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.user.Alert):
+            if obj.user_id is not None:
+                changed.add(obj.user_id)
+            # An alert moved to another user changes the old user's status too
+            changed.update(u for u in inspect(obj).attrs.user_id.history.deleted if u is not None)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_alerts(session: Session):
+    changed = session.info.pop(_CHANGED_USERS_KEY, None)
+    if changed:
+        status_cache.invalidate(changed)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_alerts(session: Session):
+    session.info.pop(_CHANGED_USERS_KEY, None)
+
+# Global status cache shared by the status endpoints
+status_cache = StatusCache(
+    ttl=float(os.getenv("STATUS_CACHE_TTL_SECONDS", "30")),
+    recent_alerts=int(os.getenv("STATUS_RECENT_ALERTS", "5")))
@@ -5,6 +5,8 @@ import asyncio
 import websockets
 from datetime import datetime
 
+from app.core.metrics import metrics
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -54,6 +56,7 @@ class ConnectionManager:
             
         logger.info(f"Client {client_id} disconnected. Total connections: {len(self.active_connections)}")
 
+    @metrics.timed("connection_manager", "send")
     async def send_personal_message(self, message: str, client_id: str):
         """
         Send a message to a specific client
@@ -75,6 +78,7 @@ class ConnectionManager:
         else:
             logger.warning(f"Client {client_id} not found")
 
+    @metrics.timed("connection_manager", "broadcast")
     async def broadcast(self, message: str):
         """
         Broadcast a message to all connected clients
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Boolean, ForeignKey, Float, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -28,6 +28,7 @@ class User(Base):
     # Relationships
     locations = relationship("Location", back_populates="user")
     alerts = relationship("Alert", back_populates="user")
+    device_tokens = relationship("DeviceToken", back_populates="user")
 
 class Location(Base):
     __tablename__ = "locations"
@@ -43,6 +44,30 @@ class Location(Base):
     # Relationships
     user = relationship("User", back_populates="locations")
 
+class DeviceToken(Base):
+    __tablename__ = "device_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    token = Column(String, unique=True, index=True)
+    platform = Column(String)  # android, ios, web
+    is_active = Column(Boolean, default=True)
+    invalid_reason = Column(String, nullable=True)  # set when the push provider rejects the token
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="device_tokens")
+
+class NotificationPreference(Base):
+    __tablename__ = "notification_preferences"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
+    locale = Column(String, default="en")  # language of the alerts the user receives, e.g. "es"
+    channels = Column(String, nullable=True)  # allowed channels, most preferred first, e.g. "whatsapp,email"; null allows all
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class Alert(Base):
     __tablename__ = "alerts"
     
@@ -51,9 +76,77 @@ class Alert(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     location_lat = Column(String)
     location_lng = Column(String)
-    status = Column(String)  # pending, acknowledged, resolved
+    status = Column(String)  # pending, acknowledged, resolved, false_alarm
     alert_type = Column(String)  # fall_detected, manual_trigger, etc.
     notes = Column(String)
     
     # Relationships
-    user = relationship("User", back_populates="alerts")
\ No newline at end of file
+    user = relationship("User", back_populates="alerts")
+
+class DetectionScore(Base):
+    __tablename__ = "detection_scores"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    video_confidence = Column(Float)
+    audio_confidence = Column(Float)
+    hybrid_confidence = Column(Float)
+    
+    # Relationships
+    alert = relationship("Alert")
+
+class DetectionCalibration(Base):
+    __tablename__ = "detection_calibrations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
+    video_weight = Column(Float)
+    audio_weight = Column(Float)
+    threshold = Column(Float)
+    sample_count = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    channel = Column(String)  # sms, whatsapp, email, push, voice
+    recipient = Column(String)
+    subject = Column(String, nullable=True)
+    body = Column(String)
+    idempotency_key = Column(String, unique=True)
+    status = Column(String, default="pending")  # pending, in_flight, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime)
+    claim_token = Column(String, nullable=True, index=True)
+    claimed_until = Column(DateTime, nullable=True)
+    provider_id = Column(String, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    attempt_log = relationship("NotificationAttempt", back_populates="notification")
+    
+    # Dispatchers look for due rows by status and time
+    __table_args__ = (Index("ix_notification_outbox_due", "status", "next_attempt_at"),)
+
+class NotificationAttempt(Base):
+    __tablename__ = "notification_attempts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    notification_id = Column(Integer, ForeignKey("notification_outbox.id"), index=True)
+    attempt = Column(Integer)
+    dispatcher = Column(String)
+    started_at = Column(DateTime)
+    latency_ms = Column(Float)
+    success = Column(Boolean)
+    provider_id = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    
+    # Relationships
+    notification = relationship("NotificationOutbox", back_populates="attempt_log")
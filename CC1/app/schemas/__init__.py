@@ -1 +1 @@
-from .user import User, UserCreate, UserUpdate, Location, LocationCreate, LocationUpdate, Alert, AlertCreate, AlertUpdate, UserRole
\ No newline at end of file
+from .user import User, UserCreate, UserUpdate, Location, LocationCreate, LocationUpdate, Alert, AlertCreate, AlertUpdate, UserRole, DeviceToken, DeviceTokenCreate, NotificationPreference, NotificationPreferenceUpdate
\ No newline at end of file
@@ -51,6 +51,33 @@ class Location(LocationBase):
     class Config:
         from_attributes = True
 
+class DeviceTokenBase(BaseModel):
+    token: str
+    platform: str = "android"
+
+class DeviceTokenCreate(DeviceTokenBase):
+    pass
+
+class DeviceToken(DeviceTokenBase):
+    id: int
+    user_id: int
+    is_active: bool
+    created_at: datetime
+    last_seen_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class NotificationPreferenceBase(BaseModel):
+    locale: str = "en"
+    channels: Optional[List[str]] = None  # most preferred first; None allows every channel
+
+class NotificationPreferenceUpdate(NotificationPreferenceBase):
+    pass
+
+class NotificationPreference(NotificationPreferenceBase):
+    user_id: int
+
 class AlertBase(BaseModel):
     location_lat: str
     location_lng: str
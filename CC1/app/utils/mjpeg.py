@@ -0,0 +1,72 @@
+from typing import List, Optional, Tuple
+
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+
+def split_multipart_mjpeg(body: bytes, boundary: str) -> List[Tuple[bytes, Optional[float]]]:
+    """
+    Split a multipart/x-mixed-replace MJPEG body into JPEG frames
+
+    Each part may carry an X-Timestamp header (seconds) with the capture time.
+
+    Args:
+        body: Raw request body
+        boundary: Multipart boundary from the Content-Type header
+
+    Returns:
+        List of (jpeg_bytes, timestamp or None)
+    """
+    delimiter = b"--" + boundary.strip('"').encode()
+    frames = []
+
+    for part in body.split(delimiter):
+        # Skip the preamble and the closing "--" marker
+        if not part.strip() or part.startswith(b"--"):
+            continue
+
+        header_end = part.find(b"\r\n\r\n")
+        if header_end == -1:
+            continue
+
+        timestamp = None
+        for line in part[:header_end].split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"x-timestamp":
+                try:
+                    timestamp = float(value.strip())
+                except ValueError:
+                    timestamp = None
+
+        payload = part[header_end + 4:]
+        if payload.endswith(b"\r\n"):
+            payload = payload[:-2]
+        if payload:
+            frames.append((payload, timestamp))
+
+    return frames
+
+def split_concatenated_jpeg(body: bytes) -> List[bytes]:
+    """
+    Split a raw stream of back-to-back JPEG images on their SOI/EOI markers
+
+    Args:
+        body: Concatenated JPEG data
+
+    Returns:
+        List of JPEG images
+    """
+    frames = []
+    start = body.find(JPEG_SOI)
+
+    while start != -1:
+        # EOI directly followed by the next SOI (or end of data) ends the image
+        end = body.find(JPEG_EOI, start + 2)
+        while end != -1 and end + 2 < len(body) and body[end + 2:end + 4] != JPEG_SOI:
+            end = body.find(JPEG_EOI, end + 2)
+        if end == -1:
+            break
+
+        frames.append(body[start:end + 2])
+        start = body.find(JPEG_SOI, end + 2)
+
+    return frames
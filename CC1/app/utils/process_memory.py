@@ -0,0 +1,72 @@
+import os
+import sys
+from typing import Dict, Optional
+
+# Not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def _read_kb_fields(path: str) -> Dict[str, int]:
+    """
+    Read "Name:   123 kB" lines from a /proc file
+
+    Args:
+        path: Path of the /proc file
+
+    Returns:
+        Mapping of field name to kilobytes
+    """
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            parts = value.split()
+            if len(parts) == 2 and parts[1] == "kB":
+                fields[name.strip()] = int(parts[0])
+    return fields
+
+def read_process_memory(pid: Optional[int] = None) -> Dict[str, Optional[float]]:
+    """
+    Get the memory use of a process in megabytes
+
+    On Linux, PSS splits shared pages between the processes mapping them and
+    "shared" counts pages another process also maps (e.g. model weights
+    inherited copy-on-write from a pre-fork parent). Elsewhere only the
+    peak RSS of the current process is available.
+
+    Args:
+        pid: Process ID (defaults to the current process)
+
+    Returns:
+        Dictionary with rss_mb, pss_mb, shared_mb and private_mb (None if unknown)
+    """
+    pid = os.getpid() if pid is None else pid
+    memory = {"pid": pid, "rss_mb": None, "pss_mb": None, "shared_mb": None, "private_mb": None}
+
+    try:
+        rollup = _read_kb_fields(f"/proc/{pid}/smaps_rollup")
+        memory["rss_mb"] = round(rollup.get("Rss", 0) / 1024, 1)
+        memory["pss_mb"] = round(rollup.get("Pss", 0) / 1024, 1)
+        memory["shared_mb"] = round(
+            (rollup.get("Shared_Clean", 0) + rollup.get("Shared_Dirty", 0)) / 1024, 1)
+        memory["private_mb"] = round(
+            (rollup.get("Private_Clean", 0) + rollup.get("Private_Dirty", 0)) / 1024, 1)
+        return memory
+    except OSError:
+        pass
+
+    try:
+        status = _read_kb_fields(f"/proc/{pid}/status")
+        memory["rss_mb"] = round(status.get("VmRSS", 0) / 1024, 1)
+        return memory
+    except OSError:
+        pass
+
+    if pid == os.getpid() and resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memory["rss_mb"] = round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+    return memory
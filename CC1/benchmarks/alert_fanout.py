@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Drive AlertSystem.send_multi_channel_alert against local fake providers
+
+Starts a fake Twilio API and an SMTP sink (see fake_providers.py), points
+the alert channels at them and sends alerts open-loop at each requested
+rate. For every rate it reports the achieved alerts/s, p50/p99
+time-to-deliver (alert scheduled until all of its channels finished),
+failed sends, and the peak threads and provider connections used.
+
+Usage:
+    python benchmarks/alert_fanout.py --rates 10,50,100,200 --duration 5
+    python benchmarks/alert_fanout.py --latency-ms 150 --failure-rate 0.05 --recipients 5
+    python benchmarks/alert_fanout.py --smtp-sessions 16
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_providers import FakeSmtpServer, FakeTwilioServer, FaultInjector
+
+def configure_environment(twilio: FakeTwilioServer, smtp: FakeSmtpServer, smtp_sessions: int):
+    """
+    Point the alert channels at the fake providers
+
+    Must run before the app modules are imported: they read their settings at import.
+
+    Args:
+        twilio: Running fake Twilio server
+        smtp: Running SMTP sink
+        smtp_sessions: SMTP sessions in the email channel's pool
+    """
+    os.environ.update({
+        "TWILIO_API_BASE_URL": twilio.base_url,
+        "TWILIO_ACCOUNT_SID": "AC" + "0" * 32,
+        "TWILIO_AUTH_TOKEN": "benchmark",
+        "TWILIO_PHONE_NUMBER": "+15550000000",
+        "WHATSAPP_ENABLED": "true",
+        "SMTP_SERVER": "127.0.0.1",
+        "SMTP_PORT": str(smtp.port),
+        "SMTP_STARTTLS": "false",
+        "SMTP_POOL_SIZE": str(smtp_sessions),
+        "EMAIL_USERNAME": "alerts@careconnect.local",
+        "EMAIL_PASSWORD": "benchmark"
+    })
+
+def count_failed_sends(result: Dict[str, Any]) -> int:
+    """
+    Count the failed recipient sends of a multi-channel result
+
+    Args:
+        result: Result of send_multi_channel_alert
+
+    Returns:
+        Number of failed sends
+    """
+    failed = 0
+    for channel_result in result["channels"].values():
+        for recipient_result in channel_result.get("results", []):
+            failed += not recipient_result.get("success")
+    return failed
+
+async def run_rate(alert_system, rate: float, duration: float, recipients: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Send alerts open-loop at a fixed rate and time each one
+
+    Args:
+        alert_system: AlertSystem under test
+        rate: Alerts started per second
+        duration: Seconds to keep sending
+        recipients: Recipients of every alert per channel
+
+    Returns:
+        Throughput, latency and resource usage of the run
+    """
+    loop = asyncio.get_running_loop()
+    alert_data = {"user_name": "Benchmark User", "location": "Living Room", "status": "Fall Detected"}
+    latencies: List[float] = []
+    failed = [0]
+    peak_threads = [threading.active_count()]
+
+    async def send(scheduled: float):
+        result = await alert_system.send_multi_channel_alert(recipients, alert_data)
+        latencies.append(loop.time() - scheduled)
+        failed[0] += count_failed_sends(result)
+
+    async def sample_threads():
+        while True:
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample_threads())
+    count = max(1, int(rate * duration))
+    started = loop.time()
+    tasks = []
+    for index in range(count):
+        # Open loop: alerts start on schedule whether or not earlier ones finished
+        scheduled = started + index / rate
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+    sampler.cancel()
+
+    return {
+        "alerts": count,
+        "alerts_per_second": count / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+        "failed_sends": failed[0],
+        "peak_threads": peak_threads[0]
+    }
+
+async def run_benchmark(args, twilio: FakeTwilioServer, smtp: FakeSmtpServer):
+    from app.core.alert_system import AlertSystem
+    from app.core.notification_channels import notification_runtime
+
+    alert_system = AlertSystem()
+    recipients = {
+        "sms": [f"+1555010{i:04d}" for i in range(args.recipients)],
+        "whatsapp": [f"+1555020{i:04d}" for i in range(args.recipients)],
+        "email": [f"caregiver{i}@example.com" for i in range(args.recipients)],
+        "push": [f"device-token-{i}" for i in range(args.recipients)]
+    }
+
+    # One alert to open the pooled connections before measuring
+    await alert_system.send_multi_channel_alert(recipients, {"user_name": "Warm-up"})
+
+    print(f"{'rate':>6} {'alerts/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7} "
+          f"{'threads':>8} {'http conns':>11} {'smtp conns':>11}")
+    for rate in args.rates:
+        twilio_before = twilio.faults.get_stats()["connections"]
+        smtp_before = smtp.faults.get_stats()["connections"]
+        twilio.faults.reset_peak()
+        smtp.faults.reset_peak()
+
+        result = await run_rate(alert_system, rate, args.duration, recipients)
+
+        twilio_stats = twilio.faults.get_stats()
+        smtp_stats = smtp.faults.get_stats()
+        # Connections opened during the run / peak open at once
+        http_conns = f"{twilio_stats['connections'] - twilio_before}/{twilio_stats['peak_connections']}"
+        smtp_conns = f"{smtp_stats['connections'] - smtp_before}/{smtp_stats['peak_connections']}"
+        print(f"{rate:>6g} {result['alerts_per_second']:>9.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+              f"{result['failed_sends']:>7} {result['peak_threads']:>8} {http_conns:>11} {smtp_conns:>11}")
+
+    await notification_runtime.aclose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-channel alert fan-out benchmark")
+    parser.add_argument("--rates", type=lambda s: [float(r) for r in s.split(",")], default=[10, 50, 100, 200],
+                        help="Comma separated alert rates (alerts/s)")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per rate")
+    parser.add_argument("--recipients", type=int, default=3, help="Recipients per channel of each alert")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Provider latency per send")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Random extra provider latency")
+    parser.add_argument("--smtp-sessions", type=int, default=int(os.getenv("SMTP_POOL_SIZE", "2")),
+                        help="SMTP sessions in the email pool (each alert's email batch holds one)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of sends the providers fail")
+    args = parser.parse_args()
+
+    def faults():
+        return FaultInjector(args.latency_ms / 1000, args.jitter_ms / 1000, args.failure_rate)
+
+    twilio = FakeTwilioServer(faults=faults()).start()
+    smtp = FakeSmtpServer(faults=faults()).start()
+    configure_environment(twilio, smtp, args.smtp_sessions)
+
+    print(f"Provider latency {args.latency_ms:g}ms (+{args.jitter_ms:g}ms jitter), "
+          f"failure rate {args.failure_rate:g}, {args.recipients} recipients per channel, "
+          f"{args.smtp_sessions} SMTP sessions")
+    try:
+        asyncio.run(run_benchmark(args, twilio, smtp))
+    finally:
+        twilio.stop()
+        smtp.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the notification providers
+
+FakeTwilioServer answers the Twilio Messages and Calls REST endpoints and
+FakeSmtpServer accepts mail over SMTP (with AUTH, without TLS). Both add a
+configurable latency to every send and fail a configurable fraction of
+them, and count connections so benchmarks can see pooling at work.
+
+Point the app at them with:
+    TWILIO_API_BASE_URL=http://127.0.0.1:<twilio port>
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=<smtp port> SMTP_STARTTLS=false
+
+Usage:
+    python benchmarks/fake_providers.py --twilio-port 8099 --smtp-port 2525 --latency-ms 80 --failure-rate 0.02
+"""
+
+import argparse
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+class FaultInjector:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        """
+        Initialize the latency and failure settings shared by a fake service
+
+        Args:
+            latency: Seconds added to every send
+            jitter: Extra random latency in seconds, uniform in [0, jitter]
+            failure_rate: Fraction of sends that fail
+            seed: Random seed, so runs fail the same sends
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.open_connections = 0
+        self.peak_connections = 0
+        self.sends = 0
+        self.failures = 0
+
+    def delay_and_decide(self) -> bool:
+        """
+        Sleep for the configured latency and decide whether the send fails
+
+        Returns:
+            True if the send should fail
+        """
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+            self.sends += 1
+            self.failures += fail
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections += 1
+            self.open_connections += 1
+            self.peak_connections = max(self.peak_connections, self.open_connections)
+
+    def connection_closed(self):
+        with self._lock:
+            self.open_connections -= 1
+
+    def reset_peak(self):
+        """
+        Start tracking peak connections from the currently open ones
+        """
+        with self._lock:
+            self.peak_connections = self.open_connections
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get send and connection counters
+
+        Returns:
+            Dictionary with sends, failures and connection counts
+        """
+        with self._lock:
+            return {
+                "sends": self.sends,
+                "failures": self.failures,
+                "connections": self.connections,
+                "peak_connections": self.peak_connections
+            }
+
+class _TwilioHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API, so client connection pools are exercised
+    protocol_version = "HTTP/1.1"
+    path_pattern = re.compile(r"^/2010-04-01/Accounts/(?P<sid>[^/]+)/(?P<resource>Messages|Calls)\.json$")
+
+    def setup(self):
+        super().setup()
+        self.server.faults.connection_opened()
+
+    def finish(self):
+        super().finish()
+        self.server.faults.connection_closed()
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        match = self.path_pattern.match(self.path)
+        if match is None:
+            self._reply(404, {"code": 20404, "message": "The requested resource was not found"})
+            return
+
+        if self.server.faults.delay_and_decide():
+            self._reply(503, {"code": 20503, "message": "Service unavailable (injected failure)"})
+            return
+
+        resource = match.group("resource")
+        prefix = "SM" if resource == "Messages" else "CA"
+        record = {
+            "sid": prefix + uuid.uuid4().hex,
+            "account_sid": match.group("sid"),
+            "to": form.get("To", [""])[0],
+            "from": form.get("From", [""])[0],
+            "status": "queued"
+        }
+        with self.server.lock:
+            self.server.records.setdefault(resource, []).append(record)
+        self._reply(201, record)
+
+    def _reply(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeTwilioServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, faults: Optional[FaultInjector] = None):
+        """
+        Initialize an HTTP server mimicking the Twilio Messages and Calls API
+
+        Args:
+            port: Port to listen on (0 picks a free one)
+            faults: Latency and failure settings
+        """
+        super().__init__(("127.0.0.1", port), _TwilioHandler)
+        self.faults = faults or FaultInjector()
+        self.records: Dict[str, list] = {}
+        self.lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeTwilioServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-twilio", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        faults = self.server.faults
+        faults.connection_opened()
+        try:
+            self._session(faults)
+        finally:
+            faults.connection_closed()
+
+    def _session(self, faults: FaultInjector):
+        self.wfile.write(b"220 fake-smtp ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-fake-smtp\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verb == "HELO":
+                self.wfile.write(b"250 fake-smtp\r\n")
+            elif verb == "AUTH":
+                self.wfile.write(b"235 Authentication successful\r\n")
+            elif verb == "DATA":
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                data = b""
+                while not data.endswith(b"\r\n.\r\n"):
+                    chunk = self.rfile.readline()
+                    if not chunk:
+                        return
+                    data += chunk
+                if faults.delay_and_decide():
+                    self.wfile.write(b"451 Temporary failure (injected)\r\n")
+                    continue
+                with self.server.lock:
+                    self.server.messages.append(data)
+                self.wfile.write(b"250 Queued\r\n")
+            elif verb == "QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.wfile.write(b"250 OK\r\n")
+
+class FakeSmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0, faults: Optional[FaultInjector] = None):
+        """
+        Initialize an SMTP sink that accepts any login and keeps the messages
+
+        Args:
+            port: Port to listen on (0 picks a free one)
+            faults: Latency and failure settings
+        """
+        super().__init__(("127.0.0.1", port), _SmtpHandler)
+        self.faults = faults or FaultInjector()
+        self.messages = []
+        self.lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "FakeSmtpServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-smtp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Twilio and SMTP services")
+    parser.add_argument("--twilio-port", type=int, default=8099)
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latency added to every send")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of sends that fail")
+    args = parser.parse_args()
+
+    def faults():
+        return FaultInjector(args.latency_ms / 1000, args.jitter_ms / 1000, args.failure_rate)
+
+    twilio = FakeTwilioServer(args.twilio_port, faults()).start()
+    smtp = FakeSmtpServer(args.smtp_port, faults()).start()
+    print(f"TWILIO_API_BASE_URL={twilio.base_url}")
+    print(f"SMTP_SERVER=127.0.0.1 SMTP_PORT={smtp.port} SMTP_STARTTLS=false")
+
+    try:
+        while True:
+            time.sleep(10)
+            print(f"twilio {twilio.faults.get_stats()} smtp {smtp.faults.get_stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        twilio.stop()
+        smtp.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Measure API import time and first-request latency in fresh interpreters
+
+Each run starts a new Python process, times `import main`, lists which heavy
+ML modules the import pulled in, then times the first and second
+/detect-video requests (the first one loads the detection stack unless the
+warm-up already did).
+
+Usage:
+    python benchmarks/startup_latency.py --runs 5
+    python benchmarks/startup_latency.py --warmup
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["mediapipe", "tensorflow", "librosa", "sklearn", "twilio", "pyttsx3"]
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - started
+heavy = [m for m in HEAVY_MODULES if m in sys.modules]
+
+import cv2
+import numpy as np
+from fastapi.testclient import TestClient
+
+ok, jpeg = cv2.imencode(".jpg", np.zeros((240, 320, 3), dtype=np.uint8))
+files = {"video_frame": ("frame.jpg", jpeg.tobytes(), "image/jpeg")}
+
+if WARMUP:
+    main.warmup_manager.start()
+    while not main.warmup_manager.get_status()["ready"]:
+        time.sleep(0.01)
+warmup_seconds = time.perf_counter() - started - import_seconds
+
+client = TestClient(main.app)
+latencies = []
+for _ in range(2):
+    t = time.perf_counter()
+    client.post("/api/fall-detection/detect-video", files=files, data={"user_id": "1", "stream_id": "bench"})
+    latencies.append(time.perf_counter() - t)
+
+print(json.dumps({"import": import_seconds, "warmup": warmup_seconds,
+                  "first": latencies[0], "second": latencies[1], "heavy": heavy}))
+"""
+
+def run_once(warmup: bool) -> dict:
+    """
+    Measure one cold start in a child process
+
+    Args:
+        warmup: Wait for the background warm-up before the first request
+
+    Returns:
+        Timings in seconds and the heavy modules loaded by the import
+    """
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nWARMUP = {warmup!r}\n" + CHILD
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold start benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="Number of cold starts")
+    parser.add_argument("--warmup", action="store_true", help="Warm up models before the first request")
+    args = parser.parse_args()
+
+    results = [run_once(args.warmup) for _ in range(args.runs)]
+
+    rows = [("import", "import main"), ("first", "first request"), ("second", "second request")]
+    if args.warmup:
+        rows.insert(1, ("warmup", "warm-up"))
+
+    for key, label in rows:
+        values = [r[key] * 1000 for r in results]
+        print(f"{label:>15}: median {statistics.median(values):8.1f}ms  max {max(values):8.1f}ms")
+    print(f"Heavy modules loaded by import: {', '.join(results[0]['heavy']) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
 import json
 from app.api import router as api_router
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
+from app.core.calibration import calibration_cache
+from app.core.escalation import acknowledge_alert, escalation_scheduler
+from app.core.inference_executor import inference_executor, loop_lag_monitor
+from app.core.job_queue import emergency_jobs, guidance_jobs
+from app.core.lazy_loader import warmup_manager
+from app.core.metrics import metrics
+from app.core.notification_channels import notification_runtime
+from app.core.notification_outbox import notification_dispatcher
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
@@ -23,9 +33,55 @@ app.add_middleware(
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("startup")
+async def start_background_services():
+    # Pick up per-user calibrations outside the detection request path
+    calibration_cache.start_refresher(
+        SessionLocal, float(os.getenv("CALIBRATION_REFRESH_SECONDS", "30")))
+    # Expose how long blocking work stalls the event loop
+    loop_lag_monitor.start()
+    # Load ML models in the background instead of at import or on the first request
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        warmup_manager.start()
+    # Deliver queued alert notifications (set OUTBOX_DISPATCHER_WORKERS=0 to run the
+    # dispatcher as its own process with python -m app.core.notification_outbox)
+    notification_dispatcher.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    calibration_cache.stop_refresher()
+    await loop_lag_monitor.stop()
+    inference_executor.shutdown()
+    emergency_jobs.stop()
+    guidance_jobs.stop()
+    escalation_scheduler.stop()
+    notification_dispatcher.stop()
+    await notification_runtime.aclose()
+    notification_runtime.shutdown()
+
+def acknowledge_alert_message(alert_id) -> bool:
+    """
+    Acknowledge an alert on behalf of a WebSocket client
+    
+    Args:
+        alert_id: ID of the alert from the client message
+        
+    Returns:
+        True if the alert exists
+    """
+    try:
+        alert_id = int(alert_id)
+    except (TypeError, ValueError):
+        return False
+    db = SessionLocal()
+    try:
+        return acknowledge_alert(db, alert_id) is not None
+    finally:
+        db.close()
+
 # Simple WebSocket endpoint
 @app.websocket("/ws")
-async def websocket_endpoint(websocket):
+async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     print("WebSocket connection established")
     
@@ -72,6 +128,15 @@ async def websocket_endpoint(websocket):
                         "message": "Fall detection stopped"
                     }))
                     
+                elif message.get("type") == "acknowledge_alert":
+                    alert_id = message.get("alert_id")
+                    acknowledged = await run_in_threadpool(acknowledge_alert_message, alert_id)
+                    await websocket.send_text(json.dumps({
+                        "type": "alert_acknowledged" if acknowledged else "error",
+                        "alert_id": alert_id,
+                        "message": "Alert acknowledged, escalation stopped" if acknowledged else "Alert not found"
+                    }))
+                    
                 elif message.get("type") == "emergency_call":
                     print("Emergency call requested")
                     await websocket.send_text(json.dumps({
@@ -103,6 +168,21 @@ async def websocket_endpoint(websocket):
 async def root():
     return {"message": "CareConnect - AI Guardian for the Elderly"}
 
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    # 503 until every lazily loaded component has finished loading (or failed to)
+    status = warmup_manager.get_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    # Per-stage latency histograms in the Prometheus text format
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
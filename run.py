@@ -6,31 +6,210 @@ Main entry point for the application
 
 import uvicorn
 import argparse
+import gc
 import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+CC1_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CC1")
+
+def report_memory(workers: dict):
+    """
+    Print the memory use of the parent and each worker process
+
+    Args:
+        workers: Mapping of worker PID to worker index
+    """
+    from app.utils.process_memory import read_process_memory
+
+    print("📊 Memory (MB):   pid      rss      pss   shared  private")
+    rows = [("parent", os.getpid())]
+    rows += [(f"worker {index}", pid) for pid, index in sorted(workers.items(), key=lambda w: w[1])]
+    for label, pid in rows:
+        memory = read_process_memory(pid)
+        values = [memory[key] for key in ("rss_mb", "pss_mb", "shared_mb", "private_mb")]
+        print(f"   {label:>10} {pid:>7} " + " ".join(f"{v:8.1f}" if v is not None else "       -" for v in values))
+
+def start_inference_server(address: str) -> subprocess.Popen:
+    """
+    Start the shared inference server process and wait until it accepts connections
+
+    Args:
+        address: Unix socket path or loopback host:port for the server
+
+    Returns:
+        The server process
+    """
+    print(f"🧠 Starting inference server on {address}...")
+    # The server refuses to start without a key; workers inherit this one
+    if not os.getenv("INFERENCE_SERVER_AUTHKEY"):
+        os.environ["INFERENCE_SERVER_AUTHKEY"] = secrets.token_hex(32)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.core.inference_server", "--address", address], cwd=CC1_DIR)
+
+    host, sep, port = address.rpartition(":")
+    deadline = time.monotonic() + 300
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Inference server exited with status {process.returncode}")
+        if sep and port.isdigit() and "/" not in address:
+            try:
+                socket.create_connection((host, int(port)), timeout=1).close()
+                break
+            except OSError:
+                pass
+        elif os.path.exists(address):
+            break
+        time.sleep(0.2)
+    else:
+        process.terminate()
+        raise RuntimeError("Inference server did not start in time")
+
+    # Workers read this when the detection module is imported
+    os.environ["INFERENCE_SERVER_ADDRESS"] = address
+    return process
+
+def serve_prefork(args):
+    """
+    Load models once in this process, then fork workers that share them copy-on-write
+
+    Workers accept connections on one listening socket created before the fork.
+    The parent restarts workers that exit and periodically reports their memory.
+
+    Incident coalescing and alert cooldowns, admission rate limits and the calibration
+    cache live in each worker, so a user whose requests land on different workers can
+    get duplicate alerts and up to N times their frame rate limit.
+
+    Args:
+        args: Parsed command line arguments
+    """
+    import main as app_module
+    from app.core.lazy_loader import warmup_manager
+    from app.database import engine
+
+    print(f"⚠️  {args.workers} workers keep incident dedup, alert cooldowns, admission limits "
+          "and the calibration cache per process: duplicate alerts are possible for one user")
+
+    print(f"📦 Loading models in parent process {os.getpid()}...")
+    started = time.perf_counter()
+    warmup_manager.load_all()
+    print(f"✅ Models loaded in {time.perf_counter() - started:.1f}s")
+
+    # Move everything allocated so far out of the collector's reach, so GC passes
+    # in the workers do not write to (and un-share) the inherited pages
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: drop the connection pool inherited from the parent without closing
+            # its connections (the parent owns them), then rebuild per-process state
+            engine.dispose(close=False)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            warmup_manager.after_fork()
+            config = uvicorn.Config(app_module.app, log_level="info")
+            uvicorn.Server(config).run(sockets=[sock])
+            os._exit(0)
+        workers[pid] = index
+        print(f"👷 Worker {index} started (pid {pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(args.workers):
+        spawn(index)
+
+    next_report = time.monotonic() + 5
+    while not stopping:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid and pid in workers:
+            index = workers.pop(pid)
+            print(f"⚠️  Worker {index} (pid {pid}) exited with status {status}, restarting")
+            spawn(index)
+
+        if args.memory_report_interval > 0 and time.monotonic() >= next_report:
+            report_memory(workers)
+            next_report = time.monotonic() + args.memory_report_interval
+
+        time.sleep(0.5)
+
+    print("🛑 Stopping workers...")
+    for pid in workers:
+        os.kill(pid, signal.SIGTERM)
+    for pid in workers:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
 
 def main():
     parser = argparse.ArgumentParser(description="CareConnect - AI Guardian for the Elderly")
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8002, help="Port to bind to")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
-    
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", "1")),
+                        help="Worker processes sharing models loaded before fork "
+                             "(incident dedup and rate limits stay per worker)")
+    parser.add_argument("--memory-report-interval", type=float, default=60.0,
+                        help="Seconds between per-worker memory reports (0 disables)")
+    parser.add_argument("--inference-server", nargs="?", const="/tmp/careconnect-inference.sock",
+                        metavar="ADDRESS",
+                        help="Run detection in one shared inference server process (Unix socket path or loopback host:port)")
+
     args = parser.parse_args()
-    
+
     print("🌟 Starting CareConnect - AI Guardian for the Elderly")
     print(f"🚀 Server running on http://{args.host}:{args.port}")
     print(f"📖 Documentation available at http://localhost:{args.port}/docs")
-    
+
     # Change to the CC1 directory where main.py is located
-    import sys
     sys.path.append("CC1")
-    
-    uvicorn.run(
-        "main:app",
-        host=args.host,
-        port=args.port,
-        reload=args.reload,
-        log_level="info"
-    )
+
+    inference_server = start_inference_server(args.inference_server) if args.inference_server else None
+
+    try:
+        if args.workers > 1:
+            if args.reload:
+                parser.error("--reload cannot be combined with --workers")
+            if not hasattr(os, "fork"):
+                parser.error("--workers requires a platform with fork()")
+            serve_prefork(args)
+            return
+
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            reload=args.reload,
+            log_level="info"
+        )
+    finally:
+        if inference_server is not None:
+            inference_server.terminate()
+            inference_server.wait()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -23,7 +23,8 @@ setup(
         "sqlalchemy==2.0.23",
         "psycopg2==2.9.9",
         "websockets==12.0",
-        "twilio==8.11.0",
+        "httpx==0.27.2",
+        "aiosmtplib==3.0.1",
         "python-jose==3.3.0",
         "passlib==1.7.4",
         "python-multipart==0.0.6",
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from app.api.fall_detection import frame_priority
+from app.core.admission import (
+    PRIORITY_CRITICAL, PRIORITY_ROUTINE, AdmissionController, AdmissionRejectedError)
+from app.core.incident_manager import incident_manager
+
+def test_user_bucket_rate_limits_routine_frames():
+    controller = AdmissionController(user_rate=1.0, user_burst=2.0)
+    for _ in range(2):
+        with controller.admit(1):
+            pass
+
+    with pytest.raises(AdmissionRejectedError) as error:
+        controller.acquire(1)
+    assert error.value.status_code == 429
+    assert error.value.retry_after > 0
+
+    # Other users have their own bucket
+    with controller.admit(2):
+        pass
+
+def test_critical_work_bypasses_limits_and_holds_back_routine():
+    controller = AdmissionController(max_in_flight=1, latency_probe=lambda: 10.0)
+    with pytest.raises(AdmissionRejectedError) as error:
+        controller.acquire(1, PRIORITY_ROUTINE)
+    assert error.value.status_code == 503
+
+    controller.latency_probe = None
+    with controller.admit(1, PRIORITY_CRITICAL):
+        with controller.admit(1, PRIORITY_CRITICAL):
+            with pytest.raises(AdmissionRejectedError):
+                controller.acquire(2, PRIORITY_ROUTINE)
+
+    with controller.admit(2, PRIORITY_ROUTINE):
+        pass
+    assert controller.get_stats()["in_flight"] == {PRIORITY_CRITICAL: 0, PRIORITY_ROUTINE: 0}
+
+def test_oversized_batch_leaves_bucket_in_debt():
+    controller = AdmissionController(user_rate=10.0, user_burst=5.0)
+    controller.acquire(1, cost=50)
+    controller.release()
+    with pytest.raises(AdmissionRejectedError) as error:
+        controller.acquire(1)
+    assert error.value.retry_after > 4
+
+def test_expired_incident_drops_back_to_routine_priority():
+    user_id = 987654
+    incident_manager.observe(user_id, 0.9)
+    assert frame_priority(user_id) == PRIORITY_CRITICAL
+
+    # An incident whose last positive is older than the cooldown no longer jumps the queue
+    incident_manager.discard(user_id)
+    incident_manager.observe(user_id, 0.9, now=time.monotonic() - incident_manager.cooldown_seconds - 1)
+    assert frame_priority(user_id) == PRIORITY_ROUTINE
+    assert incident_manager.get_incident(user_id) is None
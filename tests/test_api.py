@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from main import app
@@ -60,4 +61,196 @@ def test_fall_detection_endpoint():
     })
     # This will fail because we're not providing a video file,
     # but we're testing that the endpoint exists
-    assert response.status_code == 422  # Validation error expected
\ No newline at end of file
+    assert response.status_code == 422  # Validation error expected
+
+def _jpeg_frame(value):
+    import cv2
+    import numpy as np
+    ok, buffer = cv2.imencode(".jpg", np.full((48, 64, 3), value, dtype=np.uint8))
+    return buffer.tobytes()
+
+def test_detect_video_batch_multipart():
+    files = [("frames", (f"f{i}.jpg", _jpeg_frame(i * 40), "image/jpeg")) for i in range(3)]
+    response = client.post("/api/fall-detection/detect-video-batch", files=files, data={
+        "user_id": "1",
+        "stream_id": "batch-test",
+        "timestamps": "[0.0, 0.1, 0.2]"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["frames_processed"] == 3
+    assert [frame["timestamp"] for frame in data["frames"]] == [0.0, 0.1, 0.2]
+
+def test_detect_video_batch_mjpeg():
+    boundary = "frame"
+    body = b""
+    for i in range(2):
+        body += (f"--{boundary}\r\nContent-Type: image/jpeg\r\nX-Timestamp: {i}.5\r\n\r\n").encode()
+        body += _jpeg_frame(100) + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+
+    response = client.post(
+        "/api/fall-detection/detect-video-batch?user_id=1&stream_id=mjpeg-test",
+        content=body,
+        headers={"Content-Type": f"multipart/x-mixed-replace; boundary={boundary}"}
+    )
+    assert response.status_code == 200
+    assert [frame["timestamp"] for frame in response.json()["frames"]] == [0.5, 1.5]
+
+    raw = _jpeg_frame(10) + _jpeg_frame(200) + _jpeg_frame(30)
+    response = client.post(
+        "/api/fall-detection/detect-video-batch?user_id=1",
+        content=raw,
+        headers={"Content-Type": "video/x-motion-jpeg"}
+    )
+    assert response.status_code == 200
+    assert response.json()["frames_processed"] == 3
+
+def test_frame_protocol_roundtrip():
+    from app.core.frame_protocol import encode_frame_message, decode_frame_message, KIND_JPEG
+
+    message = decode_frame_message(encode_frame_message("cam-1", 12.5, b"payload"))
+    assert message.kind == KIND_JPEG
+    assert message.stream_id == "cam-1"
+    assert message.timestamp == 12.5
+    assert message.payload == b"payload"
+
+    with pytest.raises(ValueError):
+        decode_frame_message(b"\x01\x01")
+
+def test_detection_stream_websocket():
+    from app.core.frame_protocol import encode_frame_message
+
+    with client.websocket_connect("/api/fall-detection/stream?user_id=1") as websocket:
+        websocket.send_bytes(encode_frame_message("ws-test", 1.0, _jpeg_frame(120)))
+        result = websocket.receive_json()
+        assert result["type"] == "detection"
+        assert result["stream_id"] == "ws-test"
+        assert result["timestamp"] == 1.0
+
+        websocket.send_text('{"type": "stats"}')
+        stats = websocket.receive_json()
+        assert stats["type"] == "stats"
+        assert stats["frames_processed"] == 1
+
+def test_landmark_payload_roundtrip():
+    import numpy as np
+    from app.core.frame_protocol import decode_landmarks, encode_landmarks
+
+    landmarks = np.random.rand(33, 4).astype(np.float32)
+    assert len(encode_landmarks(landmarks)) == 528
+    assert len(encode_landmarks(landmarks, half_precision=True)) == 264
+    assert np.allclose(decode_landmarks(encode_landmarks(landmarks, half_precision=True)), landmarks, atol=1e-3)
+    assert decode_landmarks(b"") is None
+
+    with pytest.raises(ValueError):
+        decode_landmarks(b"\x00" * 100)
+
+def test_detect_landmarks_endpoint_and_stream():
+    import numpy as np
+    from app.core.frame_protocol import KIND_LANDMARKS, encode_frame_message, encode_landmarks
+
+    payload = encode_landmarks(np.full((33, 4), 0.5, dtype=np.float32), half_precision=True)
+    body = encode_frame_message("edge-1", 3.0, payload, kind=KIND_LANDMARKS)
+    response = client.post("/api/fall-detection/detect-landmarks?user_id=1", content=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["stream_id"] == "edge-1"
+    assert "is_fall_detected" in data
+
+    response = client.post("/api/fall-detection/detect-landmarks?user_id=1",
+                           content=encode_frame_message("edge-1", 3.0, b"\x00" * 10, kind=KIND_LANDMARKS))
+    assert response.status_code == 400
+
+    with client.websocket_connect("/api/fall-detection/stream?user_id=1") as websocket:
+        websocket.send_bytes(encode_frame_message("edge-1", 4.0, payload, kind=KIND_LANDMARKS))
+        result = websocket.receive_json()
+        assert result["type"] == "detection"
+        assert result["timestamp"] == 4.0
+
+def test_multi_user_status_etag_and_invalidation():
+    user_data = {
+        "username": "statususer",
+        "email": "status@example.com",
+        "full_name": "Status User",
+        "phone_number": "+1234567892",
+        "role": "elderly",
+        "password": "testpassword"
+    }
+    user_id = client.post("/api/users/", json=user_data).json()["id"]
+    
+    response = client.get(f"/api/fall-detection/status?user_ids={user_id},999999")
+    assert response.status_code == 200
+    statuses = response.json()["statuses"]
+    assert [s["user_id"] for s in statuses] == [user_id, 999999]
+    assert statuses[0]["user_name"] == "Status User"
+    assert statuses[1]["user_name"] == "Unknown"
+    etag = response.headers["etag"]
+    
+    # Unchanged poll
+    response = client.get(f"/api/fall-detection/status?user_ids={user_id},999999",
+                          headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    
+    # Writing an alert invalidates the cached status
+    client.post("/api/alerts/", json={
+        "user_id": user_id, "location_lat": "0", "location_lng": "0",
+        "status": "pending", "alert_type": "manual_trigger"
+    })
+    response = client.get(f"/api/fall-detection/status?user_ids={user_id},999999",
+                          headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["statuses"][0]["active_alerts"] == 1
+    
+    single = client.get(f"/api/fall-detection/status/{user_id}").json()
+    assert single["recent_alerts"] == response.json()["statuses"][0]["recent_alerts"]
+
+def test_acknowledge_alert_over_api_and_websocket():
+    user_data = {
+        "username": "ackuser",
+        "email": "ack@example.com",
+        "full_name": "Ack User",
+        "phone_number": "+1234567893",
+        "role": "elderly",
+        "password": "testpassword"
+    }
+    user_id = client.post("/api/users/", json=user_data).json()["id"]
+    
+    def create_alert():
+        return client.post("/api/alerts/", json={
+            "user_id": user_id, "location_lat": "0", "location_lng": "0",
+            "status": "pending", "alert_type": "manual_trigger"
+        }).json()["id"]
+    
+    response = client.post(f"/api/alerts/{create_alert()}/acknowledge")
+    assert response.status_code == 200
+    assert response.json()["status"] == "acknowledged"
+    assert client.post("/api/alerts/999999/acknowledge").status_code == 404
+    
+    alert_id = create_alert()
+    with client.websocket_connect("/ws") as websocket:
+        websocket.receive_text()
+        websocket.send_text(json.dumps({"type": "acknowledge_alert", "alert_id": alert_id}))
+        assert json.loads(websocket.receive_text())["type"] == "alert_acknowledged"
+    assert client.get(f"/api/alerts/{alert_id}").json()["status"] == "acknowledged"
+
+def test_runtime_stats():
+    response = client.get("/api/fall-detection/runtime-stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["executor"]["max_workers"] >= 1
+    assert "p99_ms" in data["event_loop_lag"]
+    assert "stages" in data
+
+def test_prometheus_metrics_endpoint():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE careconnect_stage_duration_seconds histogram" in response.text
+
+def test_readiness_reports_warmup_progress():
+    response = client.get("/ready")
+    assert response.status_code in (200, 503)
+    data = response.json()
+    assert 0.0 <= data["progress"] <= 1.0
+    assert {c["name"] for c in data["components"]} >= {"fall_detector"}
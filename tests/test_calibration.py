@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app import models
+from app.core.calibration import CalibrationCache, ScoreSampler, fit_calibration, run_calibration
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def test_fit_falls_back_to_defaults_with_little_history():
+    params = fit_calibration(np.array([[0.9, 0.1]]), np.array([1]))
+    assert params["calibrated"] is False
+    assert params["threshold"] == 0.65
+
+def test_fit_separates_audio_driven_falls():
+    # Real falls are loud but poorly visible; false alarms are visible but silent
+    falls = np.column_stack([np.full(10, 0.3), np.full(10, 0.9)])
+    false_alarms = np.column_stack([np.full(10, 0.8), np.full(10, 0.1)])
+    samples = np.vstack([falls, false_alarms])
+    labels = np.array([1] * 10 + [0] * 10)
+
+    params = fit_calibration(samples, labels)
+    fused = params["video_weight"] * samples[:, 0] + params["audio_weight"] * samples[:, 1]
+
+    assert params["calibrated"] is True
+    assert np.all(fused[:10] >= params["threshold"])
+    assert np.all(fused[10:] < params["threshold"])
+
+def test_cache_miss_is_queued_not_loaded():
+    db = make_session()
+    db.add(models.user.DetectionCalibration(user_id=7, video_weight=0.3, audio_weight=0.7, threshold=0.5))
+    db.commit()
+
+    cache = CalibrationCache(capacity=2)
+    assert cache.get(7) is None
+    assert cache.get_stats()["pending"] == 1
+
+    cache.refresh(db)
+    assert cache.get(7) == {"video_weight": 0.3, "audio_weight": 0.7, "threshold": 0.5}
+
+    # Users without a calibration are remembered and not queued again
+    assert cache.get(8) is None
+    cache.refresh(db)
+    assert cache.get(8) is None
+    assert cache.get_stats()["pending"] == 0
+
+def test_refresh_picks_up_update_in_the_watermark_second():
+    db = make_session()
+    stamp = datetime(2024, 5, 1, 10, 0, 0)
+    row = models.user.DetectionCalibration(user_id=7, video_weight=0.3, audio_weight=0.7, threshold=0.5,
+                                           updated_at=stamp)
+    db.add(row)
+    db.commit()
+
+    cache = CalibrationCache()
+    cache.get(7)
+    assert cache.refresh(db) == 1
+
+    # Changed again within the same second as the last refresh
+    db.query(models.user.DetectionCalibration).update({"threshold": 0.4, "updated_at": stamp})
+    db.commit()
+    assert cache.refresh(db) == 1
+    assert cache.get(7)["threshold"] == 0.4
+    # Unchanged rows at the watermark are not counted again
+    assert cache.refresh(db) == 0
+
+def test_cache_evicts_least_recently_used():
+    cache = CalibrationCache(capacity=2)
+    cache.put(1, {"video_weight": 0.5, "audio_weight": 0.5, "threshold": 0.6})
+    cache.put(2, None)
+    cache.get(1)
+    cache.put(3, None)
+
+    assert cache.get_stats()["size"] == 2
+    assert cache.get(1) is not None
+    cache.get(2)
+    assert cache.get_stats()["pending"] == 1
+
+def test_run_calibration_labels_alert_outcomes():
+    db = make_session()
+    for i in range(12):
+        status = "resolved" if i % 2 else "false_alarm"
+        alert = models.user.Alert(user_id=1, status=status, alert_type="fall_detected")
+        db.add(alert)
+        db.flush()
+        video, audio = (0.4, 0.95) if i % 2 else (0.9, 0.05)
+        db.add(models.user.DetectionScore(
+            user_id=1, alert_id=alert.id, video_confidence=video,
+            audio_confidence=audio, hybrid_confidence=0.7))
+    db.commit()
+
+    cache = CalibrationCache()
+    results = run_calibration(db, cache=cache)
+
+    assert results[1]["calibrated"] is True
+    assert results[1]["sample_count"] == 12
+    assert cache.get(1)["threshold"] == results[1]["threshold"]
+    assert db.query(models.user.DetectionCalibration).count() == 1
+
+def test_sampler_stores_one_score_per_user_per_interval():
+    sampler = ScoreSampler(interval=10.0)
+    assert sampler.allow(1, now=100.0) is True
+    assert sampler.allow(1, now=105.0) is False
+    assert sampler.allow(2, now=105.0) is True
+    assert sampler.allow(1, now=110.0) is True
+    assert sampler.get_stats()["skipped"] == 1
+
+def test_run_calibration_prunes_oldest_scores():
+    db = make_session()
+    for i in range(5):
+        db.add(models.user.DetectionScore(
+            user_id=3, timestamp=datetime(2024, 1, 1, 0, i), video_confidence=0.1 * i,
+            audio_confidence=0.0, hybrid_confidence=0.1 * i))
+    db.commit()
+
+    run_calibration(db, max_scores=2)
+
+    kept = db.query(models.user.DetectionScore).order_by(models.user.DetectionScore.timestamp).all()
+    assert [row.timestamp.minute for row in kept] == [3, 4]
@@ -0,0 +1,76 @@
+import numpy as np
+from app.core.fall_detection.hybrid_detector import HybridFallDetector
+
+def make_frame(value):
+    return np.full((240, 320, 3), value, dtype=np.uint8)
+
+def test_static_scene_stays_in_gate():
+    detector = HybridFallDetector(cascade_mode=True)
+
+    for _ in range(20):
+        is_fall, confidence, details = detector.detect_fall(video_frame=make_frame(100), stream_id="cam1")
+        assert details["cascade"]["stage"] == "gate"
+
+    stats = detector.get_cascade_stats("cam1")
+    assert stats["frames_total"] == 20
+    assert stats["gate_triggers"] == 0
+    assert stats["full_stage_frames"] == 0
+
+def test_motion_escalates_with_buffered_window():
+    detector = HybridFallDetector(cascade_mode=True)
+
+    for _ in range(5):
+        detector.detect_fall(video_frame=make_frame(100), stream_id="cam1")
+
+    # Sudden scene change triggers the full stage over the buffered frames
+    _, _, details = detector.detect_fall(video_frame=make_frame(220), stream_id="cam1")
+    assert details["cascade"]["stage"] == "escalate"
+    assert details["cascade"]["window_frames"] == 6
+
+    _, _, details = detector.detect_fall(video_frame=make_frame(220), stream_id="cam1")
+    assert details["cascade"]["stage"] == "confirm"
+
+    stats = detector.get_cascade_stats("cam1")
+    assert stats["gate_triggers"] == 1
+    assert stats["gate_pass_rate"] == 1 / 7
+
+def test_audio_onset_escalates():
+    detector = HybridFallDetector(cascade_mode=True)
+    quiet = np.full(2205, 0.001, dtype=np.float32)
+    loud = np.full(2205, 0.5, dtype=np.float32)
+
+    for _ in range(5):
+        detector.detect_fall(audio_data=quiet, stream_id="mic1")
+    _, _, details = detector.detect_fall(audio_data=loud, stream_id="mic1")
+
+    assert details["cascade"]["stage"] == "escalate"
+    assert details["cascade"]["audio_suspicion"] == 1.0
+
+def test_stats_aggregate_across_streams():
+    detector = HybridFallDetector(cascade_mode=True)
+    detector.detect_fall(video_frame=make_frame(100), stream_id="a")
+    detector.detect_fall(video_frame=make_frame(100), stream_id="b")
+
+    stats = detector.get_cascade_stats()
+    assert stats["frames_total"] == 2
+    assert stats["streams"] == 2
+
+def test_stream_state_is_bounded_by_count_and_ttl():
+    detector = HybridFallDetector(cascade_mode=True, max_streams=3, stream_ttl=60)
+    for i in range(5):
+        detector.detect_fall(video_frame=make_frame(100), stream_id=f"cam{i}")
+    # Seeing cam2 again keeps it over cam3
+    detector.detect_fall(video_frame=make_frame(100), stream_id="cam2")
+    detector.detect_fall(video_frame=make_frame(100), stream_id="cam5")
+
+    stats = detector.get_cascade_stats()
+    assert stats["streams"] == 3
+    assert stats["evicted_streams"] == 3
+    assert stats["frames_total"] == 7
+    assert detector.get_cascade_stats("cam2")["frames_total"] == 2
+    assert detector.get_cascade_stats("cam3")["frames_total"] == 0
+
+    # Streams silent for longer than the TTL are dropped on the next new stream
+    detector.stream_ttl = 0.0
+    detector.detect_fall(video_frame=make_frame(100), stream_id="cam6")
+    assert detector.get_cascade_stats()["streams"] == 1
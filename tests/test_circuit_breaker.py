@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from app.core.notification_channels import EmailChannel, NotificationProviderError, NotificationRuntime, SmsChannel
+
+def test_breaker_opens_after_threshold_and_probes_after_reset():
+    breaker = CircuitBreaker("sms:test", failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        probe = breaker.before_call()
+        breaker.record_failure(probe)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    assert breaker.before_call() is True
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure(probe=True)
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    breaker.record_success(0.01, probe=breaker.before_call())
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()["trips"] == 2
+
+def test_adaptive_timeout_follows_latency_and_cuts_slow_calls():
+    breaker = CircuitBreaker("voice:test", failure_threshold=2, min_timeout=0.05, max_timeout=5.0)
+    assert breaker.timeout() == 5.0
+    for _ in range(20):
+        breaker.record_success(0.01)
+    assert breaker.timeout() == pytest.approx(0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        asyncio.run(breaker.call(slow))
+    assert time.perf_counter() - started < 0.5
+    assert breaker.get_stats()["timeouts"] == 1
+
+def test_rejected_requests_do_not_trip_the_circuit():
+    runtime = NotificationRuntime()
+    channel = SmsChannel(runtime, "ACbreaker", "token", "+15551234")
+    breaker = CircuitBreaker("sms:test", failure_threshold=1)
+
+    async def invalid_number():
+        raise NotificationProviderError("Invalid 'To' Phone Number", 400)
+
+    async def unavailable():
+        raise NotificationProviderError("Service unavailable", 503)
+
+    with pytest.raises(NotificationProviderError):
+        asyncio.run(breaker.call(invalid_number, channel.is_provider_failure))
+    assert breaker.state == CLOSED
+
+    with pytest.raises(NotificationProviderError):
+        asyncio.run(breaker.call(unavailable, channel.is_provider_failure))
+    assert breaker.state == OPEN
+
+def test_email_batch_records_one_probe_and_per_message_deadline():
+    runtime = NotificationRuntime()
+    channel = EmailChannel(runtime, "smtp.probe.test", 587, "alerts@example.com", "secret")
+    breaker = channel.breaker
+    breaker.reset_timeout = 0.0
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == OPEN and breaker.trips == 1
+
+    deadlines = []
+    async def failing_batch(host, port, username, password, messages, message_timeout=None):
+        deadlines.append(message_timeout)
+        return [{"success": False, "error": "timed out", "provider_failure": True, "timed_out": True,
+                 "latency_ms": 200.0} for _ in messages]
+    runtime.send_email_batch = failing_batch
+
+    results = asyncio.run(channel.send_batch(["a@example.com", "b@example.com", "c@example.com"],
+                                             "Fall detected", "Alert", {}))
+    assert not any(result["success"] for result in results)
+    assert deadlines == [breaker.max_timeout]
+    # The failed probe reopened the circuit once, not once per message
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+    assert breaker.get_stats()["timeouts"] == 3
@@ -0,0 +1,59 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app import models
+from app.core.delivery_plan import DeliveryPlan, normalize_email, normalize_phone
+from app.core.emergency_network import EmergencyNetwork
+
+def test_contact_points_are_normalized():
+    assert normalize_phone("(555) 010-2030") == "+15550102030"
+    assert normalize_phone("1-555-010-2030") == "+15550102030"
+    assert normalize_phone("+1 555.010.2030") == "+15550102030"
+    assert normalize_phone("0044 7700 900123") == "+447700900123"
+    assert normalize_phone("07700 900123", default_country_code="44") == "+447700900123"
+    assert normalize_phone("whatsapp:+15550102030") == "+15550102030"
+    assert normalize_phone("12") is None
+    assert normalize_phone("call me") is None
+    assert normalize_email("  Care.Giver@Example.COM ") == "care.giver@example.com"
+    assert normalize_email("not-an-address") is None
+
+def test_plan_sends_one_text_per_number_and_honors_preferences():
+    plan = DeliveryPlan(preferences={2: ["whatsapp", "email"], 3: ["email"]})
+    plan.mark_sent("email", "early@example.com")
+
+    plan.add("sms", "+1 555 010 2030", user_id=1)
+    plan.add("whatsapp", "555-010-2030", user_id=1)  # Same number by text
+    plan.add("voice", "5550102030", user_id=1)  # Calls are a separate medium
+    plan.add("sms", "(555) 010-9999", user_id=2)  # Prefers WhatsApp
+    plan.add("sms", "+15550107777", user_id=3)  # Email only
+    plan.add("email", "Early@Example.com", user_id=3)
+    plan.add("email", "bad-address", user_id=3)
+
+    assert plan.deliveries == [
+        ("sms", "+15550102030", 1, None), ("voice", "+15550102030", 1, None), ("whatsapp", "+15550109999", 2, None)]
+    assert plan.get_stats() == {"requested": 7, "planned": 3, "duplicates": 1, "already_sent": 1,
+                                "opted_out": 1, "invalid": 1, "sends_saved": 3}
+
+def test_contact_notifications_are_deduplicated_across_accounts_and_rungs(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plan.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        models.user.User(id=1, username="elder", full_name="Elder", role="elderly"),
+        # One person with two accounts, the number written two ways
+        models.user.User(id=2, username="cg", email="Anna@Example.com", phone_number="+1 555 010 2030",
+                         role="caregiver"),
+        models.user.User(id=3, username="cg2", email="anna@example.com", phone_number="555-010-2030",
+                         role="caregiver"),
+        models.user.NotificationPreference(user_id=3, locale="es", channels="whatsapp,email")
+    ])
+    db.add(models.user.Alert(id=10, user_id=1, status="pending", alert_type="fall_detected"))
+    db.commit()
+
+    network = EmergencyNetwork(db)
+    assert network.queue_contact_notifications(1, 10, {"user_name": "Elder"}, channels=("sms", "email")) == 2
+    # A later WhatsApp rung reaches a number already texted
+    assert network.queue_contact_notifications(1, 10, {"user_name": "Elder"}, channels=("whatsapp",)) == 0
+
+    rows = db.query(models.user.NotificationOutbox.channel, models.user.NotificationOutbox.recipient).all()
+    assert sorted(rows) == [("email", "anna@example.com"), ("sms", "+15550102030")]
@@ -0,0 +1,80 @@
+import random
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app import models
+from app.core.escalation import EscalationScheduler, TimerHeap, parse_ladder
+
+def test_timer_heap_cancels_and_pops_in_due_order():
+    heap = TimerHeap()
+    rng = random.Random(7)
+    due = {key: rng.random() for key in range(20000)}
+    for key, when in due.items():
+        heap.push(key, when, key)
+
+    cancelled = set(rng.sample(range(20000), 5000))
+    for key in cancelled:
+        assert heap.cancel(key)
+    assert not heap.cancel(next(iter(cancelled)))
+
+    fired = [payload for _, payload in heap.pop_due(1.0)]
+    assert fired == sorted(set(due) - cancelled, key=lambda key: due[key])
+    assert len(heap) == 0
+
+def test_parse_ladder_orders_rungs():
+    assert parse_ladder("sms:30, push+email:0 ,volunteers:180") == [
+        (0.0, ("push", "email")), (30.0, ("sms",)), (180.0, ("volunteers",))]
+
+def make_alert(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'escalation.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    alert = models.user.Alert(user_id=1, status="pending", alert_type="fall_detected")
+    db.add(alert)
+    db.commit()
+    return session_factory, db, alert
+
+def test_ladder_escalates_until_acknowledged(tmp_path):
+    session_factory, db, alert = make_alert(tmp_path)
+    scheduler = EscalationScheduler(session_factory, parse_ladder("push:0,sms:0.05,voice:0.3"))
+    steps = []
+    for step in ("push", "sms", "voice"):
+        scheduler.register(step, lambda db, alert, payload, step=step: steps.append(step))
+
+    assert scheduler.run_immediate(db, alert, {}) == {"push": None}
+    scheduler.schedule(alert.id, {})
+
+    deadline = time.time() + 2
+    while "sms" not in steps and time.time() < deadline:
+        time.sleep(0.01)
+    assert steps == ["push", "sms"]
+
+    # Acknowledged before the voice rung
+    alert.status = "acknowledged"
+    db.commit()
+    assert scheduler.cancel(alert.id)
+    time.sleep(0.4)
+    scheduler.stop()
+
+    assert steps == ["push", "sms"]
+    assert scheduler.get_stats()["pending"] == 0
+    assert scheduler.get_stats()["cancelled"] == 1
+
+def test_rung_is_skipped_when_acknowledged_elsewhere(tmp_path):
+    session_factory, db, alert = make_alert(tmp_path)
+    scheduler = EscalationScheduler(session_factory, parse_ladder("sms:0.05"))
+    steps = []
+    scheduler.register("sms", lambda db, alert, payload: steps.append("sms"))
+
+    scheduler.schedule(alert.id, {})
+    # Another worker acknowledged: this process never saw the cancel
+    alert.status = "acknowledged"
+    db.commit()
+    time.sleep(0.2)
+    scheduler.stop()
+
+    assert steps == []
+    assert scheduler.get_stats()["skipped"] == 1
@@ -0,0 +1,61 @@
+from app.core.incident_manager import IncidentManager
+
+def test_repeated_positives_coalesce_into_one_incident():
+    manager = IncidentManager(cooldown_seconds=10)
+
+    incident, is_new, _ = manager.observe(1, 0.7, now=0.0)
+    assert is_new
+    manager.attach_alert(1, 42)
+
+    for step in range(1, 30):
+        incident, is_new, _ = manager.observe(1, 0.7, now=step * 0.1)
+        assert not is_new
+
+    assert incident.alert_id == 42
+    assert incident.positive_frames == 30
+    assert manager.suppressed_positives == 29
+
+def test_peak_confidence_is_tracked():
+    manager = IncidentManager(cooldown_seconds=10)
+    manager.observe(1, 0.7, now=0.0)
+
+    _, _, peak_raised = manager.observe(1, 0.9, now=1.0)
+    assert peak_raised
+    _, _, peak_raised = manager.observe(1, 0.8, now=2.0)
+    assert not peak_raised
+
+    # Peak raised before the alert existed is reported when the alert is attached
+    incident = manager.attach_alert(1, 5)
+    assert incident is not None and incident.peak_confidence == 0.9
+
+def test_cooldown_and_resolve_open_new_incidents():
+    manager = IncidentManager(cooldown_seconds=10)
+    manager.observe(1, 0.7, now=0.0)
+    manager.attach_alert(1, 1)
+
+    _, is_new, _ = manager.observe(1, 0.7, now=20.0)
+    assert is_new
+    manager.attach_alert(1, 2)
+
+    assert not manager.resolve(1, alert_id=1)
+    assert manager.resolve(1, alert_id=2)
+    _, is_new, _ = manager.observe(1, 0.7, now=21.0)
+    assert is_new
+
+def test_users_are_independent():
+    manager = IncidentManager(cooldown_seconds=10)
+    _, first, _ = manager.observe(1, 0.7, now=0.0)
+    _, second, _ = manager.observe(2, 0.7, now=0.0)
+    assert first and second
+    assert len(manager.get_active_incidents(now=1.0)) == 2
+    assert manager.get_active_incidents(now=100.0) == []
+
+def test_is_active_expires_incidents_after_cooldown():
+    manager = IncidentManager(cooldown_seconds=10)
+    manager.observe(1, 0.7, now=0.0)
+
+    assert manager.is_active(1, now=5.0)
+    assert not manager.is_active(1, now=11.0)
+    # The expired incident was evicted
+    assert manager.get_incident(1) is None
+    assert not manager.is_active(2, now=0.0)
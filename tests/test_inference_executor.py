@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.admission import PRIORITY_CRITICAL
+from app.core.inference_executor import EventLoopLagMonitor, ExecutorSaturatedError, InferenceExecutor
+
+def test_executor_rejects_when_saturated():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(lambda: "rejected")
+
+        release.set()
+        return await running, await queued
+
+    assert asyncio.run(scenario()) == (True, "queued")
+    stats = executor.get_stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["queued"] == 0
+    executor.shutdown()
+
+def test_critical_job_runs_when_routine_work_saturates_the_executor():
+    executor = InferenceExecutor(max_workers=1, max_queue=2, critical_reserve=1)
+    release = threading.Event()
+    order = []
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        queued = [asyncio.ensure_future(executor.run(order.append, f"routine {i}")) for i in range(2)]
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(order.append, "routine rejected")
+        critical = asyncio.ensure_future(executor.run(order.append, "critical", priority=PRIORITY_CRITICAL))
+        await asyncio.sleep(0.05)
+
+        release.set()
+        await asyncio.gather(running, critical, *queued)
+
+    asyncio.run(scenario())
+    # The critical job overtakes routine jobs queued before it
+    assert order == ["critical", "routine 0", "routine 1"]
+    assert executor.get_stats()["rejected"] == 1
+    executor.shutdown()
+
+def test_cancelled_caller_keeps_slot_until_job_finishes():
+    executor = InferenceExecutor(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        await asyncio.sleep(0.01)
+
+        # The worker thread is still busy, so the slot is still taken
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(lambda: "rejected")
+
+        release.set()
+        await asyncio.sleep(0.05)
+        return await executor.run(lambda: "accepted")
+
+    assert asyncio.run(scenario()) == "accepted"
+    executor.shutdown()
+
+def test_lag_monitor_measures_blocked_loop():
+    monitor = EventLoopLagMonitor(interval=0.01)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.2)  # Block the loop
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    stats = monitor.get_stats()
+    assert stats["samples"] > 0
+    assert stats["max_ms"] >= 150
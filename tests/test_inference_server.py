@@ -0,0 +1,139 @@
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import numpy as np
+import pytest
+
+from app.core.inference_server import InferenceServer, RemoteFallDetector
+
+AUTHKEY = b"test-key"
+
+class FakeDetector:
+    VIDEO_WEIGHT = 0.6
+    AUDIO_WEIGHT = 0.4
+    HYBRID_THRESHOLD = 0.65
+    cascade_mode = False
+
+    def __init__(self):
+        self.views = []
+        self.reset = []
+
+    def detect_fall(self, video_frame=None, audio_data=None, sample_rate=None, stream_id="default", params=None,
+                    timestamp=None):
+        self.views.append(not video_frame.flags.owndata)
+        confidence = float(video_frame.mean()) / 255
+        return confidence > 0.5, confidence, {"stream_id": stream_id}
+
+    def reset_stream(self, stream_id):
+        self.reset.append(stream_id)
+
+def test_remote_detection_through_shared_memory():
+    detector = FakeDetector()
+    address = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    server = InferenceServer(detector, address, AUTHKEY, batch_window=0.05)
+    server.start()
+
+    client = RemoteFallDetector(address, AUTHKEY, slots=4, slot_bytes=64 * 48 * 3)
+    try:
+        assert client.HYBRID_THRESHOLD == 0.65
+
+        results = {}
+        def detect(value):
+            frame = np.full((48, 64, 3), value, dtype=np.uint8)
+            results[value] = client.detect_fall(video_frame=frame, stream_id=f"cam-{value}")
+
+        threads = [threading.Thread(target=detect, args=(value,)) for value in (0, 100, 200, 255)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results[200][0] and not results[100][0]
+        assert abs(results[100][1] - 100 / 255) < 1e-6
+        assert results[255][2] == {"stream_id": "cam-255"}
+
+        # Frames reached the detector as views of the shared slots
+        assert all(detector.views)
+        # Oversized frames fall back to being sent inline
+        assert client.detect_fall(video_frame=np.zeros((100, 100, 3), dtype=np.uint8))[1] == 0.0
+
+        client.reset_stream("cam-0")
+        assert detector.reset == ["cam-0"]
+        assert server.get_stats()["requests"] == 5
+    finally:
+        client.close()
+        server.stop()
+
+class GatedDetector(FakeDetector):
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def detect_fall(self, video_frame=None, **kwargs):
+        self.gate.wait(5)
+        return super().detect_fall(video_frame=video_frame, **kwargs)
+
+def test_server_requires_authkey_and_local_address():
+    address = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    with pytest.raises(ValueError):
+        InferenceServer(FakeDetector(), address)
+    with pytest.raises(ValueError):
+        InferenceServer(FakeDetector(), "0.0.0.0:7700", AUTHKEY)
+    with pytest.raises(ValueError):
+        RemoteFallDetector(address)
+    InferenceServer(FakeDetector(), "127.0.0.1:7700", AUTHKEY)
+
+def test_slot_is_held_until_a_late_reply():
+    detector = GatedDetector()
+    address = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    server = InferenceServer(detector, address, AUTHKEY)
+    server.start()
+
+    client = RemoteFallDetector(address, AUTHKEY, slots=1, slot_bytes=16 * 16 * 3, timeout=0.2)
+    frame = np.full((16, 16, 3), 200, dtype=np.uint8)
+    try:
+        with pytest.raises(TimeoutError):
+            client.detect_fall(video_frame=frame)
+        # The server may still read the frame, so its slot is not reused
+        with pytest.raises(queue.Empty):
+            client.detect_fall(video_frame=frame)
+
+        detector.gate.set()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            try:
+                assert client.detect_fall(video_frame=frame)[0]
+                break
+            except queue.Empty:
+                pass
+        else:
+            pytest.fail("slot was not returned after the late reply")
+    finally:
+        client.close()
+        server.stop()
+
+def test_client_reconnects_after_server_restart():
+    address = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    server = InferenceServer(FakeDetector(), address, AUTHKEY)
+    server.start()
+    client = RemoteFallDetector(address, AUTHKEY, slot_bytes=16 * 16 * 3)
+    frame = np.full((16, 16, 3), 200, dtype=np.uint8)
+    try:
+        assert client.detect_fall(video_frame=frame)[0]
+        server.stop()
+
+        server = InferenceServer(FakeDetector(), address, AUTHKEY)
+        server.start()
+        deadline = time.monotonic() + 10
+        while client.reconnects == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        assert client.reconnects == 1
+        assert client.detect_fall(video_frame=frame)[0]
+    finally:
+        client.close()
+        server.stop()
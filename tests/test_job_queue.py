@@ -0,0 +1,47 @@
+import time
+
+from app.core.job_queue import JobQueue
+
+def wait_for(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get_job(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def test_job_retries_until_success():
+    queue = JobQueue("test", workers=1, retry_base_delay=0.01)
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload["alert_id"])
+        if len(calls) < 3:
+            raise RuntimeError("provider unavailable")
+        return {"sent": True}
+
+    queue.register("flaky", flaky)
+    job = wait_for(queue, queue.enqueue("flaky", {"alert_id": 7}).id)
+
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 3
+    assert job["result"] == {"sent": True}
+    assert queue.get_stats()["retried"] == 2
+    assert [j["id"] for j in queue.get_jobs(alert_id=7)] == [job["id"]]
+    queue.stop()
+
+def test_job_fails_after_max_attempts():
+    queue = JobQueue("test", workers=2, retry_base_delay=0.01)
+
+    def broken(payload):
+        raise RuntimeError("boom")
+
+    queue.register("broken", broken)
+    job = wait_for(queue, queue.enqueue("broken", {}, max_attempts=2).id)
+
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["error"] == "boom"
+    assert queue.get_stats()["failed"] == 1
+    queue.stop()
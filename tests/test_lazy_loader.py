@@ -0,0 +1,50 @@
+import threading
+
+from app.core.lazy_loader import LazyComponent, WarmupManager
+
+def test_component_loads_once_on_first_use():
+    calls = []
+    component = LazyComponent("model", lambda: calls.append(1) or "loaded")
+    assert component.state == "pending"
+
+    threads = [threading.Thread(target=component.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert component.get() == "loaded"
+    assert component.state == "ready"
+    assert len(calls) == 1
+
+def test_failed_component_is_unavailable_and_counts_as_warm():
+    def broken():
+        raise ImportError("No module named 'mediapipe'")
+
+    manager = WarmupManager()
+    component = manager.register(LazyComponent("detector", broken))
+    assert manager.get_status()["ready"] is False
+
+    assert component.get() is None
+    assert not component.available
+    status = manager.get_status()
+    assert status["ready"] is True
+    assert status["components"][0]["error"] == "No module named 'mediapipe'"
+
+def test_after_fork_rebuilds_or_reloads_components():
+    rebuilt = []
+    shared = LazyComponent("detector", lambda: "model", after_fork=rebuilt.append)
+    private = LazyComponent("speech", lambda: object(), fork_safe=False)
+    manager = WarmupManager()
+    manager.register(shared)
+    manager.register(private)
+    manager.load_all()
+    assert private.state == "pending"
+    parent_engine = private.get()
+
+    manager.after_fork()
+
+    assert rebuilt == ["model"]
+    assert shared.get() == "model"
+    assert private.state == "pending"
+    assert private.get() is not parent_engine
@@ -0,0 +1,43 @@
+import pytest
+
+from app.core.message_templates import (
+    CATALOG, TemplateRegistry, build_alert_context, message_templates, sms_segments
+)
+
+CONTEXT = build_alert_context({"user_name": "Ana <Ruiz>", "timestamp": "2024-05-01 10:00:00",
+                               "location": "Living Room", "status": "Fall detected"})
+
+def test_incident_renders_each_channel_and_locale_once():
+    messages = message_templates.for_incident(CONTEXT)
+    first = messages.get("email", "es-MX")
+    for locale in ("es", "es_MX", "ES"):
+        assert messages.get("email", locale) is first
+    messages.get("email", None)
+    messages.get("email", "de")  # No German templates: default locale
+
+    assert first.subject == "Alerta de emergencia - Caída detectada: Ana <Ruiz>"
+    assert messages.renders == 2
+    assert messages.lookups == 6
+
+def test_voice_fields_are_escaped_for_twiml():
+    body = message_templates.for_incident(CONTEXT).get("voice", "fr").body
+    assert body.startswith('<Response><Say language="fr-FR">')
+    assert "Ana &lt;Ruiz&gt;" in body
+
+def test_sms_uses_longest_variant_within_segment_budget():
+    assert sms_segments("a" * 160) == 1
+    assert sms_segments("a" * 161) == 2
+    assert sms_segments("🚨" + "a" * 68) == 1
+    assert sms_segments("é" * 150 + "€" * 6) == 2
+
+    context = dict(CONTEXT, location="Apartment 4B, 1200 Riverside Boulevard, Springfield")
+    full = TemplateRegistry(CATALOG, sms_max_segments=2).render("sms", "en", context)
+    short = TemplateRegistry(CATALOG, sms_max_segments=1).render("sms", "en", context)
+    assert full.body.startswith("EMERGENCY: Fall detected for Ana <Ruiz> at 2024-05-01 10:00:00")
+    assert full.segments == 2
+    assert short.body == f"FALL ALERT: Ana <Ruiz> at {context['location']}. Check on them now!"
+    assert short.segments == 1
+
+def test_unknown_template_field_fails_at_compile_time():
+    with pytest.raises(ValueError):
+        TemplateRegistry({"en": {"default": {"body": "Fall detected for {username}"}}})
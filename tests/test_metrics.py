@@ -0,0 +1,40 @@
+import asyncio
+
+from app.core.metrics import MetricsRegistry
+
+def test_stage_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    registry.observe("video_detector", "pose_process", 0.003)
+    registry.observe("video_detector", "pose_process", 0.2)
+    registry.observe("video_detector", "pose_process", 30.0)
+
+    text = registry.render_prometheus()
+    labels = 'component="video_detector",stage="pose_process"'
+    assert f'careconnect_stage_duration_seconds_bucket{{{labels},le="0.005"}} 1' in text
+    assert f'careconnect_stage_duration_seconds_bucket{{{labels},le="0.25"}} 2' in text
+    assert f'careconnect_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f"careconnect_stage_duration_seconds_count{{{labels}}} 3" in text
+
+def test_timed_decorator_handles_sync_and_async():
+    registry = MetricsRegistry()
+
+    @registry.timed("alert_system", "sms")
+    def send():
+        return "sent"
+
+    @registry.timed("connection_manager")
+    async def broadcast():
+        return "done"
+
+    assert send() == "sent"
+    assert asyncio.run(broadcast()) == "done"
+
+    stats = registry.get_stats()
+    assert stats["alert_system.sms"]["count"] == 1
+    assert stats["connection_manager.broadcast"]["count"] == 1
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.stage("api", "imdecode"):
+        pass
+    assert registry.get_stats() == {}
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from app.core.notification_channels import NotificationRuntime, SmsChannel
+
+class FakeTwilioHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        to = form["To"][0]
+        if to == "+15550000":
+            status, body = 400, {"code": 21211, "message": f"Invalid 'To' Phone Number: {to}"}
+        else:
+            status, body = 201, {"sid": "SM" + to[1:], "to": to, "body": form["Body"][0]}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_fan_out_is_concurrent_bounded_and_ordered():
+    runtime = NotificationRuntime(per_alert=4)
+    active = [0, 0]  # current, peak
+
+    async def send_one(recipient):
+        active[0] += 1
+        active[1] = max(active[1], active[0])
+        await asyncio.sleep(0.05)
+        active[0] -= 1
+        if recipient == "bad":
+            raise RuntimeError("rejected")
+        return {"phone_number": recipient}
+
+    recipients = [f"+1555000{i}" for i in range(7)] + ["bad"]
+    started = time.perf_counter()
+    results = asyncio.run(runtime.fan_out("sms", recipients, send_one))
+    elapsed = time.perf_counter() - started
+
+    assert [r.get("phone_number") for r in results[:7]] == recipients[:7]
+    assert results[-1] == {"success": False, "error": "rejected", "latency_ms": results[-1]["latency_ms"]}
+    assert all(r["latency_ms"] >= 40 for r in results)
+    assert active[1] == 4
+    assert elapsed < 0.35  # Two waves of four, not eight serial sends
+
+def test_sms_channel_sends_through_twilio_api_from_sync_callers():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTwilioHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    runtime = NotificationRuntime()
+    channel = SmsChannel(runtime, "AC" + "0" * 32, "token", "+15551234",
+                         base_url=f"http://127.0.0.1:{server.server_port}")
+    try:
+        outcome = runtime.run(channel.send(["+15550001", "+15550000"], "Fall detected"))
+    finally:
+        runtime.shutdown()
+        server.shutdown()
+
+    assert outcome["success"] is True
+    sent, rejected = outcome["results"]
+    assert sent["message_sid"] == "SM15550001"
+    assert rejected["success"] is False
+    assert "Invalid 'To' Phone Number" in rejected["error"]
+    assert rejected["phone_number"] == "+15550000"
+
+def test_unconfigured_channel_reports_error():
+    channel = SmsChannel(NotificationRuntime(), "", "", "")
+    assert asyncio.run(channel.send(["+15550001"], "Fall detected")) == {
+        "success": False, "error": "Twilio not configured"}
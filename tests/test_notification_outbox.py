@@ -0,0 +1,155 @@
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app import models
+from app.core.notification_channels import EmailChannel, NotificationRuntime, PushChannel
+from app.core.notification_outbox import (
+    AlertSystemSender, OutboxDispatcher, enqueue_notification, get_alert_notifications)
+from app.core.push_providers import LocalPushProvider
+
+class FakeSender:
+    def __init__(self, fail_times=0):
+        self.fail_times = fail_times
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, rows):
+        with self._lock:
+            self.sent.extend(row.idempotency_key for row in rows)
+            if self.fail_times:
+                self.fail_times -= 1
+                return [{"success": False, "error": "provider unavailable"} for _ in rows]
+        return [{"success": True, "provider_id": f"SM{row.id}", "latency_ms": 1.0} for row in rows]
+
+def make_session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+def enqueue(session_factory, recipients):
+    db = session_factory()
+    for recipient in recipients:
+        enqueue_notification(db, 1, 1, "sms", recipient, "Fall detected")
+    db.commit()
+    db.close()
+
+def test_dispatcher_sends_and_records_attempt(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    enqueue(session_factory, ["+15550001", "+15550002"])
+    dispatcher = OutboxDispatcher(session_factory, sender=FakeSender(), name="test")
+
+    assert dispatcher.run_once() == 2
+    assert dispatcher.run_once() == 0
+
+    db = session_factory()
+    notifications = get_alert_notifications(db, 1)
+    assert [n["status"] for n in notifications] == ["sent", "sent"]
+    assert notifications[0]["provider_id"].startswith("SM")
+    assert notifications[0]["attempt_log"][0]["dispatcher"] == "test"
+
+def test_failed_send_backs_off_then_fails(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    enqueue(session_factory, ["+15550001"])
+    dispatcher = OutboxDispatcher(session_factory, sender=FakeSender(fail_times=5), name="test",
+                                  retry_base_delay=60, max_attempts=2)
+
+    assert dispatcher.run_once() == 1
+    # The retry is not due yet
+    assert dispatcher.run_once() == 0
+
+    db = session_factory()
+    db.query(models.user.NotificationOutbox).update({"next_attempt_at": models.user.NotificationOutbox.created_at})
+    db.commit()
+    assert dispatcher.run_once() == 1
+
+    db.expire_all()
+    notification = get_alert_notifications(db, 1)[0]
+    assert notification["status"] == "failed"
+    assert notification["attempts"] == 2
+    assert [a["success"] for a in notification["attempt_log"]] == [False, False]
+    assert dispatcher.get_stats()["retried"] == 1
+
+def test_concurrent_dispatchers_never_send_twice(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    recipients = [f"+1555{i:07d}" for i in range(40)]
+    enqueue(session_factory, recipients)
+    sender = FakeSender()
+    dispatchers = [OutboxDispatcher(session_factory, sender=sender, name=f"d{i}", batch_size=5) for i in range(4)]
+
+    def drain(dispatcher):
+        while dispatcher.run_once():
+            pass
+
+    threads = [threading.Thread(target=drain, args=(d,)) for d in dispatchers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(sender.sent) == sorted(f"alert-1:sms:{r}" for r in recipients)
+
+def test_lease_is_renewed_while_a_slow_send_runs(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    enqueue(session_factory, ["+15550001"])
+    started = threading.Event()
+    release = threading.Event()
+
+    class SlowSender(FakeSender):
+        def send(self, rows):
+            started.set()
+            release.wait(5)
+            return super().send(rows)
+
+    sender = SlowSender()
+    slow = OutboxDispatcher(session_factory, sender=sender, name="slow", lease_seconds=0.3)
+    other = OutboxDispatcher(session_factory, sender=sender, name="other", lease_seconds=0.3)
+    thread = threading.Thread(target=slow.run_once)
+    thread.start()
+    try:
+        assert started.wait(5)
+        # Well past the original lease, the row is still claimed by the slow dispatcher
+        time.sleep(0.8)
+        assert other.run_once() == 0
+    finally:
+        release.set()
+        thread.join()
+
+    assert sender.sent == ["alert-1:sms:+15550001"]
+    assert slow.get_stats()["lease_renewals"] >= 2
+
+def test_sender_passes_row_keys_to_providers(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    db = session_factory()
+    enqueue_notification(db, 3, 1, "email", "carer@example.com", "Fall detected", "Alert")
+    enqueue_notification(db, 3, 1, "push", "device-1", "Fall detected", "Alert")
+    db.commit()
+    rows = db.query(models.user.NotificationOutbox).order_by(models.user.NotificationOutbox.id).all()
+
+    runtime = NotificationRuntime()
+    emails = []
+    async def send_email_batch(host, port, username, password, messages, message_timeout=None):
+        emails.extend(messages)
+        return [{"success": True, "latency_ms": 1.0} for _ in messages]
+    runtime.send_email_batch = send_email_batch
+    email = EmailChannel(runtime, "smtp.example.com", 587, "alerts@example.com", "secret")
+    provider = LocalPushProvider()
+
+    class FakeAlertSystem:
+        channels = {"email": email, "push": PushChannel(runtime, provider)}
+
+        async def send_channel_alert(self, channel, recipients, message, subject=None, **options):
+            return await self.channels[channel].send(recipients, message, subject, **options)
+
+    sender = AlertSystemSender(lambda: FakeAlertSystem())
+    assert all(outcome["success"] for outcome in sender.send(rows))
+    first_message_id = emails[0]["Message-ID"]
+    sender.send(rows[:1])
+    db.close()
+
+    # A retried email carries the same Message-ID; the push data carries the row's key
+    assert first_message_id.endswith("@example.com>")
+    assert emails[1]["Message-ID"] == first_message_id
+    assert provider.delivered[0]["idempotency_key"] == "alert-3:push:device-1"
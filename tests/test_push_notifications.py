@@ -0,0 +1,130 @@
+import asyncio
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import rsa
+from jose import jwt
+from jose.backends.rsa_backend import RSAKey
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from app.database import Base
+from app.core.device_tokens import get_active_tokens, prune_invalid_tokens, register_device_token
+from app.core.notification_channels import NotificationRuntime, PushChannel
+from app.core.push_providers import FcmPushProvider, LocalPushProvider
+from main import app
+
+def test_push_channel_sends_multicast_batches_and_prunes_invalid_tokens(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tokens.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    tokens = [f"device-{i}" for i in range(7)] + ["invalid-uninstalled"]
+    for token in tokens:
+        register_device_token(db, 1, token)
+
+    provider = LocalPushProvider(max_batch=3)
+    channel = PushChannel(NotificationRuntime(), provider,
+                          on_invalid_tokens=lambda invalid: prune_invalid_tokens(invalid, session_factory=session_factory))
+    outcome = asyncio.run(channel.send(tokens, "Fall detected", "Emergency Alert"))
+
+    assert outcome["success"]
+    assert provider.requests == 3
+    assert [r["success"] for r in outcome["results"]] == [True] * 7 + [False]
+    assert outcome["results"][-1]["device_token"] == "invalid-uninstalled"
+    assert outcome["results"][-1]["invalid_token"]
+
+    db.expire_all()
+    assert get_active_tokens(db, [1]) == {1: tokens[:7]}
+
+def test_local_provider_keeps_bounded_history():
+    provider = LocalPushProvider(max_batch=10, history=3)
+    results = asyncio.run(provider.send_multicast([f"device-{i}" for i in range(5)], "Fall detected", "Alert", {}))
+
+    assert all(result["success"] for result in results)
+    assert [delivery["token"] for delivery in provider.delivered] == ["device-2", "device-3", "device-4"]
+
+def test_device_token_registration_api():
+    client = TestClient(app)
+    suffix = uuid.uuid4().hex[:8]
+    user = client.post("/api/users/", json={
+        "username": f"caregiver-{suffix}", "email": f"caregiver-{suffix}@example.com", "full_name": "Care Giver",
+        "phone_number": "+15550100", "role": "caregiver", "password": "secret"}).json()
+    token = f"fcm-{suffix}"
+
+    response = client.post(f"/api/users/{user['id']}/device-tokens/", json={"token": token, "platform": "ios"})
+    assert response.status_code == 200
+    assert response.json()["is_active"]
+    assert [t["token"] for t in client.get(f"/api/users/{user['id']}/device-tokens/").json()] == [token]
+    assert client.post(f"/api/users/{user['id']}/device-tokens/",
+                       json={"token": token, "platform": "pager"}).status_code == 400
+
+    assert client.delete(f"/api/users/{user['id']}/device-tokens/{token}").status_code == 204
+    assert client.get(f"/api/users/{user['id']}/device-tokens/").json() == []
+
+class FakeFcmHandler(BaseHTTPRequestHandler):
+    token_requests = []
+    sends = []
+
+    def do_POST(self):
+        payload = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        if self.path == "/token":
+            form = parse_qs(payload)
+            FakeFcmHandler.token_requests.append(jwt.get_unverified_claims(form["assertion"][0]))
+            status, body = 200, {"access_token": "ya29.test", "expires_in": 3600}
+        else:
+            message = json.loads(payload)["message"]
+            FakeFcmHandler.sends.append((self.path, self.headers["Authorization"], message))
+            if message["token"].startswith("invalid"):
+                status, body = 404, {"error": {"code": 404, "status": "NOT_FOUND", "details": [
+                    {"@type": "type.googleapis.com/google.firebase.fcm.v1.FcmError", "errorCode": "UNREGISTERED"}]}}
+            else:
+                status, body = 200, {"name": f"projects/careconnect-test/messages/{message['token']}"}
+        response = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_fcm_provider_fans_out_v1_sends_with_a_service_account_token():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeFcmHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    _, private_key = rsa.newkeys(1024)
+    credentials = {
+        "client_email": "alerts@careconnect-test.iam.gserviceaccount.com",
+        "private_key": RSAKey(private_key.save_pkcs1().decode(), "RS256").to_pem("PKCS8").decode(),
+        "private_key_id": "key-1",
+        "project_id": "careconnect-test",
+        "token_uri": f"{base_url}/token"
+    }
+    runtime = NotificationRuntime()
+    provider = FcmPushProvider(runtime, credentials, base_url=base_url, max_batch=2)
+    channel = PushChannel(runtime, provider)
+    tokens = ["device-1", "device-2", "invalid-uninstalled"]
+    try:
+        outcome = runtime.run(channel.send(tokens, "Fall detected", "Emergency Alert", data={"alert_id": 7},
+                                           idempotency_keys=["alert-7:push:1", "alert-7:push:2", "alert-7:push:3"]))
+    finally:
+        runtime.shutdown()
+        server.shutdown()
+
+    assert [r["success"] for r in outcome["results"]] == [True, True, False]
+    assert outcome["results"][0]["message_id"] == "projects/careconnect-test/messages/device-1"
+    assert outcome["results"][2]["invalid_token"]
+    # One access token for both batches, one v1 request per token
+    assert len(FakeFcmHandler.token_requests) == 1
+    assert FakeFcmHandler.token_requests[0]["scope"] == "https://www.googleapis.com/auth/firebase.messaging"
+    assert len(FakeFcmHandler.sends) == 3
+    path, authorization, message = FakeFcmHandler.sends[0]
+    assert path == "/v1/projects/careconnect-test/messages:send"
+    assert authorization == "Bearer ya29.test"
+    keys = {message["token"]: message["data"] for _, _, message in FakeFcmHandler.sends}
+    assert keys["device-2"] == {"alert_id": "7", "idempotency_key": "alert-7:push:2"}
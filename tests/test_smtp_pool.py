@@ -0,0 +1,100 @@
+import socket
+import socketserver
+import threading
+import time
+from email.mime.text import MIMEText
+
+from app.core.notification_pool import SmtpSessionPool
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, drop_after=None, reply_delay=0.0):
+        super().__init__(("127.0.0.1", 0), SmtpSinkHandler)
+        self.drop_after = drop_after  # Close each connection after this many messages
+        self.reply_delay = reply_delay  # Seconds before a message is acknowledged
+        self.connections = 0
+        self.messages = []
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        sent = 0
+        self.wfile.write(b"220 sink ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250 sink\r\n")
+            elif command == "DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                data = b""
+                while not data.endswith(b"\r\n.\r\n"):
+                    data += self.rfile.readline()
+                time.sleep(self.server.reply_delay)
+                self.server.messages.append(data)
+                sent += 1
+                self.wfile.write(b"250 queued\r\n")
+                if self.server.drop_after and sent >= self.server.drop_after:
+                    self.request.shutdown(socket.SHUT_RDWR)
+                    return
+            elif command == "QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+def start_sink(**kwargs):
+    sink = SmtpSink(**kwargs)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    return sink
+
+def make_messages(count):
+    messages = []
+    for i in range(count):
+        message = MIMEText("help")
+        message["From"] = "alerts@example.com"
+        message["To"] = f"caregiver{i}@example.com"
+        messages.append(message)
+    return messages
+
+def test_batch_uses_one_connection_across_calls():
+    sink = start_sink()
+    pool = SmtpSessionPool("127.0.0.1", sink.server_address[1], starttls=False)
+
+    assert all(r["success"] for r in pool.send_batch(make_messages(5)))
+    assert all(r["success"] for r in pool.send_batch(make_messages(3)))
+    assert len(sink.messages) == 8
+    assert sink.connections == 1
+
+    pool.close()
+    sink.shutdown()
+
+def test_dropped_connection_reconnects_transparently():
+    sink = start_sink(drop_after=2)
+    pool = SmtpSessionPool("127.0.0.1", sink.server_address[1], starttls=False)
+
+    results = pool.send_batch(make_messages(5))
+    assert all(r["success"] for r in results)
+    assert len(sink.messages) == 5
+    assert pool.get_stats()["reconnects"] == 2
+
+    pool.close()
+    sink.shutdown()
+
+def test_message_timeout_fails_slow_messages_without_retrying():
+    sink = start_sink(reply_delay=1.0)
+    pool = SmtpSessionPool("127.0.0.1", sink.server_address[1], starttls=False)
+
+    started = time.perf_counter()
+    results = pool.send_batch(make_messages(2), message_timeout=0.2)
+    assert time.perf_counter() - started < 1.5
+    assert [r["success"] for r in results] == [False, False]
+    assert all(r["timed_out"] and r["provider_failure"] for r in results)
+    assert pool.get_stats()["reconnects"] == 0
+
+    pool.close()
+    sink.shutdown()